@@ -0,0 +1,133 @@
+from collections import namedtuple
+from typing import Dict, Iterable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, null
+from sqlalchemy.orm import Session
+from . import models
+from .cache import TTLCache
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ACCESS_CACHE_SIZE = int(os.getenv("ACCESS_CACHE_SIZE", 10000))
+ACCESS_CACHE_TTL = float(os.getenv("ACCESS_CACHE_TTL", 60))
+
+# Resolved access for an entity: the project and board it belongs to (board_id is
+# None for projects and comments) and the user's role in that project (None when
+# the user is not a member)
+Access = namedtuple("Access", ["project_id", "board_id", "role"])
+
+# Entity type -> (model, project_id column, board_id column, joins needed to reach them).
+# Tasks and comments carry project_id themselves, so only columns need a join
+ENTITY_PATHS = {
+    "project": (models.Project, models.Project.id, None, []),
+    "board": (models.Board, models.Board.project_id, models.Board.id, []),
+    "column": (models.BoardColumn, models.Board.project_id, models.BoardColumn.board_id, [
+        (models.Board, models.BoardColumn.board_id == models.Board.id),
+    ]),
+    "task": (models.Task, models.Task.project_id, models.Task.board_id, []),
+    "comment": (models.Comment, models.Comment.project_id, None, []),
+}
+
+access_cache = TTLCache(ACCESS_CACHE_SIZE, ACCESS_CACHE_TTL)
+
+def access_query(entity_type: str, user_id: str, db: Session):
+    """Build a query of (entity id, project_id, board_id, role) joined up to the project membership"""
+    model, project_id, board_id, joins = ENTITY_PATHS[entity_type]
+
+    query = db.query(
+        model.id, project_id, board_id if board_id is not None else null(), models.ProjectMember.role
+    ).select_from(model)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return query.outerjoin(
+        models.ProjectMember,
+        and_(
+            models.ProjectMember.project_id == project_id,
+            models.ProjectMember.user_id == user_id
+        )
+    ), model
+
+def cache_access(
+    entity_type: str,
+    entity_id: str,
+    user_id: str,
+    project_id: str,
+    board_id: Optional[str],
+    role: Optional[str]
+) -> Access:
+    access = Access(project_id, board_id, role)
+    access_cache.set(
+        (user_id, entity_type, entity_id),
+        access,
+        tags=[("project", project_id), (entity_type, entity_id)]
+    )
+    return access
+
+def resolve_access(entity_type: str, entity_id: str, user_id: str, db: Session) -> Optional[Access]:
+    """Resolve an entity to its project and the user's role with a single joined query"""
+    access = access_cache.get((user_id, entity_type, entity_id))
+    if access is not None:
+        return access
+
+    query, model = access_query(entity_type, user_id, db)
+    row = query.filter(model.id == entity_id).first()
+
+    # Missing entities are not cached so they resolve as soon as they are created
+    if row is None:
+        return None
+
+    return cache_access(entity_type, entity_id, user_id, row[1], row[2], row[3])
+
+def resolve_access_many(entity_type: str, entity_ids: Iterable[str], user_id: str, db: Session) -> Dict[str, Access]:
+    """Resolve many entities of one type with a single IN query; missing ids are left out"""
+    resolved = {}
+    misses = []
+    for entity_id in set(entity_ids):
+        access = access_cache.get((user_id, entity_type, entity_id))
+        if access is None:
+            misses.append(entity_id)
+        else:
+            resolved[entity_id] = access
+
+    if misses:
+        query, model = access_query(entity_type, user_id, db)
+        for entity_id, project_id, board_id, role in query.filter(model.id.in_(misses)):
+            resolved[entity_id] = cache_access(entity_type, entity_id, user_id, project_id, board_id, role)
+
+    return resolved
+
+def require_access(
+    entity_type: str,
+    entity_id: str,
+    user_id: str,
+    db: Session,
+    roles: Optional[Iterable[str]] = None,
+    not_found_detail: Optional[str] = None,
+    forbidden_detail: Optional[str] = None
+) -> Access:
+    """Resolve access and raise 404/403 when the entity is missing or the role is insufficient"""
+    access = resolve_access(entity_type, entity_id, user_id, db)
+
+    if access is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail or f"{entity_type.capitalize()} not found"
+        )
+
+    if access.role is None or (roles is not None and access.role not in roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=forbidden_detail or f"You don't have access to this {entity_type}"
+        )
+
+    return access
+
+def invalidate_project(project_id: str):
+    """Invalidate cached access after membership changes or board/column deletes"""
+    access_cache.invalidate_tag(("project", project_id))
+
+def invalidate_entity(entity_type: str, entity_id: str):
+    """Invalidate cached access for an entity that was moved or deleted"""
+    access_cache.invalidate_tag((entity_type, entity_id))
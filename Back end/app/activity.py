@@ -0,0 +1,157 @@
+"""Write-behind activity feed for projects.
+
+Write endpoints call record_activity after they commit. The entry is stamped
+with the current time and put on a bounded in-process queue, so the request
+pays for a dict and a queue put rather than an extra INSERT. A background
+worker takes up to ACTIVITY_BATCH_SIZE entries at a time (waiting at most
+ACTIVITY_FLUSH_SECONDS for a batch to fill) and writes each batch with one
+multi-row INSERT. Stopping the worker flushes whatever is still queued.
+
+When the queue is full, record_activity waits up to ACTIVITY_ENQUEUE_TIMEOUT
+seconds for room (0, the default, never blocks a request) and then drops the
+entry. Drops, waits and failed batches are counted in stats(). The feed is
+best effort: entries still queued when a process dies are lost.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import insert
+from . import models
+from .database import SessionLocal
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ACTIVITY_QUEUE_SIZE = int(os.getenv("ACTIVITY_QUEUE_SIZE", 10000))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", 500))
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", 1))
+ACTIVITY_ENQUEUE_TIMEOUT = float(os.getenv("ACTIVITY_ENQUEUE_TIMEOUT", 0))
+
+logger = logging.getLogger(__name__)
+
+class ActivityLog:
+    """Queues activity entries and writes them in batches from a background thread"""
+
+    def __init__(self, queue_size: int, batch_size: int, flush_seconds: float, enqueue_timeout: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "waited": 0, "dropped": 0, "failed": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def record(self, entry: dict) -> bool:
+        """Queue an entry, waiting for room up to enqueue_timeout; False if it was dropped"""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.enqueue_timeout <= 0:
+                self._count("dropped")
+                return False
+            self._count("waited")
+            try:
+                self._queue.put(entry, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._count("queued")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write everything still queued, then stop the worker"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def flush(self):
+        """Wait until every entry queued so far has been written (or has failed)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _next_batch(self) -> tuple:
+        """Block for the first entry, then gather more until the batch is full or flush_seconds pass"""
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_seconds
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return batch, False
+        # The stop marker was taken too
+        return batch, True
+
+    def _write(self, batch: list):
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.Activity), batch)
+            db.commit()
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception:
+            db.rollback()
+            self._count("failed", len(batch))
+            logger.exception("Failed to write %d activity entries", len(batch))
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+            if stopping:
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "batch_size": self.batch_size,
+            **stats,
+        }
+
+activity_log = ActivityLog(ACTIVITY_QUEUE_SIZE, ACTIVITY_BATCH_SIZE, ACTIVITY_FLUSH_SECONDS, ACTIVITY_ENQUEUE_TIMEOUT)
+
+def record_activity(
+    project_id: str,
+    user_id: str,
+    action: str,
+    entity_type: str,
+    entity_id: str,
+    details: Optional[dict] = None
+):
+    """Add an entry to a project's activity feed (call after commit; written in the background)"""
+    activity_log.record({
+        "id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "user_id": user_id,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": details,
+        "created_at": datetime.now(timezone.utc),
+    })
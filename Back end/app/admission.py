@@ -0,0 +1,221 @@
+"""Per-route-class concurrency limits and load shedding.
+
+Every request is put in a concurrency class by method and path (see classify):
+
+  auth   /auth/*                                  login and registration (bcrypt)
+  bulk   board snapshots, project export/import, the tasks *:batch endpoints
+  read   every other GET
+  write  every other method
+
+Each class admits at most CONCURRENCY_<CLASS>_LIMIT requests at a time and
+lets up to CONCURRENCY_<CLASS>_QUEUE more wait for a slot, each for at most
+CONCURRENCY_<CLASS>_WAIT_SECONDS. A request is answered with 503 and a
+Retry-After header straight away when the queue is full or when the expected
+wait (queue position times the class's average service time, divided by the
+limit) is already past the deadline, and after the deadline if no slot freed
+up in time. A flood of slow snapshots or logins therefore fills its own queue
+and sheds its own load, while the other classes keep their slots. Keep the
+sum of the limits within the worker thread pool (40 threads by default).
+
+Health checks, /metrics, the API docs and the long-lived board event streams are not
+limited. Classes are counted per process and on the event loop.
+"""
+from collections import deque
+from typing import Optional
+from fastapi import status
+from starlette.responses import JSONResponse
+from .metrics import CollectedMetric, registry
+import asyncio
+import math
+import os
+import re
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CONCURRENCY_LIMITS_ENABLED = os.getenv("CONCURRENCY_LIMITS_ENABLED", "true").lower() == "true"
+
+# Class -> (max in flight, max queued, max seconds in the queue)
+DEFAULT_LIMITS = {
+    "auth": (4, 32, 2.0),
+    "read": (20, 100, 1.0),
+    "write": (10, 50, 2.0),
+    "bulk": (4, 8, 5.0),
+}
+
+# Weight of the latest request in a class's average service time
+SERVICE_TIME_WEIGHT = 0.2
+
+# (class or None for unlimited, methods or None for any, path pattern), first match wins
+ROUTE_RULES = [
+    (None, None, re.compile(r"^/(health(/.*)?|metrics|docs|redoc|openapi\.json)?$")),
+    (None, {"GET"}, re.compile(r"^/boards/[^/]+/events$")),
+    ("auth", None, re.compile(r"^/auth/")),
+    ("bulk", {"GET", "HEAD"}, re.compile(r"^/(boards/[^/]+/snapshot|projects/[^/]+/export)$")),
+    ("bulk", {"POST"}, re.compile(r"^/(projects/import|tasks/[a-z]+:batch)$")),
+]
+
+def classify(method: str, path: str) -> Optional[str]:
+    """The concurrency class of a request, or None when it is not limited"""
+    if method == "OPTIONS":
+        return None
+    for name, methods, pattern in ROUTE_RULES:
+        if (methods is None or method in methods) and pattern.match(path):
+            return name
+    return "read" if method in ("GET", "HEAD") else "write"
+
+class ConcurrencyLimiter:
+    """Admits a bounded number of requests at a time, with a bounded, deadline-limited queue"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiters = deque()
+        self.service_seconds = None
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_deadline": 0, "timed_out": 0}
+
+    def expected_wait(self) -> float:
+        """Seconds a request joining the queue now should expect to wait"""
+        return (len(self.waiters) + 1) * (self.service_seconds or 0.0) / max(self.limit, 1)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue should have drained (the deadline when nothing has been timed yet)"""
+        return max(1, math.ceil(self.expected_wait() or self.max_wait))
+
+    async def acquire(self) -> Optional[int]:
+        """Take a slot, waiting in the queue if need be; returns Retry-After seconds when rejected"""
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+            return None
+        if len(self.waiters) >= self.queue_size:
+            self._stats["rejected_queue_full"] += 1
+            return self.retry_after()
+        if self.expected_wait() > self.max_wait:
+            self._stats["rejected_deadline"] += 1
+            return self.retry_after()
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        self._stats["queued"] += 1
+        try:
+            # A slot handed over just as the deadline passes still counts
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            if not (future.done() and not future.cancelled()):
+                self._discard(future)
+                self._stats["timed_out"] += 1
+                return self.retry_after()
+        except asyncio.CancelledError:
+            # The client went away while queued; pass on a slot it was already given
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(future)
+            raise
+        self._stats["admitted"] += 1
+        return None
+
+    def release(self, seconds: Optional[float] = None):
+        """Free a slot, handing it straight to the next waiter if there is one"""
+        if seconds is not None:
+            if self.service_seconds is None:
+                self.service_seconds = seconds
+            else:
+                self.service_seconds += SERVICE_TIME_WEIGHT * (seconds - self.service_seconds)
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, future: asyncio.Future):
+        try:
+            self.waiters.remove(future)
+        except ValueError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "service_ms": round(self.service_seconds * 1000, 2) if self.service_seconds is not None else None,
+            **self._stats,
+        }
+
+def create_limiters() -> dict:
+    limiters = {}
+    for name, (limit, queue_size, max_wait) in DEFAULT_LIMITS.items():
+        prefix = f"CONCURRENCY_{name.upper()}"
+        limiters[name] = ConcurrencyLimiter(
+            name,
+            int(os.getenv(f"{prefix}_LIMIT", limit)),
+            int(os.getenv(f"{prefix}_QUEUE", queue_size)),
+            float(os.getenv(f"{prefix}_WAIT_SECONDS", max_wait))
+        )
+    return limiters
+
+limiters = create_limiters()
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware that runs each request under its class's limiter
+
+    The slot is held until the response has been sent, streamed bodies included.
+    """
+
+    def __init__(self, app, limiters: dict = limiters):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        limiter = None
+        if scope["type"] == "http":
+            limiter = self.limiters.get(classify(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await limiter.acquire()
+        if retry_after is not None:
+            response = JSONResponse(
+                {"detail": "The server is busy, please retry"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+def concurrency_stats() -> dict:
+    return {"enabled": CONCURRENCY_LIMITS_ENABLED, **{name: limiter.stats() for name, limiter in limiters.items()}}
+
+# Limiter gauges and counters for /metrics (read on the event loop, which /metrics runs on)
+registry.register(CollectedMetric(
+    "concurrency_in_flight", "Requests holding a slot in each concurrency class", "gauge", ("class",),
+    lambda: {(name,): limiter.in_flight for name, limiter in limiters.items()}
+))
+registry.register(CollectedMetric(
+    "concurrency_queue_depth", "Requests waiting for a slot in each concurrency class", "gauge", ("class",),
+    lambda: {(name,): len(limiter.waiters) for name, limiter in limiters.items()}
+))
+registry.register(CollectedMetric(
+    "concurrency_rejected_total", "Requests shed with 503 by concurrency class and reason", "counter", ("class", "reason"),
+    lambda: {
+        (name, reason): limiter._stats[key]
+        for name, limiter in limiters.items()
+        for reason, key in (("queue_full", "rejected_queue_full"), ("deadline", "rejected_deadline"), ("timeout", "timed_out"))
+    }
+))
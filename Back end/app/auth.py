@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from . import models, schemas
-from .database import get_db
+from . import hashing, models, schemas
+from .cache import TTLCache
+from .database import get_db, get_async_db
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,17 +18,29 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 300))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Authenticated users keyed by token; entries never outlive the token itself
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash from async code"""
+    return await hashing.verify_password_async(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password from async code"""
+    return await hashing.hash_password_async(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -39,24 +54,73 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def invalidate_principal(user_id: str):
+    """Drop every cached principal for a user"""
+    principal_cache.invalidate_tag(("user", user_id))
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_principal(target.id)
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def decode_access_token(token: str) -> dict:
+    """Decode a JWT access token, raising 401 if it is invalid"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    
+    return payload
+
+def cache_principal(token: str, payload: dict, user: models.User):
+    """Cache a detached user for its token until the token expires"""
+    principal_cache.set(
+        token,
+        user,
+        tags=[("user", user.id)],
+        ttl=payload.get("exp", 0) - time.time()
+    )
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Get the current authenticated user from JWT token"""
+    # Cache hits never run a query, so the request session never checks out a connection
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    payload = decode_access_token(token)
+    user = db.query(models.User).filter(models.User.id == payload["sub"]).first()
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    
+    # Cached copies are detached so they can be shared safely across requests
+    db.expunge(user)
+    cache_principal(token, payload, user)
+    
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Get the current authenticated user from JWT token (DATABASE_MODE=async)"""
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = decode_access_token(token)
+    user = await db.get(models.User, payload["sub"])
+    if user is None:
+        raise credentials_exception()
+    
+    db.expunge(user)
+    cache_principal(token, payload, user)
     
     return user
\ No newline at end of file
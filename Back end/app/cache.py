@@ -0,0 +1,172 @@
+from collections import OrderedDict, namedtuple
+from typing import Any, Hashable, Iterable, Optional
+import threading
+import time
+
+# How many recently invalidated tags ResponseCache remembers for its in-flight read check
+TRACKED_INVALIDATIONS = 10000
+
+# Session.info key for the response cache tags a transaction will invalidate on commit
+PENDING_INVALIDATIONS = "invalidate_responses"
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "tags", "expires_at"])
+
+class TTLCache:
+    """Thread-safe bounded LRU cache with per-entry TTL and tag-based invalidation"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = (), ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable):
+        """Drop every entry stored with the given tag"""
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+class ResponseCache:
+    """Thread-safe LRU of response bodies bounded by total size, with tag invalidation"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> CachedResponse
+        self._tags = {}  # tag -> set of keys
+        self._invalidated = OrderedDict()  # tag -> sequence number of its last invalidation
+        self._sequence = 0
+        self._floor = 0  # tags invalidated at or before this sequence are no longer tracked
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "stale_stores": 0, "evictions": 0, "invalidations": 0}
+
+    def sequence(self) -> int:
+        """Take before reading from the database and pass to set()"""
+        with self._lock:
+            return self._sequence
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def set(self, key: Hashable, body: bytes, etag: Optional[str], tags: Iterable[Hashable], started: int):
+        """Store a body read from the database after sequence() returned started"""
+        tags = tuple(tags)
+        with self._lock:
+            # Skip bodies that may predate a write that committed while they were read
+            if started < self._floor or any(self._invalidated.get(tag, 0) > started for tag in tags):
+                self._stats["stale_stores"] += 1
+                return
+            if len(body) > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedResponse(body, etag, tags, time.monotonic() + self.ttl)
+            self._bytes += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tags: Iterable[Hashable]):
+        """Drop every entry with any of the tags"""
+        with self._lock:
+            self._sequence += 1
+            for tag in tags:
+                self._invalidated[tag] = self._sequence
+                self._invalidated.move_to_end(tag)
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+            while len(self._invalidated) > TRACKED_INVALIDATIONS:
+                _, sequence = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, sequence)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self._stats,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+def invalidate_on_commit(db, *tags: Hashable):
+    """Drop the cached responses with these tags once db's transaction commits"""
+    db.info.setdefault(PENDING_INVALIDATIONS, set()).update(tags)
@@ -0,0 +1,259 @@
+"""Append-only change log for delta sync.
+
+Every write to a board, column, task or comment calls record_change before it
+commits, and the entries are inserted in the same transaction, just before the
+commit, with an increasing sequence number. GET /boards/{id}/changes?since=seq
+reads a board's entries after seq and returns the current state of every
+entity they name, or its id under "deleted" when it is gone from the board (a
+task moved to another board counts as deleted from the old one). Deleting a
+column or board logs every task and comment that goes with it, and a deleted
+board's feed stays readable and lists the board itself. A client that
+reloads a board takes the cursor first (the endpoint without since) and then
+the snapshot, so nothing written in between is missed.
+
+The boards an entry belongs to are locked before it is inserted, so entries
+for one board are numbered in commit order and a reader never sees a later
+entry while an earlier one is still uncommitted.
+
+ChangeLogCompactor keeps the log short. Entries superseded by a later entry
+for the same entity are deleted, which loses nothing because the endpoint
+returns current state, not the entries. Entries older than
+CHANGE_LOG_RETENTION_SECONDS are deleted too, and the highest sequence number
+dropped that way becomes the horizon: a cursor below it gets 410 Gone and the
+client has to reload the board.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from . import models, schemas
+from .database import SessionLocal
+from .serialization import select_for
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHANGE_LOG_RETENTION_SECONDS = float(os.getenv("CHANGE_LOG_RETENTION_SECONDS", 7 * 24 * 3600))
+CHANGE_LOG_COMPACT_SECONDS = float(os.getenv("CHANGE_LOG_COMPACT_SECONDS", 300))
+CHANGES_DEFAULT_LIMIT = int(os.getenv("CHANGES_DEFAULT_LIMIT", 500))
+CHANGES_MAX_LIMIT = int(os.getenv("CHANGES_MAX_LIMIT", 2000))
+
+# Session.info key for the entries a transaction will append before it commits
+PENDING_CHANGES = "pending_changes"
+
+# Entity type -> (model, schema, key in the response)
+ENTITIES = {
+    "column": (models.BoardColumn, schemas.BoardColumn, "columns"),
+    "task": (models.Task, schemas.Task, "tasks"),
+    "comment": (models.Comment, schemas.Comment, "comments"),
+}
+
+logger = logging.getLogger(__name__)
+
+def record_change(db: Session, entity: str, action: str, entity_id: str, *board_ids: Optional[str]):
+    """Log a write to each board it touches; the entries commit with the transaction"""
+    pending = db.info.setdefault(PENDING_CHANGES, {})
+    for board_id in board_ids:
+        if board_id:
+            pending[(board_id, entity, entity_id)] = action
+
+@event.listens_for(Session, "before_commit")
+def _append_before_commit(session: Session):
+    pending = session.info.pop(PENDING_CHANGES, None)
+    if not pending:
+        return
+    # Later writes to these boards wait for this commit, so their entries number higher
+    session.execute(
+        select(models.Board.id).where(
+            models.Board.id.in_({board_id for board_id, _, _ in pending})
+        ).order_by(models.Board.id).with_for_update()
+    ).all()
+    session.execute(insert(models.Change), [
+        {"board_id": board_id, "entity_type": entity, "entity_id": entity_id, "action": action}
+        for (board_id, entity, entity_id), action in pending.items()
+    ])
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop(PENDING_CHANGES, None)
+
+def delete_columns(db: Session, board_id: str, column_ids: Iterable[str]) -> Dict[str, Set[str]]:
+    """Delete columns with their tasks and comments, logging every row as deleted from the board
+
+    Set-based DELETEs, children first, so this doesn't depend on ON DELETE CASCADE
+    being enforced. Returns the deleted ids by entity type.
+    """
+    column_ids = set(column_ids)
+    tasks = select(models.Task.id).where(models.Task.column_id.in_(column_ids))
+    deleted = {
+        "column": column_ids,
+        "task": set(db.scalars(tasks)),
+        "comment": set(db.scalars(select(models.Comment.id).where(models.Comment.task_id.in_(tasks)))),
+    }
+    if deleted["task"]:
+        db.execute(delete(models.Comment).where(models.Comment.task_id.in_(tasks)))
+        db.execute(models.task_labels.delete().where(models.task_labels.c.task_id.in_(tasks)))
+        db.execute(delete(models.Task).where(models.Task.column_id.in_(column_ids)))
+    db.execute(delete(models.BoardColumn).where(models.BoardColumn.id.in_(column_ids)))
+
+    for entity, ids in deleted.items():
+        for entity_id in ids:
+            record_change(db, entity, "deleted", entity_id, board_id)
+    return deleted
+
+def board_deleted(board_id: str, db: Session) -> bool:
+    """Whether the change log still holds the board's own deletion"""
+    return db.query(models.Change.seq).filter(
+        models.Change.board_id == board_id,
+        models.Change.entity_type == "board",
+        models.Change.entity_id == board_id,
+        models.Change.action == "deleted"
+    ).first() is not None
+
+def horizon(db: Session) -> int:
+    return db.query(models.ChangeLogHorizon.seq).filter(models.ChangeLogHorizon.id == 1).scalar() or 0
+
+def latest_seq(board_id: str, db: Session) -> int:
+    """The cursor to sync a board from after loading it now"""
+    seq = db.query(func.max(models.Change.seq)).filter(models.Change.board_id == board_id).scalar()
+    return max(seq or 0, horizon(db))
+
+def changes_since(board_id: str, since: Optional[int], limit: Optional[int], db: Session) -> dict:
+    """The board's entities written after since, at their current state, plus the ids of deleted ones"""
+    result = {"since": since, "next_since": since, "has_more": False, "board": None, "deleted": {}}
+    for _, _, key in ENTITIES.values():
+        result[key] = []
+    if since is None:
+        result["next_since"] = latest_seq(board_id, db)
+        return result
+
+    limit = min(limit or CHANGES_DEFAULT_LIMIT, CHANGES_MAX_LIMIT)
+    entries = db.query(models.Change.seq, models.Change.entity_type, models.Change.entity_id).filter(
+        models.Change.board_id == board_id,
+        models.Change.seq > since
+    ).order_by(models.Change.seq).limit(limit + 1).all()
+
+    # Read after the entries: if compaction removed any of them, the horizon shows it
+    if since < horizon(db):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes since this cursor are no longer available, reload the board"
+        )
+
+    if len(entries) > limit:
+        entries = entries[:limit]
+        result["has_more"] = True
+    if entries:
+        result["next_since"] = entries[-1].seq
+
+    ids = {}
+    for entry in entries:
+        ids.setdefault(entry.entity_type, set()).add(entry.entity_id)
+
+    if "board" in ids:
+        result["board"] = select_for(db, models.Board, schemas.Board).filter(models.Board.id == board_id).first()
+        if result["board"] is None:
+            result["deleted"]["boards"] = [board_id]
+    for entity, (model, schema, key) in ENTITIES.items():
+        if entity not in ids:
+            continue
+        query = select_for(db, model, schema).filter(model.id.in_(ids[entity]))
+        if model is models.Comment:
+            query = query.join(models.Task, models.Task.id == models.Comment.task_id)
+        query = query.filter((models.Task.board_id if model is models.Comment else model.board_id) == board_id)
+        result[key] = query.order_by(model.id).all()
+
+        # Whatever is no longer on the board was deleted or moved away
+        deleted = ids[entity] - {row.id for row in result[key]}
+        if deleted:
+            result["deleted"][key] = sorted(deleted)
+
+    return result
+
+def compact_change_log(db: Session, after_seq: int = 0) -> dict:
+    """Delete superseded entries for entities logged after after_seq, and entries past retention"""
+    # The newest entry for each entity written since the last run
+    latest = db.execute(
+        select(models.Change.board_id, models.Change.entity_id, func.max(models.Change.seq).label("seq")).where(
+            models.Change.seq > after_seq
+        ).group_by(models.Change.board_id, models.Change.entity_id)
+    ).all()
+    collapsed = 0
+    if latest:
+        # Core DELETE: the ORM can't run one statement per parameter set
+        table = models.Change.__table__
+        collapsed = db.execute(
+            table.delete().where(
+                table.c.entity_id == bindparam("entity"),
+                table.c.board_id == bindparam("board"),
+                table.c.seq < bindparam("latest")
+            ),
+            [{"entity": row.entity_id, "board": row.board_id, "latest": row.seq} for row in latest]
+        ).rowcount
+
+    # Entries past retention go, and the horizon moves up to the newest of them
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=CHANGE_LOG_RETENTION_SECONDS)
+    expired_seq = db.query(func.max(models.Change.seq)).filter(models.Change.created_at < cutoff).scalar()
+    truncated = 0
+    if expired_seq is not None:
+        db.execute(
+            update(models.ChangeLogHorizon).where(
+                models.ChangeLogHorizon.id == 1,
+                models.ChangeLogHorizon.seq < expired_seq
+            ).values(seq=expired_seq)
+        )
+        truncated = db.execute(delete(models.Change).where(models.Change.seq <= expired_seq)).rowcount
+
+    last_seq = max([after_seq, *[row.seq for row in latest]])
+    return {"collapsed": collapsed, "truncated": truncated, "last_seq": last_seq}
+
+class ChangeLogCompactor:
+    """Background worker that compacts the change log every CHANGE_LOG_COMPACT_SECONDS"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_seq = 0
+        self._stats = {"runs": 0, "collapsed": 0, "truncated": 0, "failed": 0}
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="change-log-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            result = compact_change_log(db, self._last_seq)
+            db.commit()
+            self._last_seq = result["last_seq"]
+            self._stats["runs"] += 1
+            self._stats["collapsed"] += result["collapsed"]
+            self._stats["truncated"] += result["truncated"]
+        except Exception:
+            db.rollback()
+            self._stats["failed"] += 1
+            logger.exception("Failed to compact the change log")
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def stats(self) -> dict:
+        return {"interval_seconds": self.interval, "last_seq": self._last_seq, **self._stats}
+
+change_log_compactor = ChangeLogCompactor(CHANGE_LOG_COMPACT_SECONDS)
@@ -1,22 +1,272 @@
-from sqlalchemy import create_engine
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, exc, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.concurrency import run_in_threadpool
+from .metrics import CollectedMetric, observe_pool_wait, registry
 from dotenv import load_dotenv
 import os
+import random
+import threading
+import time
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# "sync" runs every handler on a worker thread with a Session,
+# "async" runs handlers on the event loop with an AsyncSession
+DATABASE_MODE = os.getenv("DATABASE_MODE", "sync").lower()
+
+# Connection pool settings (ignored for SQLite, which keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# PostgreSQL only: per-statement timeout and server-side prepared statements
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "false").lower() == "true"
+
+# Run "alembic upgrade head" when the app starts; turn off when a deploy step runs migrations
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its async counterpart"""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "checkout_timeouts": 0,
+            "checkout_wait_seconds_total": 0.0,
+            "checkout_wait_seconds_max": 0.0,
+        }
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.stats["checkout_timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        observe_pool_wait(waited)
+        with self._stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["checkout_wait_seconds_total"] += waited
+            self.stats["checkout_wait_seconds_max"] = max(self.stats["checkout_wait_seconds_max"], waited)
+        return connection
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for async engines"""
+
+def postgres_connect_args(driver: str) -> dict:
+    """Driver-specific connect arguments for statement timeouts and prepared statements"""
+    connect_args = {}
+    if driver == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = 100 if DB_PREPARED_STATEMENTS else 0
+        if DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    else:
+        if driver == "psycopg":
+            connect_args["prepare_threshold"] = 5 if DB_PREPARED_STATEMENTS else None
+        if DB_STATEMENT_TIMEOUT_MS:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return connect_args
+
+def create_db_engine(url: str, is_async: bool = False):
+    """Create an engine using the pool settings from the environment"""
+    url = make_url(url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    if url.get_backend_name() == "postgresql":
+        options["connect_args"] = postgres_connect_args(url.get_driver_name())
+
+    if is_async:
+        return create_async_engine(url, **options)
+    return create_engine(url, **options)
+
+class RoutingSession(Session):
+    """Session that reads from a replica until its first write, then sticks to the primary"""
+
+    def __init__(self, *args, replicas=(), use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.use_replica = use_replica
+        self.replica = None
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.wrote = True
+        # Once this session has written, every read goes to the primary (read-your-writes)
+        if self.wrote or not self.use_replica or not self.replicas:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self.replica is None:
+            self.replica = random.choice(self.replicas)
+        return self.replica
+
+engine = create_db_engine(DATABASE_URL)
+replica_engines = [create_db_engine(url) for url in DATABASE_REPLICA_URLS]
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=replica_engines
+)
+
+async_engine = None
+async_replica_engines = []
+AsyncSessionLocal = None
+if DATABASE_MODE == "async":
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+    async_engine = create_db_engine(ASYNC_DATABASE_URL, is_async=True)
+    async_replica_engines = [create_db_engine(to_async_url(url), is_async=True) for url in DATABASE_REPLICA_URLS]
+    # Objects stay loaded after commit so responses can be serialised off the session
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        replicas=[replica.sync_engine for replica in async_replica_engines]
+    )
 
 Base = declarative_base()
 
+def read_engine():
+    """Engine for long read-only work: a random replica when configured, else the primary"""
+    return random.choice(replica_engines) if replica_engines else engine
+
+def run_migrations(db_engine=None):
+    """Upgrade the database schema (the primary's, by default) to the latest Alembic revision"""
+    config = Config(ALEMBIC_INI)
+    if db_engine is not None:
+        config.set_main_option("sqlalchemy.url", db_engine.url.render_as_string(hide_password=False).replace("%", "%%"))
+    tables = inspect(db_engine or engine).get_table_names()
+    # Databases built by the old create_all call already have the initial schema
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+def pool_stats() -> dict:
+    """Checkout wait and utilisation for every engine's connection pool"""
+    engines = {"primary": engine}
+    engines.update({f"replica_{i}": replica for i, replica in enumerate(replica_engines)})
+    if async_engine is not None:
+        engines["async_primary"] = async_engine
+        engines.update({f"async_replica_{i}": replica for i, replica in enumerate(async_replica_engines)})
+
+    stats = {}
+    for name, db_engine in engines.items():
+        pool = db_engine.pool
+        if not isinstance(pool, QueuePool):
+            stats[name] = {"pool": type(pool).__name__}
+            continue
+        capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+        stats[name] = {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "utilisation": pool.checkedout() / capacity if capacity else 0.0,
+            **getattr(pool, "stats", {}),
+        }
+    return stats
+
+def _pool_metric(key: str) -> dict:
+    return {(name,): stats[key] for name, stats in pool_stats().items() if key in stats}
+
+# Pool gauges and counters for /metrics (only QueuePools report them)
+registry.register(CollectedMetric(
+    "db_pool_checked_out", "Connections checked out of each pool", "gauge", ("engine",),
+    lambda: _pool_metric("checked_out")
+))
+registry.register(CollectedMetric(
+    "db_pool_checkouts_total", "Connection checkouts from each pool", "counter", ("engine",),
+    lambda: _pool_metric("checkouts")
+))
+registry.register(CollectedMetric(
+    "db_pool_checkout_wait_seconds_total", "Time spent waiting to check out connections", "counter", ("engine",),
+    lambda: _pool_metric("checkout_wait_seconds_total")
+))
+registry.register(CollectedMetric(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", "counter", ("engine",),
+    lambda: _pool_metric("checkout_timeouts")
+))
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get a DB session for read-only endpoints (served by a replica when configured)
+def get_read_db():
+    db = SessionLocal(use_replica=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get an async DB session (DATABASE_MODE=async)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency to get an async DB session for read-only endpoints
+async def get_async_read_db():
+    async with AsyncSessionLocal(use_replica=True) as db:
+        yield db
+
+async def run_in_session(fn, *args, use_replica: bool = False):
+    """Run fn(db, *args) in a session of its own, closed before this returns
+
+    For async endpoints that do slow non-database work (password hashing) and
+    must not hold a connection while they wait for it. The session runs on the
+    event loop in async mode, else in the thread pool.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal(use_replica=use_replica) as db:
+            return await db.run_sync(fn, *args)
+
+    def run():
+        db = SessionLocal(use_replica=use_replica)
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+    return await run_in_threadpool(run)
@@ -0,0 +1,75 @@
+"""Strong ETags backed by the board and task version counters.
+
+Every write bumps the version of the boards and tasks it touches in the same
+transaction (bump_versions). A read looks the version up before loading
+anything else, so a client whose If-None-Match still matches gets a 304 after
+that one primary-key lookup. Reading the version first also means a write
+that lands mid-request can only make the ETag older than the body, which costs
+one extra full response later but never serves stale data as current.
+"""
+from typing import Iterable, Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from . import models
+from .cache import invalidate_on_commit
+import hashlib
+
+# Clients may keep responses but must revalidate them before every use
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+def make_etag(version: int, *scope) -> str:
+    """ETag for one representation (scope: resource kind, id and any query params) at a version"""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in scope).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = False) -> bool:
+    """Whether an If-None-Match (weak comparison) or If-Match (strong) header lists etag"""
+    if header is None:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+
+def not_modified(if_none_match: Optional[str], response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already has this version, else tag the response being built"""
+    headers = etag_headers(etag)
+    if etag_matches(if_none_match, etag, weak=True):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def check_if_match(if_match: Optional[str], etag: str):
+    """Reject a write whose If-Match no longer matches the resource"""
+    if if_match is not None and not etag_matches(if_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="The resource has changed since it was fetched"
+        )
+
+def board_version(board_id: str, db: Session) -> Optional[int]:
+    return db.query(models.Board.version).filter(models.Board.id == board_id).scalar()
+
+def task_version(task_id: str, db: Session) -> Optional[int]:
+    return db.query(models.Task.version).filter(models.Task.id == task_id).scalar()
+
+def bump_versions(db: Session, board_ids: Iterable[Optional[str]] = (), task_ids: Iterable[Optional[str]] = ()):
+    """Bump the version counters of the boards and tasks a write touched, before it commits"""
+    for model, ids, kind in ((models.Board, board_ids, "board"), (models.Task, task_ids, "task")):
+        ids = {entity_id for entity_id in ids if entity_id}
+        # Their cached responses go once the write commits
+        invalidate_on_commit(db, *[(kind, entity_id) for entity_id in ids])
+        if ids:
+            db.execute(
+                update(model).where(model.id.in_(ids)).values(version=model.version + 1),
+                execution_options={"synchronize_session": False}
+            )
@@ -0,0 +1,226 @@
+"""Real-time board events, streamed to clients over Server-Sent Events.
+
+Write endpoints call publish_event after they commit. The event is handed to
+the broker, and whatever the broker delivers is fanned out by the hub to every
+subscriber of that board. Each subscriber has a bounded queue; one that falls
+EVENT_QUEUE_SIZE events behind is dropped instead of slowing the others down,
+and is told so with a final "dropped" event so it can reload the board.
+
+MemoryBroker delivers within this process. PostgresBroker carries events over
+LISTEN/NOTIFY so every worker (and every server) sees every write.
+"""
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Callable, Optional
+from pydantic import BaseModel
+from sqlalchemy.engine import make_url
+import asyncio
+import json
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "memory" keeps events inside one process, "postgres" shares them between workers
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory").lower()
+EVENT_BROKER_URL = os.getenv("EVENT_BROKER_URL") or os.getenv("DATABASE_URL")
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", 15))
+
+# NOTIFY payloads must stay under 8000 bytes
+POSTGRES_CHANNEL = "board_events"
+POSTGRES_MAX_PAYLOAD = 7900
+
+logger = logging.getLogger(__name__)
+
+class EventBroker(ABC):
+    """Carries events between publishers and the hubs that deliver them"""
+
+    max_message_bytes: Optional[int] = None
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[str, str], None]):
+        """Begin delivering (board_id, message) pairs to deliver, on the event loop"""
+
+    @abstractmethod
+    async def publish(self, board_id: str, message: str):
+        """Send message to every process subscribed to board_id"""
+
+    async def stop(self):
+        pass
+
+class MemoryBroker(EventBroker):
+    """Delivers events straight back to this process's hub"""
+
+    async def start(self, deliver: Callable[[str, str], None]):
+        self.deliver = deliver
+
+    async def publish(self, board_id: str, message: str):
+        self.deliver(board_id, message)
+
+class PostgresBroker(EventBroker):
+    """Shares events between workers with PostgreSQL LISTEN/NOTIFY"""
+
+    max_message_bytes = POSTGRES_MAX_PAYLOAD
+
+    def __init__(self, url: str):
+        # asyncpg takes a plain postgresql:// DSN
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.connection = None
+        self.lock = asyncio.Lock()
+
+    async def start(self, deliver: Callable[[str, str], None]):
+        import asyncpg
+
+        self.deliver = deliver
+        self.connection = await asyncpg.connect(self.dsn)
+        await self.connection.add_listener(POSTGRES_CHANNEL, self.on_notify)
+
+    def on_notify(self, connection, pid, channel, payload):
+        board_id, _, message = payload.partition("\n")
+        self.deliver(board_id, message)
+
+    async def publish(self, board_id: str, message: str):
+        # One connection serves both LISTEN and NOTIFY, and asyncpg runs one query at a time
+        async with self.lock:
+            await self.connection.execute("SELECT pg_notify($1, $2)", POSTGRES_CHANNEL, f"{board_id}\n{message}")
+
+    async def stop(self):
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+class Subscription:
+    """One open event stream for a board"""
+
+    def __init__(self, board_id: str, queue_size: int):
+        self.board_id = board_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def close(self):
+        """Replace whatever is queued with the end-of-stream marker"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class EventHub:
+    """Fans events out to the subscribers of each board"""
+
+    def __init__(self, broker: EventBroker, queue_size: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.loop = None
+        self.subscribers = {}  # board_id -> set of Subscription
+        self.tasks = set()
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0, "failed": 0}
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        await self.broker.start(self.deliver)
+
+    async def stop(self):
+        await self.broker.stop()
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self.subscribers = {}
+        self.loop = None
+
+    def publish(self, board_id: str, message: str):
+        """Queue a message for a board's subscribers; safe to call from any thread"""
+        loop = self.loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._publish, board_id, message)
+
+    def _publish(self, board_id: str, message: str):
+        self._stats["published"] += 1
+        task = self.loop.create_task(self.broker.publish(board_id, message))
+        # Keep a reference until the broker is done so the task isn't collected early
+        self.tasks.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["failed"] += 1
+            logger.error("Failed to publish a board event", exc_info=task.exception())
+
+    def deliver(self, board_id: str, message: str):
+        """Put a message on every subscriber's queue, dropping subscribers that are full"""
+        for subscription in list(self.subscribers.get(board_id, ())):
+            try:
+                subscription.queue.put_nowait(message)
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                self._stats["dropped"] += 1
+                self.unsubscribe(subscription)
+                subscription.close()
+
+    def subscribe(self, board_id: str) -> Subscription:
+        subscription = Subscription(board_id, self.queue_size)
+        self.subscribers.setdefault(board_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.board_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.board_id]
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "boards": len(self.subscribers),
+            "subscribers": sum(len(subscriptions) for subscriptions in self.subscribers.values()),
+            "queue_size": self.queue_size,
+            **self._stats,
+        }
+
+def create_broker() -> EventBroker:
+    if EVENT_BROKER == "postgres":
+        return PostgresBroker(EVENT_BROKER_URL)
+    return MemoryBroker()
+
+event_hub = EventHub(create_broker(), EVENT_QUEUE_SIZE)
+
+def json_default(value):
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+def publish_event(entity: str, action: str, data, *board_ids: Optional[str]):
+    """Publish a change to the subscribers of each board it touches (call after commit)"""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    event = {"entity": entity, "action": action, "data": data}
+    message = json.dumps(event, separators=(",", ":"), default=json_default)
+
+    limit = event_hub.broker.max_message_bytes
+    if limit is not None and len(message.encode()) > limit:
+        # Too big for the broker: send the id only and let clients fetch the rest
+        event["data"] = {"id": data.get("id")}
+        event["truncated"] = True
+        message = json.dumps(event, separators=(",", ":"))
+
+    for board_id in {board_id for board_id in board_ids if board_id}:
+        event_hub.publish(board_id, message)
+
+async def stream_events(board_id: str):
+    """Yield a board's events as Server-Sent Events until the client goes away or is dropped"""
+    subscription = event_hub.subscribe(board_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                yield "event: dropped\ndata: {}\n\n"
+                return
+            yield f"data: {message}\n\n"
+    finally:
+        event_hub.unsubscribe(subscription)
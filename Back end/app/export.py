@@ -0,0 +1,118 @@
+"""Streaming export of a whole project as NDJSON, columnar NDJSON, MessagePack or CSV.
+
+Rows are read with Core selects on a dedicated connection using server-side
+cursors (yield_per), so no ORM objects or identity map are involved and
+memory stays flat regardless of project size.
+"""
+from datetime import date, datetime
+from typing import Iterator
+from sqlalchemy import select
+from . import models
+from .database import read_engine
+from .wire import COLUMNAR_JSON, MSGPACK
+import csv
+import io
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+def export_queries(project_id: str) -> dict:
+    """Core selects for every entity in a project, in dependency order"""
+    projects = models.Project.__table__
+    boards = models.Board.__table__
+    columns = models.BoardColumn.__table__
+    tasks = models.Task.__table__
+    labels = models.Label.__table__
+    task_labels = models.task_labels
+    comments = models.Comment.__table__
+
+    return {
+        "project": select(*projects.c).where(projects.c.id == project_id),
+        "boards": select(*boards.c).where(boards.c.project_id == project_id).order_by(boards.c.position, boards.c.id),
+        "columns": select(*columns.c).select_from(
+            columns.join(boards, columns.c.board_id == boards.c.id)
+        ).where(boards.c.project_id == project_id).order_by(columns.c.board_id, columns.c.position, columns.c.id),
+        "tasks": select(*tasks.c).where(
+            tasks.c.project_id == project_id
+        ).order_by(tasks.c.column_id, tasks.c.rank, tasks.c.id),
+        "labels": select(*labels.c).where(
+            labels.c.id.in_(
+                select(task_labels.c.label_id).select_from(
+                    task_labels.join(tasks, task_labels.c.task_id == tasks.c.id)
+                ).where(tasks.c.project_id == project_id)
+            )
+        ).order_by(labels.c.id),
+        "task_labels": select(*task_labels.c).select_from(
+            task_labels.join(tasks, task_labels.c.task_id == tasks.c.id)
+        ).where(tasks.c.project_id == project_id).order_by(task_labels.c.task_id, task_labels.c.label_id),
+        "comments": select(*comments.c).where(
+            comments.c.project_id == project_id
+        ).order_by(comments.c.task_id, comments.c.created_at, comments.c.id),
+    }
+
+EXPORT_ENTITIES = ["project", "boards", "columns", "tasks", "labels", "task_labels", "comments"]
+
+# Accept media type -> export format, when the request names no format
+EXPORT_FORMATS = {COLUMNAR_JSON: "columnar", MSGPACK: "msgpack"}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+def iter_batches(project_id: str, entities) -> Iterator[tuple]:
+    """Yield (entity, column names, rows) batches straight from server-side cursors"""
+    queries = export_queries(project_id)
+    db_engine = read_engine()
+    with db_engine.connect() as conn:
+        if db_engine.dialect.name == "postgresql":
+            # Every entity is read from the same snapshot
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            for entity in entities:
+                result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(queries[entity])
+                keys = list(result.keys())
+                for rows in result.partitions():
+                    yield entity, keys, rows
+
+def stream_ndjson(project_id: str) -> Iterator[bytes]:
+    """Stream every entity in a project as {"type": ..., "data": {...}} lines"""
+    for entity, keys, rows in iter_batches(project_id, EXPORT_ENTITIES):
+        yield "".join(
+            json.dumps({"type": entity, "data": dict(zip(keys, row))}, default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+def stream_columnar(project_id: str) -> Iterator[bytes]:
+    """Stream every entity in a project as one {"type": ..., "data": {field: [values]}} line per batch"""
+    for entity, keys, rows in iter_batches(project_id, EXPORT_ENTITIES):
+        data = {key: [row[index] for row in rows] for index, key in enumerate(keys)}
+        yield (json.dumps({"type": entity, "data": data}, default=_json_default) + "\n").encode()
+
+def stream_msgpack(project_id: str) -> Iterator[bytes]:
+    """Stream every entity in a project as a sequence of {"type": ..., "data": {...}} MessagePack maps"""
+    import msgpack
+
+    packer = msgpack.Packer(default=_json_default)
+    for entity, keys, rows in iter_batches(project_id, EXPORT_ENTITIES):
+        yield b"".join(packer.pack({"type": entity, "data": dict(zip(keys, row))}) for row in rows)
+
+def stream_csv(project_id: str, entity: str) -> Iterator[bytes]:
+    """Stream one entity type of a project as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export_queries(project_id)[entity].selected_columns.keys())
+    yield buffer.getvalue().encode()
+
+    for _, _, rows in iter_batches(project_id, [entity]):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+import asyncio
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 1))
+# Jobs queued or running at once; kept well below the thread pool (40) and the
+# database pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) so a burst of logins is shed
+# with 503 instead of queueing behind everything else
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", 8))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", 1))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _timed(fn, *args):
+    """Run fn in the worker process and report how long the hashing itself took"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class HashingPool:
+    """Process pool for bcrypt work with a bounded number of pending jobs"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def _submit(self, fn, *args):
+        """Submit fn to the pool, or raise 503 immediately when the queue is full"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": str(HASH_RETRY_AFTER)}
+                )
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self._executor
+        try:
+            future = executor.submit(_timed, fn, *args)
+        except BaseException:
+            self._done()
+            raise
+        # Free the slot when the job ends, not when its caller stops waiting for it
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, submitted: float, hash_time: float):
+        queue_wait = max(time.perf_counter() - submitted - hash_time, 0.0)
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["queue_wait_seconds_total"] += queue_wait
+            self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], queue_wait)
+            self._stats["hash_seconds_total"] += hash_time
+            self._stats["hash_seconds_max"] = max(self._stats["hash_seconds_max"], hash_time)
+
+    def run(self, fn, *args):
+        """Run fn in the pool and block until it finishes (scripts and sync callers)"""
+        submitted = time.perf_counter()
+        future = self._submit(fn, *args)
+        if in_greenlet():
+            # Inside an AsyncSession greenlet: yield to the event loop instead of blocking it
+            result, hash_time = await_only(asyncio.wrap_future(future))
+        else:
+            result, hash_time = future.result()
+        self._record(submitted, hash_time)
+        return result
+
+    async def run_async(self, fn, *args):
+        """Run fn in the pool and await it, holding no thread or connection meanwhile"""
+        submitted = time.perf_counter()
+        future = self._submit(fn, *args)
+        result, hash_time = await asyncio.wrap_future(future)
+        self._record(submitted, hash_time)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **self._stats,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+hashing_pool = HashingPool(HASH_POOL_WORKERS, HASH_QUEUE_DEPTH)
+
+def hash_password(password: str) -> str:
+    """Hash a password in the hashing pool"""
+    return hashing_pool.run(_hash, password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash in the hashing pool"""
+    return hashing_pool.run(_verify, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the hashing pool without blocking the event loop"""
+    return await hashing_pool.run_async(_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash in the hashing pool without blocking the event loop"""
+    return await hashing_pool.run_async(_verify, plain_password, hashed_password)
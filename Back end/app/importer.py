@@ -0,0 +1,323 @@
+"""Bulk import of a whole project from an NDJSON stream.
+
+The body uses the same {"type": ..., "data": {...}} lines as the export, in
+dependency order (project, boards, columns, tasks, labels, task_labels,
+comments). Lines are parsed as they arrive and buffered per table; a full
+buffer is written with COPY on PostgreSQL and a single executemany INSERT
+elsewhere, so memory is bounded by IMPORT_BATCH_SIZE plus one id per board,
+column, task and label. Every id is replaced with a fresh UUID so the same
+file can be imported more than once, and the whole import runs in the
+caller's transaction.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+from fastapi import HTTPException, Request, status
+from sqlalchemy import DateTime, select
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from . import models
+from .ranking import DIGITS, rank_between
+import anyio
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", 1024 * 1024))
+
+# Tables in the order they must be written so foreign keys always resolve
+IMPORT_TABLES = {
+    "boards": models.Board.__table__,
+    "columns": models.BoardColumn.__table__,
+    "tasks": models.Task.__table__,
+    "labels": models.Label.__table__,
+    "task_labels": models.task_labels,
+    "comments": models.Comment.__table__,
+}
+IMPORT_ORDER = list(IMPORT_TABLES)
+
+logger = logging.getLogger(__name__)
+
+def iter_request_chunks(request: Request) -> Iterator[bytes]:
+    """Read the request body chunk by chunk from a sync handler, in either database mode"""
+    chunks = request.stream().__aiter__()
+    while True:
+        try:
+            if in_greenlet():
+                chunk = await_only(chunks.__anext__())
+            else:
+                chunk = anyio.from_thread.run(chunks.__anext__)
+        except StopAsyncIteration:
+            return
+        if chunk:
+            yield chunk
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of byte chunks into lines without holding more than one line"""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        if len(pending) > IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Import lines must be at most {IMPORT_MAX_LINE_BYTES} bytes"
+            )
+        yield from lines
+    if pending:
+        yield pending
+
+def import_error(line_number: int, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Line {line_number}: {detail}"
+    )
+
+def copy_text(value) -> str:
+    """Encode a value for COPY ... FROM STDIN in PostgreSQL's text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def write_rows(conn, table, rows: list):
+    """Insert a batch with COPY on PostgreSQL and executemany everywhere else"""
+    names = [column.name for column in table.columns]
+    driver = conn.dialect.driver if conn.dialect.name == "postgresql" else None
+
+    if driver == "asyncpg":
+        raw = conn.connection.dbapi_connection._connection
+        await_only(raw.copy_records_to_table(
+            table.name,
+            records=[tuple(row[name] for name in names) for row in rows],
+            columns=names
+        ))
+    elif driver == "psycopg2":
+        data = io.StringIO("".join(
+            "\t".join(copy_text(row[name]) for name in names) + "\n" for row in rows
+        ))
+        with conn.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(names)}) FROM STDIN", data)
+    else:
+        conn.execute(table.insert(), rows)
+
+class ProjectImporter:
+    """Turns import records into buffered rows with remapped ids"""
+
+    def __init__(self, user_id: str, db: Session):
+        self.user_id = user_id
+        self.db = db
+        self.conn = db.connection()
+        self.project_id = None
+        self.ids = {entity: {} for entity in ("boards", "columns", "tasks", "labels")}
+        self.buffers = {entity: [] for entity in IMPORT_ORDER}
+        self.counts = {"project": 0, **{entity: 0 for entity in IMPORT_ORDER}}
+        self.positions = {}
+        self.column_boards = {}
+        self.last_ranks = {}
+        self.known_users = {user_id}
+        self.now = datetime.now(timezone.utc)
+
+    def row(self, table, data: dict, line_number: int, **values) -> dict:
+        """Build a full row for table from the record, parsing timestamps"""
+        row = {}
+        for column in table.columns:
+            value = values[column.name] if column.name in values else data.get(column.name)
+            if isinstance(column.type, DateTime) and isinstance(value, str):
+                try:
+                    value = datetime.fromisoformat(value)
+                except ValueError:
+                    raise import_error(line_number, f"Invalid timestamp for {column.name}")
+            if value is None and column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            row[column.name] = value
+        if "created_at" in row and row["created_at"] is None:
+            row["created_at"] = self.now
+        if "updated_at" in row and row["updated_at"] is None:
+            row["updated_at"] = row["created_at"]
+        return row
+
+    def new_id(self, entity: str, data: dict) -> str:
+        new_id = str(uuid.uuid4())
+        if data.get("id") is not None:
+            self.ids[entity][str(data["id"])] = new_id
+        return new_id
+
+    def parent_id(self, entity: str, data: dict, field: str, line_number: int) -> str:
+        parent_id = self.ids[entity].get(str(data.get(field)))
+        if parent_id is None:
+            raise import_error(line_number, f"{field} {data.get(field)!r} does not match an imported record")
+        return parent_id
+
+    def next_position(self, parent_id: str, data: dict) -> int:
+        position = data.get("position")
+        if position is None:
+            position = self.positions.get(parent_id, -1) + 1
+        self.positions[parent_id] = max(self.positions.get(parent_id, -1), position)
+        return position
+
+    def next_rank(self, column_id: str, data: dict, line_number: int) -> str:
+        rank = data.get("rank")
+        if rank is None:
+            rank = rank_between(self.last_ranks.get(column_id), None)
+        elif not isinstance(rank, str) or not rank or any(char not in DIGITS for char in rank):
+            raise import_error(line_number, f"Invalid rank {rank!r}")
+        self.last_ranks[column_id] = max(self.last_ranks.get(column_id, rank), rank)
+        return rank
+
+    def add(self, entity: str, data: dict, line_number: int):
+        if entity == "project":
+            self.add_project(data, line_number)
+            return
+        if entity not in IMPORT_TABLES:
+            raise import_error(line_number, f"Unknown record type {entity!r}")
+        if self.project_id is None:
+            raise import_error(line_number, "The project record must come first")
+
+        table = IMPORT_TABLES[entity]
+        if entity == "boards":
+            row = self.row(table, data, line_number, id=self.new_id("boards", data), project_id=self.project_id)
+            row["position"] = self.next_position(self.project_id, data)
+        elif entity == "columns":
+            board_id = self.parent_id("boards", data, "board_id", line_number)
+            row = self.row(table, data, line_number, id=self.new_id("columns", data), board_id=board_id)
+            row["position"] = self.next_position(board_id, data)
+            self.column_boards[row["id"]] = board_id
+        elif entity == "tasks":
+            column_id = self.parent_id("columns", data, "column_id", line_number)
+            row = self.row(
+                table,
+                data,
+                line_number,
+                id=self.new_id("tasks", data),
+                column_id=column_id,
+                board_id=self.column_boards[column_id],
+                project_id=self.project_id,
+                rank=self.next_rank(column_id, data, line_number)
+            )
+        elif entity == "labels":
+            row = self.row(table, data, line_number, id=self.new_id("labels", data))
+        elif entity == "task_labels":
+            row = self.row(
+                table,
+                data,
+                line_number,
+                task_id=self.parent_id("tasks", data, "task_id", line_number),
+                label_id=self.parent_id("labels", data, "label_id", line_number)
+            )
+        else:
+            row = self.row(
+                table,
+                data,
+                line_number,
+                id=str(uuid.uuid4()),
+                task_id=self.parent_id("tasks", data, "task_id", line_number),
+                project_id=self.project_id
+            )
+
+        self.buffers[entity].append(row)
+        if len(self.buffers[entity]) >= IMPORT_BATCH_SIZE:
+            self.flush(entity)
+
+    def add_project(self, data: dict, line_number: int):
+        if self.project_id is not None:
+            raise import_error(line_number, "Only one project can be imported at a time")
+        if not data.get("name"):
+            raise import_error(line_number, "The project needs a name")
+
+        self.project_id = str(uuid.uuid4())
+        self.conn.execute(
+            models.Project.__table__.insert(),
+            [self.row(models.Project.__table__, data, line_number, id=self.project_id, updated_at=None)]
+        )
+        # The importing user owns the new project
+        self.conn.execute(
+            models.ProjectMember.__table__.insert(),
+            [{
+                "id": str(uuid.uuid4()),
+                "role": "owner",
+                "user_id": self.user_id,
+                "project_id": self.project_id,
+                "created_at": self.now,
+            }]
+        )
+        self.counts["project"] = 1
+
+    def resolve_users(self, rows: list, fields: Dict[str, Optional[str]]):
+        """Replace user ids that don't exist here with the fallback for that field"""
+        wanted = {row[field] for row in rows for field in fields if row[field] is not None} - self.known_users
+        if wanted:
+            self.known_users.update(
+                self.conn.execute(select(models.User.id).where(models.User.id.in_(wanted))).scalars()
+            )
+        for row in rows:
+            for field, fallback in fields.items():
+                if row[field] not in self.known_users:
+                    row[field] = fallback
+
+    def flush(self, upto: str):
+        """Write every buffered table up to and including upto, parents first"""
+        for entity in IMPORT_ORDER[:IMPORT_ORDER.index(upto) + 1]:
+            rows = self.buffers[entity]
+            if not rows:
+                continue
+            if entity == "tasks":
+                self.resolve_users(rows, {"created_by_id": self.user_id, "assignee_id": None})
+            elif entity == "comments":
+                self.resolve_users(rows, {"user_id": self.user_id})
+            try:
+                write_rows(self.conn, IMPORT_TABLES[entity], rows)
+            except Exception as error:
+                # COPY raises the driver's own exceptions rather than SQLAlchemy's
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Could not import {entity}: {error}"
+                )
+            self.counts[entity] += len(rows)
+            self.buffers[entity] = []
+
+def import_project(lines: Iterable[bytes], user_id: str, db: Session) -> dict:
+    """Import a project from NDJSON lines and report throughput; the caller commits"""
+    started = time.perf_counter()
+    importer = ProjectImporter(user_id, db)
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise import_error(line_number, "Invalid JSON")
+        if not isinstance(record, dict) or not isinstance(record.get("data"), dict):
+            raise import_error(line_number, "Expected an object with 'type' and 'data'")
+        importer.add(record.get("type"), record["data"], line_number)
+
+    if importer.project_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The import contains no project record"
+        )
+    importer.flush(IMPORT_ORDER[-1])
+
+    seconds = time.perf_counter() - started
+    total_rows = sum(importer.counts.values())
+    rows_per_second = total_rows / seconds if seconds > 0 else 0.0
+    logger.info(
+        "Imported project %s: %d rows in %.2fs (%.0f rows/s)",
+        importer.project_id, total_rows, seconds, rows_per_second
+    )
+    return {
+        "project_id": importer.project_id,
+        "rows": importer.counts,
+        "total_rows": total_rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows_per_second, 1),
+    }
@@ -1,12 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from fastapi.responses import PlainTextResponse
+from .activity import activity_log
+from .admission import CONCURRENCY_LIMITS_ENABLED, ConcurrencyLimitMiddleware, concurrency_stats
+from .changes import change_log_compactor
+from .database import DB_MIGRATE_ON_STARTUP, async_engine, async_replica_engines, pool_stats, run_migrations
+from .events import event_hub
+from .hashing import hashing_pool
+from .metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from .ranking import rebalancer
+from .response_cache import response_cache
 from .routers import auth, projects, boards, columns, tasks, comments
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Bring the database schema up to date
+if DB_MIGRATE_ON_STARTUP:
+    run_migrations()
 
-app = FastAPI(title="Project Management API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    rebalancer.start()
+    change_log_compactor.start()
+    activity_log.start()
+    await event_hub.start()
+    yield
+    # Shutdown
+    rebalancer.stop()
+    change_log_compactor.stop()
+    # Write the activity entries still queued
+    activity_log.stop()
+    await event_hub.stop()
+    hashing_pool.shutdown()
+    for db_engine in [async_engine, *async_replica_engines]:
+        if db_engine is not None:
+            await db_engine.dispose()
+
+app = FastAPI(title="Project Management API", lifespan=lifespan)
+
+# Per-route-class concurrency limits (added first so CORS headers still go on its 503s)
+if CONCURRENCY_LIMITS_ENABLED:
+    app.add_middleware(ConcurrencyLimitMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -15,8 +48,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the front end read ETags for conditional requests and when to retry a 503
+    expose_headers=["ETag", "Retry-After"],
 )
 
+# Request and SQL metrics (added last so latency and status include queueing and 503s)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(projects.router)
@@ -31,4 +70,39 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/hashing")
+def hashing_stats():
+    return hashing_pool.stats()
+
+@app.get("/health/database")
+def database_stats():
+    return pool_stats()
+
+@app.get("/health/cache")
+def cache_stats():
+    return response_cache.stats()
+
+@app.get("/health/changes")
+def change_log_stats():
+    return change_log_compactor.stats()
+
+@app.get("/health/activity")
+def activity_stats():
+    return activity_log.stats()
+
+# Async so the limiters are read on the event loop that changes them
+@app.get("/health/concurrency")
+async def concurrency_limit_stats():
+    return concurrency_stats()
+
+# Prometheus text format; async so the limiter gauges are read on the event loop
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Async so the hub's state is read on the event loop that changes it
+@app.get("/health/events")
+async def event_stats():
+    return event_hub.stats()
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""Request and SQL metrics, exported in the Prometheus text format on /metrics.
+
+MetricsMiddleware gives every HTTP request a RequestStats in a context
+variable. SQLAlchemy engine events add each statement's count and time to it,
+and the connection pool adds its checkout wait (database.TimedQueuePool).
+Endpoint code that runs in the thread pool or in an AsyncSession greenlet sees
+the same context, so those queries are counted too. Background workers have no
+request and are not counted. When the request finishes, the middleware records
+these per route template, by method:
+
+  http_requests_total                 by status code
+  http_request_duration_seconds       histogram
+  http_response_size_bytes            histogram
+  db_queries_per_request              histogram, plus db_queries_total
+  db_query_seconds_per_request        histogram of time spent in the database
+  db_pool_wait_seconds_per_request    histogram of connection checkout wait
+
+Requests answered before routing (shed with 503 by the concurrency limiter,
+or for unknown paths) are labelled with route "unmatched".
+
+A request that issues more than QUERY_BUDGET statements is logged as a
+warning, with the statements it repeated most, and counted in
+db_query_budget_exceeded_total.
+
+The database and admission modules add pool and concurrency-class gauges that
+are read at scrape time. The registry is a small in-process one, so each
+worker process exports its own numbers.
+"""
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 20))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Route label for requests that matched no route, so unknown paths don't add series
+UNMATCHED_ROUTE = "unmatched"
+
+logger = logging.getLogger(__name__)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str], buckets: Iterable[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            else:
+                series[0][-1] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip([*map(_number, self.buckets), "+Inf"], counts):
+                    cumulative += count
+                    bucket_labels = _labels(self.labelnames, labels, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class CollectedMetric:
+    """A gauge or counter read at scrape time from a callback returning {label values tuple: value}"""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Iterable[str], collect: Callable[[], dict]):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+ROUTE_LABELS = ("method", "route")
+requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", (*ROUTE_LABELS, "status")
+))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte", ROUTE_LABELS, LATENCY_BUCKETS
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body bytes as sent (after compression)", ROUTE_LABELS, SIZE_BUCKETS
+))
+queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements issued while serving a request", ROUTE_LABELS, QUERY_COUNT_BUCKETS
+))
+queries_total = registry.register(Counter(
+    "db_queries_total", "SQL statements issued by requests", ROUTE_LABELS
+))
+query_seconds = registry.register(Histogram(
+    "db_query_seconds_per_request", "Time a request spent executing SQL", ROUTE_LABELS, LATENCY_BUCKETS
+))
+pool_wait_seconds = registry.register(Histogram(
+    "db_pool_wait_seconds_per_request", "Time a request waited for pooled connections", ROUTE_LABELS, LATENCY_BUCKETS
+))
+budget_exceeded = registry.register(Counter(
+    "db_query_budget_exceeded_total", f"Requests that issued more than QUERY_BUDGET ({QUERY_BUDGET}) statements", ROUTE_LABELS
+))
+
+class RequestStats:
+    """What one request has done in the database so far"""
+
+    __slots__ = ("queries", "query_seconds", "pool_wait_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements = {}  # SQL text -> times issued
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def observe_pool_wait(seconds: float):
+    """Add a connection checkout wait to the current request, if there is one"""
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    stats.queries += 1
+    stats.query_seconds += time.perf_counter() - started.pop()
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    stats = current_request.get()
+    if stats is not None and started:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started.pop()
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+def record_request(method: str, route: str, status_code: int, seconds: float, size: int, stats: RequestStats):
+    labels = (method, route)
+    requests_total.inc(method, route, str(status_code))
+    request_duration.observe(seconds, *labels)
+    response_size.observe(size, *labels)
+    queries_per_request.observe(stats.queries, *labels)
+    queries_total.inc(*labels, amount=stats.queries)
+    query_seconds.observe(stats.query_seconds, *labels)
+    pool_wait_seconds.observe(stats.pool_wait_seconds, *labels)
+
+    if stats.queries > QUERY_BUDGET:
+        budget_exceeded.inc(*labels)
+        repeated = sorted(stats.statements.items(), key=lambda item: -item[1])[:3]
+        logger.warning(
+            "%s %s issued %d SQL statements (budget %d), %.1f ms in the database; most repeated: %s",
+            method,
+            route,
+            stats.queries,
+            QUERY_BUDGET,
+            stats.query_seconds * 1000,
+            "; ".join(f"{count}x {' '.join(statement.split())[:120]}" for statement, count in repeated)
+        )
+
+class MetricsMiddleware:
+    """ASGI middleware that measures each HTTP request and the SQL it runs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def measure_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measure_send)
+        finally:
+            current_request.reset(token)
+            record_request(
+                scope["method"],
+                route_label(scope),
+                response["status"],
+                time.perf_counter() - started,
+                response["size"],
+                stats
+            )
+
+def render_metrics() -> str:
+    return registry.render()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Table, Text
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, ForeignKey, Index, JSON, Table, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -8,7 +8,8 @@ task_labels = Table(
     'task_labels',
     Base.metadata,
     Column('task_id', String(36), ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True),
-    Column('label_id', String(36), ForeignKey('labels.id', ondelete='CASCADE'), primary_key=True)
+    Column('label_id', String(36), ForeignKey('labels.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_task_labels_label_id', 'label_id')
 )
 
 class User(Base):
@@ -20,7 +21,7 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     avatar = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     projects = relationship("ProjectMember", back_populates="user")
     tasks_created = relationship("Task", back_populates="created_by", foreign_keys="Task.created_by_id")
@@ -34,7 +35,7 @@ class Project(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     members = relationship("ProjectMember", back_populates="project")
     boards = relationship("Board", back_populates="project")
@@ -50,6 +51,11 @@ class ProjectMember(Base):
     
     user = relationship("User", back_populates="projects")
     project = relationship("Project", back_populates="members")
+    
+    __table_args__ = (
+        Index("uq_project_members_project_id_user_id", "project_id", "user_id", unique=True),
+        Index("ix_project_members_user_id_project_id", "user_id", "project_id"),
+    )
 
 class Board(Base):
     __tablename__ = "boards"
@@ -58,11 +64,17 @@ class Board(Base):
     name = Column(String(255), nullable=False)
     project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     position = Column(Integer, nullable=False)
+    # Bumped by every write to the board, its columns or its tasks; backs the board ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     project = relationship("Project", back_populates="boards")
-    columns = relationship("BoardColumn", back_populates="board")
+    columns = relationship("BoardColumn", back_populates="board", order_by="BoardColumn.position")
+    
+    __table_args__ = (
+        Index("ix_boards_project_id_position", "project_id", "position", "id"),
+    )
 
 class BoardColumn(Base):
     __tablename__ = "columns"
@@ -72,10 +84,14 @@ class BoardColumn(Base):
     board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
     position = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     board = relationship("Board", back_populates="columns")
-    tasks = relationship("Task", back_populates="board_column")
+    tasks = relationship("Task", back_populates="board_column", order_by="Task.rank")
+    
+    __table_args__ = (
+        Index("ix_columns_board_id_position", "board_id", "position", "id"),
+    )
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -84,19 +100,31 @@ class Task(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text)
     column_id = Column(String(36), ForeignKey("columns.id", ondelete="CASCADE"), nullable=False)
-    position = Column(Integer, nullable=False)
+    # Copied from the column so access checks and project-wide queries skip the joins
+    board_id = Column(String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    rank = Column(String(255), nullable=False)  # lexicographic order key, see ranking.py
     priority = Column(String(20))  # low, medium, high
     due_date = Column(DateTime(timezone=True))
     created_by_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     assignee_id = Column(String(36), ForeignKey("users.id"))
+    # Bumped by every write to the task or its comments; backs the task ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     board_column = relationship("BoardColumn", back_populates="tasks")
     created_by = relationship("User", back_populates="tasks_created", foreign_keys=[created_by_id])
     assignee = relationship("User", back_populates="tasks_assigned", foreign_keys=[assignee_id])
     comments = relationship("Comment", back_populates="task")
     labels = relationship("Label", secondary=task_labels, back_populates="tasks")
+    
+    __table_args__ = (
+        Index("ix_tasks_column_id_rank", "column_id", "rank", "id"),
+        Index("ix_tasks_assignee_id", "assignee_id"),
+        Index("ix_tasks_board_id", "board_id"),
+        Index("ix_tasks_project_id", "project_id"),
+    )
 
 class Label(Base):
     __tablename__ = "labels"
@@ -114,9 +142,62 @@ class Comment(Base):
     id = Column(String(36), primary_key=True, index=True)
     content = Column(Text, nullable=False)
     task_id = Column(String(36), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the task, see Task.project_id
+    project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
     task = relationship("Task", back_populates="comments")
-    user = relationship("User", back_populates="comments")
\ No newline at end of file
+    user = relationship("User", back_populates="comments")
+    
+    __table_args__ = (
+        Index("ix_comments_task_id_created_at", "task_id", "created_at", "id"),
+        Index("ix_comments_project_id", "project_id"),
+    )
+
+class Change(Base):
+    """One entry in the append-only change log behind GET /boards/{id}/changes, see changes.py"""
+    __tablename__ = "changes"
+    
+    # BIGINT on PostgreSQL; SQLite only autoincrements an INTEGER PRIMARY KEY
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # No foreign key: entries outlive the boards and rows they describe
+    board_id = Column(String(36), nullable=False)
+    entity_type = Column(String(20), nullable=False)  # board, column, task, comment
+    entity_id = Column(String(36), nullable=False)
+    action = Column(String(20), nullable=False)  # created, updated, moved, deleted
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_changes_board_id_seq", "board_id", "seq"),
+        Index("ix_changes_entity_id_seq", "entity_id", "seq"),
+        Index("ix_changes_created_at", "created_at"),
+        # Never reuse the sequence numbers of deleted entries
+        {"sqlite_autoincrement": True},
+    )
+
+class ChangeLogHorizon(Base):
+    """Single row holding the highest sequence number compaction has discarded"""
+    __tablename__ = "change_log_horizon"
+    
+    id = Column(Integer, primary_key=True)
+    seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+class Activity(Base):
+    """One entry in a project's activity feed, written in batches by activity.py"""
+    __tablename__ = "activities"
+    
+    id = Column(String(36), primary_key=True)
+    # No foreign keys: entries are written after the fact and must not fail a batch
+    project_id = Column(String(36), nullable=False)
+    user_id = Column(String(36), nullable=False)
+    action = Column(String(20), nullable=False)  # created, updated, moved, deleted, ...
+    entity_type = Column(String(20), nullable=False)  # project, member, task, comment
+    entity_id = Column(String(36), nullable=False)
+    details = Column(JSON)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_activities_project_id_created_at", "project_id", "created_at", "id"),
+    )
\ No newline at end of file
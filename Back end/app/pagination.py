@@ -0,0 +1,88 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+A page is ordered by a fixed tuple of columns ending in a unique id, and the
+cursor is the opaque encoding of the last row's values for those columns. The
+next page is fetched with WHERE (columns) > (cursor values), or < for
+newest-first pages, which an index on the same columns serves directly, so
+deep pages cost the same as the first one.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, func, tuple_
+from sqlalchemy.orm import Query
+import base64
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", 50))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 200))
+
+# SQLite keeps server-default and Python timestamps as text in different formats,
+# so for columns with a server default both sides of the comparison are
+# normalised to one format there (which keeps the index from serving the sort)
+SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%f"
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort values of the last row on a page as an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Decode a cursor produced by encode_cursor for the same sort columns"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def sort_key(column, value=None, dialect: str = ""):
+    """The expression a sort column (or its cursor value) is compared as"""
+    if dialect == "sqlite" and isinstance(column.type, DateTime) and column.server_default is not None:
+        return func.strftime(SQLITE_TIMESTAMP, column if value is None else value)
+    if value is None:
+        return column
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return value
+
+def paginate(
+    query: Query,
+    columns: list,
+    cursor: Optional[str],
+    limit: Optional[int],
+    descending: bool = False
+) -> Tuple[List, Optional[str]]:
+    """Return one page of query ordered by columns (or in reverse), plus the cursor for the next page"""
+    limit = min(limit or PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT)
+    dialect = query.session.get_bind().dialect.name
+    keys = [sort_key(column, dialect=dialect) for column in columns]
+
+    query = query.order_by(*[key.desc() for key in keys] if descending else keys)
+    if cursor is not None:
+        values = decode_cursor(cursor, columns)
+        bound = tuple_(*[sort_key(column, value, dialect) for column, value in zip(columns, values)])
+        query = query.filter(tuple_(*keys) < bound if descending else tuple_(*keys) > bound)
+
+    # One extra row tells us whether there is a next page
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor([getattr(last, column.key) for column in columns])
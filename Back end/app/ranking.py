@@ -0,0 +1,163 @@
+"""Lexicographic rank keys for ordering tasks without renumbering siblings.
+
+A rank is a base-36 fraction written with the digits 0-9a-z (e.g. "i" is
+18/36). Inserting between two tasks only needs a key strictly between their
+keys, so a move rewrites a single row. Keys grow when the same gap is split
+repeatedly; the background rebalancer rewrites a column with short, evenly
+spaced keys once any of them exceeds RANK_MAX_LENGTH.
+"""
+from typing import List, Optional
+from sqlalchemy import select, update
+from . import models
+from .changes import record_change
+from .database import SessionLocal
+from .etags import bump_versions
+from .events import publish_event
+import logging
+import math
+import os
+import queue
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RANK_MAX_LENGTH = int(os.getenv("RANK_MAX_LENGTH", 32))
+
+# Only digits and lowercase letters, so byte order and common DB collations agree
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+logger = logging.getLogger(__name__)
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Return a key that sorts strictly between before and after (None means open-ended)"""
+    if before is None and after is None:
+        return DIGITS[BASE // 2]
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+
+    lower = before or ""
+    upper = after
+    digits = []
+    i = 0
+    while True:
+        if upper is None:
+            # Everything with the current prefix already sorts below after
+            low = DIGITS.index(lower[i]) if i < len(lower) else 0
+            if before is None:
+                digits.append(DIGITS[-1])
+                return "".join(digits)
+            if low < BASE - 1:
+                # Appending takes the smallest step so repeated appends stay short
+                digits.append(DIGITS[low + 1 if after is None else (low + BASE) // 2])
+                return "".join(digits)
+            digits.append(DIGITS[low])
+            i += 1
+            continue
+
+        if i >= len(upper):
+            # Only reachable when after == before + "0...", which never sort apart
+            raise ValueError(f"No rank fits between {before!r} and {after!r}")
+        low = DIGITS.index(lower[i]) if i < len(lower) else 0
+        high = DIGITS.index(upper[i])
+
+        if high - low > 1:
+            digits.append(DIGITS[high - 1 if before is None else (low + high) // 2])
+            return "".join(digits)
+
+        # No room at this digit: keep the lower digit and search one level deeper.
+        # If the upper digit is larger, anything below this prefix is already < after
+        digits.append(DIGITS[low])
+        if high > low:
+            upper = None
+        i += 1
+
+def evenly_spaced_ranks(count: int) -> List[str]:
+    """Return count short, fixed-width keys spread evenly across the key space"""
+    if count <= 0:
+        return []
+    width = max(1, math.ceil(math.log(count + 1, BASE)))
+    span = BASE ** width
+    step = span // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * step
+        key = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            key.append(DIGITS[digit])
+        ranks.append("".join(reversed(key)))
+    return ranks
+
+def needs_rebalance(rank: str) -> bool:
+    return len(rank) > RANK_MAX_LENGTH
+
+def rebalance_column(column_id: str, db) -> Optional[str]:
+    """Rewrite every task rank in a column with evenly spaced keys; returns the column's board id"""
+    # Lock the column's tasks so concurrent moves wait for the rewrite
+    task_ids = db.execute(
+        select(models.Task.id).where(
+            models.Task.column_id == column_id
+        ).order_by(models.Task.rank, models.Task.id).with_for_update()
+    ).scalars().all()
+
+    board_id = db.query(models.BoardColumn.board_id).filter(models.BoardColumn.id == column_id).scalar()
+    ranks = evenly_spaced_ranks(len(task_ids))
+    if task_ids:
+        db.execute(
+            update(models.Task),
+            [{"id": task_id, "rank": rank} for task_id, rank in zip(task_ids, ranks)]
+        )
+        bump_versions(db, board_ids=[board_id], task_ids=task_ids)
+        for task_id in task_ids:
+            record_change(db, "task", "moved", task_id, board_id)
+    return board_id
+
+class Rebalancer:
+    """Background worker that rebalances columns whose rank keys grew too long"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, column_id: str):
+        with self._lock:
+            if column_id in self._pending:
+                return
+            self._pending.add(column_id)
+        self._queue.put(column_id)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rank-rebalancer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            column_id = self._queue.get()
+            if column_id is None:
+                return
+            with self._lock:
+                self._pending.discard(column_id)
+            db = SessionLocal()
+            try:
+                board_id = rebalance_column(column_id, db)
+                db.commit()
+                # Every rank in the column changed, so open boards reload it
+                publish_event("column", "rebalanced", {"id": column_id}, board_id)
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to rebalance ranks for column %s", column_id)
+            finally:
+                db.close()
+
+rebalancer = Rebalancer()
@@ -0,0 +1,77 @@
+"""Write-invalidated cache of serialised GET responses.
+
+Read endpoints check the caller's access first (normally an access cache hit)
+and then look the response up here. Entries for project, board and task data
+are shared by every member of the project, so only the project list, which is
+different for each user, has the user in its key. Bodies are stored as the
+JSON bytes that were sent, together with their ETag, and evicted
+least-recently-used once RESPONSE_CACHE_MAX_BYTES is exceeded.
+
+Every entry carries tags such as ("board", id). Writes register the tags they
+affect with cache.invalidate_on_commit (bump_versions does it for boards and
+tasks), and the entries are dropped once the transaction commits. A read that
+was already running when a tag was invalidated may have seen the old rows, so
+its result is not stored.
+
+The cache is per process. With several workers, a write only invalidates the
+worker that handled it, so RESPONSE_CACHE_TTL bounds how stale the others can be.
+"""
+from typing import Hashable, Iterable, Optional
+from fastapi import Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .cache import PENDING_INVALIDATIONS, CachedResponse, ResponseCache
+from .etags import etag_headers, etag_matches
+from .serialization import serialize
+from .wire import JSON, send_body
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
+
+def send_cached(
+    entry: CachedResponse,
+    if_none_match: Optional[str] = None,
+    accept_encoding: Optional[str] = None
+) -> Response:
+    """Respond with a cached body, or 304 when the client already has it
+
+    Pass accept_encoding (bulk endpoints) to compress large bodies.
+    """
+    headers = etag_headers(entry.etag) if entry.etag else {}
+    if entry.etag and etag_matches(if_none_match, entry.etag, weak=True):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if accept_encoding is not None:
+        return send_body(entry.body, JSON, accept_encoding, headers)
+    return Response(content=entry.body, media_type=JSON, headers=headers)
+
+def cache_response(
+    key: Hashable,
+    response_model,
+    content,
+    tags: Iterable[Hashable],
+    started: int,
+    etag: Optional[str] = None,
+    accept_encoding: Optional[str] = None
+) -> Response:
+    """Serialise content for its response model, store the bytes and send them"""
+    body = serialize(response_model, content)
+
+    entry = CachedResponse(body, etag, tuple(tags), 0)
+    response_cache.set(key, body, etag, entry.tags, started)
+    return send_cached(entry, accept_encoding=accept_encoding)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    tags = session.info.pop(PENDING_INVALIDATIONS, None)
+    if tags:
+        response_cache.invalidate(tags)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
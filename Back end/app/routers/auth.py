@@ -1,48 +1,71 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..database import run_in_session
+from ..routing import DatabaseRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=DatabaseRoute)
 
-@router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
-    # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Create new user
-    hashed_password = auth_utils.get_password_hash(user.password)
+def find_credentials(db: Session, email: str):
+    """Helper function to load a user's id and password hash by email"""
+    return db.query(models.User.id, models.User.hashed_password).filter(models.User.email == email).first()
+
+def add_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> Optional[schemas.User]:
+    """Helper function to insert a user; None if the email was registered meanwhile"""
     new_user = models.User(
         id=str(uuid.uuid4()),
         email=user.email,
         name=user.name,
         hashed_password=hashed_password
     )
-    
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
     db.refresh(new_user)
+    return schemas.User.model_validate(new_user)
+
+# Register and login spend most of their time on bcrypt in the hashing pool.
+# They are async and only open a session around their queries, so a request
+# waiting for a hash holds neither a worker thread nor a database connection.
+
+@router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
+async def register(user: schemas.UserCreate):
+    """Register a new user"""
+    # Check if user already exists (cheaply, before hashing)
+    if await run_in_session(find_credentials, user.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    # Create new user; the unique email index catches a concurrent registration
+    hashed_password = await auth_utils.get_password_hash_async(user.password)
+    new_user = await run_in_session(add_user, user, hashed_password)
+    if new_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     return new_user
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login and get access token"""
     # Find user by email (username field in OAuth2 form)
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    user = await run_in_session(find_credentials, form_data.username)
     
-    if not user or not auth_utils.verify_password(form_data.password, user.hashed_password):
+    if not user or not await auth_utils.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -1,27 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..access import require_access, resolve_access
+from ..changes import board_deleted, changes_since, delete_columns
+from ..database import get_db, get_read_db
+from ..etags import board_version, check_if_match, etag_headers, make_etag, not_modified
+from ..events import stream_events
+from ..pagination import paginate
+from ..response_cache import cache_response, response_cache, send_cached
+from ..serialization import FAST_SERIALIZATION, schema_columns, select_for
+from ..wire import JSON, negotiate_format, send_formatted
+from ..routing import DatabaseRoute, run_db
+from ..writes import Write, commit_write
 
-router = APIRouter(prefix="/boards", tags=["Boards"])
+router = APIRouter(prefix="/boards", tags=["Boards"], route_class=DatabaseRoute)
 
-def check_project_access(project_id: str, user_id: str, db: Session):
-    """Helper function to check if user has access to a project"""
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == user_id
-    ).first()
+def check_project_access(
+    project_id: str,
+    user_id: str,
+    db: Session,
+    roles: Optional[List[str]] = None,
+    detail: str = "You don't have access to this project"
+):
+    """Helper function to check if user has access (and optionally a role) in a project"""
+    access = resolve_access("project", project_id, user_id, db)
     
-    if not membership:
+    if not access or access.role is None or (roles is not None and access.role not in roles):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this project"
+            detail=detail
+        )
+    return access
+
+def check_board_access(board_id: str, user_id: str, db: Session):
+    """Helper function to check if user has access to a board's project"""
+    return require_access(
+        "board",
+        board_id,
+        user_id,
+        db,
+        forbidden_detail="You don't have access to this project"
+    )
+
+def load_snapshot(board_id: str, db: Session) -> Optional[models.Board]:
+    """Helper function to load a board with its columns, tasks, assignees and labels"""
+    board = db.query(models.Board).filter(models.Board.id == board_id).first()
+    
+    if not board:
+        return None
+    
+    # Eager load columns -> tasks -> (assignee, labels) with one statement per level
+    columns = db.query(models.BoardColumn).options(
+        selectinload(models.BoardColumn.tasks).options(
+            joinedload(models.Task.assignee),
+            selectinload(models.Task.labels)
         )
-    return membership
+    ).filter(
+        models.BoardColumn.board_id == board_id
+    ).order_by(models.BoardColumn.position).all()
+    
+    # Attach the loaded columns without triggering a lazy load
+    set_committed_value(board, "columns", columns)
+    
+    return board
+
+def load_snapshot_rows(board_id: str, db: Session) -> Optional[dict]:
+    """Helper function to build a board snapshot from plain rows, one statement per table"""
+    board = db.query(*schema_columns(models.Board, schemas.Board, "project_id")).filter(
+        models.Board.id == board_id
+    ).first()
+    
+    if not board:
+        return None
+    
+    columns = db.query(*schema_columns(models.BoardColumn, schemas.BoardColumn)).filter(
+        models.BoardColumn.board_id == board_id
+    ).order_by(models.BoardColumn.position).all()
+    tasks = db.query(*schema_columns(models.Task, schemas.Task)).filter(
+        models.Task.board_id == board_id
+    ).order_by(models.Task.column_id, models.Task.rank).all()
+    
+    # Assignees and labels of every task on the board
+    assignees = db.query(*schema_columns(models.User, schemas.User)).join(
+        models.Task, models.Task.assignee_id == models.User.id
+    ).filter(models.Task.board_id == board_id).distinct().all()
+    label_rows = db.query(models.task_labels.c.task_id, *schema_columns(models.Label, schemas.Label)).join(
+        models.Label, models.Label.id == models.task_labels.c.label_id
+    ).join(
+        models.Task, models.Task.id == models.task_labels.c.task_id
+    ).filter(models.Task.board_id == board_id).all()
+    
+    assignees = {assignee.id: assignee for assignee in assignees}
+    labels = {}
+    for row in label_rows:
+        label = row._asdict()
+        labels.setdefault(label.pop("task_id"), []).append(label)
+    
+    tasks_by_column = {}
+    for task in tasks:
+        tasks_by_column.setdefault(task.column_id, []).append({
+            **task._asdict(),
+            "assignee": assignees.get(task.assignee_id),
+            "labels": labels.get(task.id, []),
+        })
+    
+    return {
+        **board._asdict(),
+        "columns": [{**column._asdict(), "tasks": tasks_by_column.get(column.id, [])} for column in columns],
+    }
 
 @router.post("", response_model=schemas.Board, status_code=status.HTTP_201_CREATED)
 def create_board(
@@ -42,36 +135,140 @@ def create_board(
     )
     
     db.add(new_board)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("board", "created", new_board.id, (new_board.id,)),
+        invalidate=[("project", board.project_id)]
+    )
     db.refresh(new_board)
     
     return new_board
 
-@router.get("/project/{project_id}", response_model=List[schemas.Board])
+@router.get("/project/{project_id}", response_model=schemas.Page[schemas.Board])
 def get_project_boards(
     project_id: str,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all boards for a project"""
+    """Get the boards of a project ordered by position, one page at a time"""
     # Check project access
     check_project_access(project_id, current_user.id, db)
     
+    # Serve repeat reads from the response cache
+    key = ("boards", project_id, cursor, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached)
+    started = response_cache.sequence()
+    
     # Get all boards ordered by position
-    boards = db.query(models.Board).filter(
-        models.Board.project_id == project_id
-    ).order_by(models.Board.position).all()
+    query = select_for(db, models.Board, schemas.Board).filter(models.Board.project_id == project_id)
+    boards, next_cursor = paginate(query, [models.Board.position, models.Board.id], cursor, limit)
     
-    return boards
+    page = {"items": boards, "next_cursor": next_cursor}
+    return cache_response(key, schemas.Page[schemas.Board], page, [("project", project_id)], started)
+
+def load_board(board_id: str, db: Session):
+    """Helper function to load a board as a row or ORM object for its schema"""
+    return select_for(db, models.Board, schemas.Board).filter(models.Board.id == board_id).first()
 
 @router.get("/{board_id}", response_model=schemas.Board)
-def get_board(
+async def get_board(
     board_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
     """Get a specific board"""
-    board = db.query(models.Board).filter(models.Board.id == board_id).first()
+    # Check project access
+    await run_db(db, check_board_access, board_id, current_user.id)
+    
+    # Serve repeat reads from the response cache
+    key = ("board", board_id)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached, if_none_match)
+    started = response_cache.sequence()
+    
+    # Answer from the version alone when the client is up to date
+    etag = make_etag(await run_db(db, board_version, board_id), "board", board_id)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
+    board = await run_db(db, load_board, board_id)
+    
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    # Serialise in the thread pool
+    return await run_in_threadpool(cache_response, key, schemas.Board, board, [("board", board_id)], started, etag)
+
+@router.get("/{board_id}/snapshot", response_model=schemas.BoardSnapshot)
+async def get_board_snapshot(
+    board_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: str = Header("identity"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Get a board with its ordered columns and tasks in a single request"""
+    # Check project access
+    await run_db(db, check_board_access, board_id, current_user.id)
+    media_type = negotiate_format(accept)
+    
+    # Serve repeat reads from the response cache (JSON only)
+    key = ("board-snapshot", board_id)
+    cached = response_cache.get(key) if media_type == JSON else None
+    if cached:
+        return send_cached(cached, if_none_match, accept_encoding)
+    started = response_cache.sequence()
+    
+    # Answer from the version alone when the client is up to date
+    etag = make_etag(await run_db(db, board_version, board_id), "board-snapshot", board_id, media_type)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
+    # Plain rows straight to JSON on the fast serialisation path
+    if FAST_SERIALIZATION:
+        board = await run_db(db, load_snapshot_rows, board_id)
+    else:
+        board = await run_db(db, load_snapshot, board_id)
+    
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    # Serialise in the thread pool; other representations are streamed as they are encoded, not cached
+    if media_type != JSON:
+        return await run_in_threadpool(
+            send_formatted, schemas.BoardSnapshot, board, media_type, accept_encoding, etag_headers(etag)
+        )
+    
+    return await run_in_threadpool(
+        cache_response, key, schemas.BoardSnapshot, board, [("board", board_id)], started, etag, accept_encoding
+    )
+
+@router.get("/{board_id}/events")
+def get_board_events(
+    board_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Stream changes to a board's columns, tasks and comments as Server-Sent Events"""
+    board = db.query(models.Board.project_id).filter(models.Board.id == board_id).first()
     
     if not board:
         raise HTTPException(
@@ -82,12 +279,39 @@ def get_board(
     # Check project access
     check_project_access(board.project_id, current_user.id, db)
     
-    return board
+    # Hand the connection back now; the stream can stay open for hours
+    db.close()
+    
+    return StreamingResponse(
+        stream_events(board_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{board_id}/changes", response_model=schemas.BoardChanges)
+def get_board_changes(
+    board_id: str,
+    since: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Get what changed on a board since a change-log cursor (without since: the current cursor)"""
+    # Check project access
+    try:
+        check_board_access(board_id, current_user.id, db)
+    except HTTPException as error:
+        # A deleted board has no project left to check, and its feed only names rows that are gone
+        if error.status_code != status.HTTP_404_NOT_FOUND or not board_deleted(board_id, db):
+            raise
+    
+    return changes_since(board_id, since, limit, db)
 
 @router.put("/{board_id}", response_model=schemas.Board)
 def update_board(
     board_id: str,
     board_update: schemas.BoardBase,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -102,12 +326,18 @@ def update_board(
     
     # Check project access
     check_project_access(board.project_id, current_user.id, db)
+    check_if_match(if_match, make_etag(board.version, "board", board_id))
     
     # Update board
     board.name = board_update.name
     board.position = board_update.position
-    
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("board", "updated", board_id, (board_id,)),
+        boards=[board_id],
+        invalidate=[("project", board.project_id)]
+    )
     db.refresh(board)
     
     return board
@@ -115,6 +345,7 @@ def update_board(
 @router.delete("/{board_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_board(
     board_id: str,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -128,18 +359,27 @@ def delete_board(
         )
     
     # Check project access (and must be admin or owner)
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == board.project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not membership or membership.role not in ["owner", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project owner or admin can delete boards"
-        )
+    check_project_access(
+        board.project_id,
+        current_user.id,
+        db,
+        roles=["owner", "admin"],
+        detail="Only project owner or admin can delete boards"
+    )
+    check_if_match(if_match, make_etag(board.version, "board", board_id))
     
+    project_id = board.project_id
+    # Its columns, tasks and comments go with it, each logged as deleted
+    column_ids = [column_id for column_id, in db.query(models.BoardColumn.id).filter(models.BoardColumn.board_id == board_id)]
+    deleted = delete_columns(db, board_id, column_ids)
     db.delete(board)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("board", "deleted", board_id, (board_id,), data={"id": board_id}),
+        boards=[board_id],
+        invalidate=[("project", project_id), *[("task", task_id) for task_id in deleted["task"]]],
+        forget=[("project", project_id)]
+    )
     
     return None
\ No newline at end of file
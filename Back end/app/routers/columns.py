@@ -1,36 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..access import require_access
+from ..changes import delete_columns
+from ..database import get_db, get_read_db
+from ..etags import board_version, check_if_match, make_etag, not_modified
+from ..pagination import paginate
+from ..response_cache import cache_response, response_cache, send_cached
+from ..serialization import select_for
+from ..routing import DatabaseRoute
+from ..writes import Write, commit_write
 
-router = APIRouter(prefix="/columns", tags=["Columns"])
+router = APIRouter(prefix="/columns", tags=["Columns"], route_class=DatabaseRoute)
 
 def check_board_access(board_id: str, user_id: str, db: Session):
     """Helper function to check if user has access to a board"""
-    board = db.query(models.Board).filter(models.Board.id == board_id).first()
-    
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
-        )
-    
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == board.project_id,
-        models.ProjectMember.user_id == user_id
-    ).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this board"
-        )
-    
-    return board
+    return require_access(
+        "board",
+        board_id,
+        user_id,
+        db,
+        forbidden_detail="You don't have access to this board"
+    )
 
 @router.post("", response_model=schemas.BoardColumn, status_code=status.HTTP_201_CREATED)
 def create_column(
@@ -51,36 +47,127 @@ def create_column(
     )
     
     db.add(new_column)
-    db.commit()
-    db.refresh(new_column)
+    commit_write(
+        db,
+        current_user.id,
+        Write("column", "created", new_column.id, (column.board_id,), data=new_column),
+        boards=[column.board_id]
+    )
     
     return new_column
 
-@router.get("/board/{board_id}", response_model=List[schemas.BoardColumn])
+@router.post("/reorder", response_model=List[schemas.ColumnPosition])
+def reorder_columns(
+    reorder: schemas.ColumnReorder,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Set the positions of several columns in one transaction"""
+    column_ids = {move.column_id for move in reorder.columns}
+    boards = dict(
+        db.query(models.BoardColumn.id, models.BoardColumn.board_id).filter(
+            models.BoardColumn.id.in_(column_ids)
+        ).all()
+    )
+    
+    missing = column_ids - boards.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Column '{sorted(missing)[0]}' not found"
+        )
+    
+    # Check board access once per distinct board
+    for board_id in set(boards.values()):
+        check_board_access(board_id, current_user.id, db)
+    
+    # One executemany UPDATE for the whole batch (the last move wins for repeated columns)
+    positions = {move.column_id: move.position for move in reorder.columns}
+    if positions:
+        db.execute(
+            update(models.BoardColumn),
+            [{"id": column_id, "position": position} for column_id, position in positions.items()]
+        )
+    
+    results = [
+        {"id": column_id, "board_id": boards[column_id], "position": position}
+        for column_id, position in positions.items()
+    ]
+    commit_write(
+        db,
+        current_user.id,
+        *[Write("column", "moved", result["id"], (result["board_id"],), data=result) for result in results],
+        boards={result["board_id"] for result in results}
+    )
+    
+    return results
+
+@router.get("/board/{board_id}", response_model=schemas.Page[schemas.BoardColumn])
 def get_board_columns(
     board_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all columns for a board"""
+    """Get the columns of a board ordered by position, one page at a time"""
     # Check board access
     check_board_access(board_id, current_user.id, db)
     
+    # Serve repeat reads from the response cache
+    key = ("columns", board_id, cursor, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached, if_none_match)
+    started = response_cache.sequence()
+    
+    # Answer from the board version alone when the client is up to date
+    etag = make_etag(board_version(board_id, db), "columns", board_id, cursor, limit)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
     # Get all columns ordered by position
-    columns = db.query(models.BoardColumn).filter(
-        models.BoardColumn.board_id == board_id
-    ).order_by(models.BoardColumn.position).all()
+    query = select_for(db, models.BoardColumn, schemas.BoardColumn).filter(models.BoardColumn.board_id == board_id)
+    columns, next_cursor = paginate(query, [models.BoardColumn.position, models.BoardColumn.id], cursor, limit)
     
-    return columns
+    page = {"items": columns, "next_cursor": next_cursor}
+    return cache_response(key, schemas.Page[schemas.BoardColumn], page, [("board", board_id)], started, etag)
 
 @router.get("/{column_id}", response_model=schemas.BoardColumn)
 def get_column(
     column_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
     """Get a specific column"""
-    column = db.query(models.BoardColumn).filter(models.BoardColumn.id == column_id).first()
+    # Check board access
+    access = require_access(
+        "column",
+        column_id,
+        current_user.id,
+        db,
+        forbidden_detail="You don't have access to this board"
+    )
+    
+    # Serve repeat reads from the response cache
+    key = ("column", column_id)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached, if_none_match)
+    started = response_cache.sequence()
+    
+    # Answer from the board version alone when the client is up to date
+    etag = make_etag(board_version(access.board_id, db), "column", column_id)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
+    column = select_for(db, models.BoardColumn, schemas.BoardColumn).filter(models.BoardColumn.id == column_id).first()
     
     if not column:
         raise HTTPException(
@@ -88,15 +175,13 @@ def get_column(
             detail="Column not found"
         )
     
-    # Check board access
-    check_board_access(column.board_id, current_user.id, db)
-    
-    return column
+    return cache_response(key, schemas.BoardColumn, column, [("board", access.board_id)], started, etag)
 
 @router.put("/{column_id}", response_model=schemas.BoardColumn)
 def update_column(
     column_id: str,
     column_update: schemas.BoardColumnBase,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -111,19 +196,24 @@ def update_column(
     
     # Check board access
     check_board_access(column.board_id, current_user.id, db)
+    check_if_match(if_match, make_etag(board_version(column.board_id, db), "column", column_id))
     
     # Update column
     column.name = column_update.name
     column.position = column_update.position
-    
-    db.commit()
-    db.refresh(column)
+    commit_write(
+        db,
+        current_user.id,
+        Write("column", "updated", column_id, (column.board_id,), data=column),
+        boards=[column.board_id]
+    )
     
     return column
 
 @router.delete("/{column_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_column(
     column_id: str,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -137,9 +227,18 @@ def delete_column(
         )
     
     # Check board access
-    check_board_access(column.board_id, current_user.id, db)
-    
-    db.delete(column)
-    db.commit()
+    access = check_board_access(column.board_id, current_user.id, db)
+    check_if_match(if_match, make_etag(board_version(access.board_id, db), "column", column_id))
+    
+    # Its tasks and comments go with it, each logged as deleted
+    deleted = delete_columns(db, access.board_id, [column_id])
+    commit_write(
+        db,
+        current_user.id,
+        Write("column", "deleted", column_id, (access.board_id,), data={"id": column_id}),
+        boards=[access.board_id],
+        invalidate=[("task", task_id) for task_id in deleted["task"]],
+        forget=[("project", access.project_id)]
+    )
     
     return None
\ No newline at end of file
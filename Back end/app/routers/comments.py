@@ -1,39 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..access import require_access
+from ..database import get_db, get_read_db
+from ..etags import check_if_match, make_etag, not_modified, task_version
+from ..pagination import paginate
+from ..response_cache import cache_response, response_cache, send_cached
+from ..serialization import select_for
+from ..routing import DatabaseRoute
+from ..writes import Write, commit_write
 
-router = APIRouter(prefix="/comments", tags=["Comments"])
+router = APIRouter(prefix="/comments", tags=["Comments"], route_class=DatabaseRoute)
 
 def check_task_access(task_id: str, user_id: str, db: Session):
     """Helper function to check if user has access to a task"""
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    column = db.query(models.BoardColumn).filter(models.BoardColumn.id == task.column_id).first()
-    board = db.query(models.Board).filter(models.Board.id == column.board_id).first()
-    
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == board.project_id,
-        models.ProjectMember.user_id == user_id
-    ).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this task"
-        )
-    
-    return task
+    return require_access(
+        "task",
+        task_id,
+        user_id,
+        db,
+        forbidden_detail="You don't have access to this task"
+    )
+
+def task_board_id(task_id: str, db: Session) -> str:
+    """Helper function to find the board a task (and so its comments) is on"""
+    return db.query(models.Task.board_id).filter(models.Task.id == task_id).scalar()
 
 @router.post("", response_model=schemas.Comment, status_code=status.HTTP_201_CREATED)
 def create_comment(
@@ -43,47 +38,73 @@ def create_comment(
 ):
     """Create a new comment on a task"""
     # Check task access
-    check_task_access(comment.task_id, current_user.id, db)
+    access = check_task_access(comment.task_id, current_user.id, db)
     
     # Create the comment
     new_comment = models.Comment(
         id=str(uuid.uuid4()),
         content=comment.content,
         task_id=comment.task_id,
+        project_id=access.project_id,
         user_id=current_user.id
     )
     
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    commit_write(
+        db,
+        current_user.id,
+        Write(
+            "comment", "created", new_comment.id, (access.board_id,), access.project_id, new_comment,
+            {"task_id": comment.task_id}
+        ),
+        tasks=[comment.task_id]
+    )
     
     return new_comment
 
-@router.get("/task/{task_id}", response_model=List[schemas.Comment])
+@router.get("/task/{task_id}", response_model=schemas.Page[schemas.Comment])
 def get_task_comments(
     task_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all comments for a task"""
+    """Get the comments on a task, oldest first, one page at a time"""
     # Check task access
     check_task_access(task_id, current_user.id, db)
     
+    # Serve repeat reads from the response cache
+    key = ("comments", task_id, cursor, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached, if_none_match)
+    started = response_cache.sequence()
+    
+    # Answer from the task version alone when the client is up to date
+    etag = make_etag(task_version(task_id, db), "comments", task_id, cursor, limit)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
     # Get all comments ordered by creation time
-    comments = db.query(models.Comment).filter(
-        models.Comment.task_id == task_id
-    ).order_by(models.Comment.created_at).all()
+    query = select_for(db, models.Comment, schemas.Comment).filter(models.Comment.task_id == task_id)
+    comments, next_cursor = paginate(query, [models.Comment.created_at, models.Comment.id], cursor, limit)
     
-    return comments
+    page = {"items": comments, "next_cursor": next_cursor}
+    return cache_response(key, schemas.Page[schemas.Comment], page, [("task", task_id)], started, etag)
 
 @router.put("/{comment_id}", response_model=schemas.Comment)
 def update_comment(
     comment_id: str,
     content: str,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Update a comment (only by the author)"""
+    """Update a comment (only by the author); If-Match takes the ETag of its task"""
     comment = db.query(models.Comment).filter(models.Comment.id == comment_id).first()
     
     if not comment:
@@ -98,22 +119,28 @@ def update_comment(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only edit your own comments"
         )
+    check_if_match(if_match, make_etag(task_version(comment.task_id, db), "task", comment.task_id))
     
     # Update comment
     comment.content = content
-    
-    db.commit()
-    db.refresh(comment)
+    board_id = task_board_id(comment.task_id, db)
+    commit_write(
+        db,
+        current_user.id,
+        Write("comment", "updated", comment_id, (board_id,), comment.project_id, comment, {"task_id": comment.task_id}),
+        tasks=[comment.task_id]
+    )
     
     return comment
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_comment(
     comment_id: str,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Delete a comment (only by the author)"""
+    """Delete a comment (only by the author); If-Match takes the ETag of its task"""
     comment = db.query(models.Comment).filter(models.Comment.id == comment_id).first()
     
     if not comment:
@@ -128,8 +155,21 @@ def delete_comment(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only delete your own comments"
         )
+    check_if_match(if_match, make_etag(task_version(comment.task_id, db), "task", comment.task_id))
+    
+    task_id = comment.task_id
+    project_id = comment.project_id
+    board_id = task_board_id(task_id, db)
     
     db.delete(comment)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write(
+            "comment", "deleted", comment_id, (board_id,), project_id, {"id": comment_id, "task_id": task_id},
+            {"task_id": task_id}
+        ),
+        tasks=[task_id]
+    )
     
     return None
\ No newline at end of file
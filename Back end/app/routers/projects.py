@@ -1,13 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..access import resolve_access, require_access
+from ..changes import delete_columns
+from ..database import get_db, get_read_db
+from ..export import EXPORT_ENTITIES, EXPORT_FORMATS, stream_columnar, stream_csv, stream_msgpack, stream_ndjson
+from ..importer import import_project, iter_lines, iter_request_chunks
+from ..pagination import paginate
+from ..response_cache import cache_response, response_cache, send_cached
+from ..serialization import select_for
+from ..search import search_project
+from ..routing import DatabaseRoute
+from ..writes import Write, commit_write
+from ..wire import FORMATS, MSGPACK, negotiate_format, stream_response
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=DatabaseRoute)
+
+def check_project_role(project_id: str, user_id: str, db: Session, roles: List[str], detail: str):
+    """Helper function to check the user's role in a project (403 when it is missing, too)"""
+    access = resolve_access("project", project_id, user_id, db)
+    
+    if not access or access.role not in roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+    return access
 
 @router.post("", response_model=schemas.Project, status_code=status.HTTP_201_CREATED)
 def create_project(
@@ -35,46 +58,84 @@ def create_project(
     )
     
     db.add(project_member)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("project", "created", new_project.id, project_id=new_project.id, details={"name": project.name}),
+        invalidate=[("user", current_user.id)]
+    )
     db.refresh(new_project)
     
     return new_project
 
-@router.get("", response_model=List[schemas.Project])
-def get_projects(
+@router.post("/import", response_model=schemas.ProjectImportResult, status_code=status.HTTP_201_CREATED)
+def import_project_stream(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all projects for the current user"""
+    """Import a whole project from a streamed NDJSON body in one transaction"""
+    result = import_project(iter_lines(iter_request_chunks(request)), current_user.id, db)
+    commit_write(
+        db,
+        current_user.id,
+        Write("project", "imported", result["project_id"], project_id=result["project_id"], details=result["rows"]),
+        invalidate=[("user", current_user.id)]
+    )
+    
+    return result
+
+@router.get("", response_model=schemas.Page[schemas.Project])
+def get_projects(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Get the current user's projects, oldest first, one page at a time"""
+    # Serve repeat reads from the response cache (this list is per user)
+    key = ("projects", current_user.id, cursor, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached)
+    started = response_cache.sequence()
+    
     # Get all projects where user is a member
-    projects = db.query(models.Project).join(
+    query = select_for(db, models.Project, schemas.Project).join(
         models.ProjectMember
     ).filter(
         models.ProjectMember.user_id == current_user.id
-    ).all()
+    )
+    projects, next_cursor = paginate(query, [models.Project.created_at, models.Project.id], cursor, limit)
     
-    return projects
+    page = {"items": projects, "next_cursor": next_cursor}
+    tags = [("user", current_user.id)] + [("project", project.id) for project in projects]
+    return cache_response(key, schemas.Page[schemas.Project], page, tags, started)
 
 @router.get("/{project_id}", response_model=schemas.Project)
 def get_project(
     project_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
     """Get a specific project by ID"""
     # Check if user is a member of this project
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
+    access = resolve_access("project", project_id, current_user.id, db)
     
-    if not membership:
+    if not access or access.role is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or you don't have access"
         )
     
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    # Serve repeat reads from the response cache
+    key = ("project", project_id)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached)
+    started = response_cache.sequence()
+    
+    project = select_for(db, models.Project, schemas.Project).filter(models.Project.id == project_id).first()
     
     if not project:
         raise HTTPException(
@@ -82,7 +143,7 @@ def get_project(
             detail="Project not found"
         )
     
-    return project
+    return cache_response(key, schemas.Project, project, [("project", project_id)], started)
 
 @router.put("/{project_id}", response_model=schemas.Project)
 def update_project(
@@ -93,16 +154,7 @@ def update_project(
 ):
     """Update a project"""
     # Check if user is owner or admin
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not membership or membership.role not in ["owner", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to update this project"
-        )
+    check_project_role(project_id, current_user.id, db, ["owner", "admin"], "You don't have permission to update this project")
     
     # Get and update the project
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
@@ -115,8 +167,12 @@ def update_project(
     
     project.name = project_update.name
     project.description = project_update.description
-    
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("project", "updated", project_id, project_id=project_id, details={"name": project_update.name}),
+        invalidate=[("project", project_id)]
+    )
     db.refresh(project)
     
     return project
@@ -129,18 +185,8 @@ def delete_project(
 ):
     """Delete a project (owner only)"""
     # Check if user is owner
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not membership or membership.role != "owner":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project owner can delete the project"
-        )
+    check_project_role(project_id, current_user.id, db, ["owner"], "Only project owner can delete the project")
     
-    # Delete the project (cascades to members, boards, etc.)
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     
     if not project:
@@ -149,38 +195,178 @@ def delete_project(
             detail="Project not found"
         )
     
+    # Boards first, each with its columns, tasks and comments logged as deleted (as in
+    # delete_board), so this doesn't depend on ON DELETE CASCADE and every board's
+    # change feed and event stream see the deletion
+    board_ids = [board_id for board_id, in db.query(models.Board.id).filter(models.Board.project_id == project_id)]
+    task_ids = set()
+    for board_id in board_ids:
+        column_ids = [
+            column_id for column_id, in db.query(models.BoardColumn.id).filter(models.BoardColumn.board_id == board_id)
+        ]
+        task_ids |= delete_columns(db, board_id, column_ids)["task"]
+    if board_ids:
+        db.execute(delete(models.Board).where(models.Board.id.in_(board_ids)))
+    db.execute(delete(models.ProjectMember).where(models.ProjectMember.project_id == project_id))
+    db.execute(delete(models.Activity).where(models.Activity.project_id == project_id))
     db.delete(project)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        *[Write("board", "deleted", board_id, (board_id,), data={"id": board_id}) for board_id in board_ids],
+        boards=board_ids,
+        invalidate=[("project", project_id), *[("task", task_id) for task_id in task_ids]],
+        forget=[("project", project_id)]
+    )
     
     return None
 
-@router.get("/{project_id}/members", response_model=List[schemas.User])
+@router.get("/{project_id}/members", response_model=schemas.Page[schemas.User])
 def get_project_members(
     project_id: str,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all members of a project"""
+    """Get the members of a project, one page at a time"""
     # Check if user is a member
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
+    access = resolve_access("project", project_id, current_user.id, db)
     
-    if not membership:
+    if not access or access.role is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or you don't have access"
         )
     
+    # Serve repeat reads from the response cache
+    key = ("project-members", project_id, cursor, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached)
+    started = response_cache.sequence()
+    
     # Get all members
-    members = db.query(models.User).join(
+    query = select_for(db, models.User, schemas.User).join(
         models.ProjectMember
     ).filter(
         models.ProjectMember.project_id == project_id
-    ).all()
+    )
+    members, next_cursor = paginate(query, [models.User.created_at, models.User.id], cursor, limit)
     
-    return members
+    page = {"items": members, "next_cursor": next_cursor}
+    return cache_response(key, schemas.Page[schemas.User], page, [("project", project_id)], started)
+
+@router.get("/{project_id}/activity", response_model=schemas.Page[schemas.Activity])
+def get_project_activity(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Get a project's activity feed, newest first, one page at a time"""
+    # Check if user is a member
+    require_access(
+        "project",
+        project_id,
+        current_user.id,
+        db,
+        not_found_detail="Project not found",
+        forbidden_detail="You don't have access to this project"
+    )
+    
+    # Not cached: entries arrive in the background, after the writes they describe
+    query = select_for(db, models.Activity, schemas.Activity).filter(models.Activity.project_id == project_id)
+    entries, next_cursor = paginate(
+        query, [models.Activity.created_at, models.Activity.id], cursor, limit, descending=True
+    )
+    
+    return {"items": entries, "next_cursor": next_cursor}
+
+@router.get("/{project_id}/export")
+def export_project(
+    project_id: str,
+    format: Optional[str] = None,
+    entity: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    accept_encoding: str = Header("identity"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Stream a whole project as NDJSON, columnar NDJSON or MessagePack, or one entity type as CSV"""
+    # Check if user is a member
+    access = resolve_access("project", project_id, current_user.id, db)
+    
+    if not access or access.role is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or you don't have access"
+        )
+    
+    # Without an explicit format, follow the Accept header
+    if format is None:
+        format = EXPORT_FORMATS.get(negotiate_format(accept), "ndjson")
+    
+    if format == "msgpack" and MSGPACK not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="MessagePack export is not available on this server"
+        )
+    
+    if format in ("ndjson", "columnar", "msgpack"):
+        stream, media_type, extension = {
+            "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+            "columnar": (stream_columnar, "application/x-ndjson", "columnar.ndjson"),
+            "msgpack": (stream_msgpack, MSGPACK, "msgpack"),
+        }[format]
+        return stream_response(
+            stream(project_id),
+            media_type,
+            accept_encoding,
+            {"Content-Disposition": f'attachment; filename="project-{project_id}.{extension}"'}
+        )
+    
+    if format == "csv":
+        if entity not in EXPORT_ENTITIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"CSV export needs an entity, one of: {', '.join(EXPORT_ENTITIES)}"
+            )
+        return stream_response(
+            stream_csv(project_id, entity),
+            "text/csv",
+            accept_encoding,
+            {"Content-Disposition": f'attachment; filename="project-{project_id}-{entity}.csv"'}
+        )
+    
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Format must be 'ndjson', 'columnar', 'msgpack' or 'csv'"
+    )
+
+@router.get("/{project_id}/search", response_model=schemas.Page[schemas.SearchResult])
+def search_project_content(
+    project_id: str,
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Search task titles, descriptions and comments in a project, best matches first"""
+    # Check if user is a member
+    access = resolve_access("project", project_id, current_user.id, db)
+    
+    if not access or access.role is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or you don't have access"
+        )
+    
+    results, next_cursor = search_project(project_id, q, cursor, limit, db)
+    
+    return {"items": results, "next_cursor": next_cursor}
 
 @router.post("/{project_id}/members", status_code=status.HTTP_201_CREATED)
 def add_project_member(
@@ -192,16 +378,7 @@ def add_project_member(
 ):
     """Add a member to a project (admin or owner only)"""
     # Check if user is owner or admin
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not membership or membership.role not in ["owner", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to add members"
-        )
+    check_project_role(project_id, current_user.id, db, ["owner", "admin"], "You don't have permission to add members")
     
     # Find the user to add
     user_to_add = db.query(models.User).filter(models.User.email == member_email).first()
@@ -233,6 +410,12 @@ def add_project_member(
     )
     
     db.add(new_member)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("member", "added", user_to_add.id, project_id=project_id, details={"role": role}),
+        invalidate=[("project", project_id), ("user", user_to_add.id)],
+        forget=[("project", project_id)]
+    )
     
     return {"message": "Member added successfully"}
\ No newline at end of file
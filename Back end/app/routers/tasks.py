@@ -1,38 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import delete, func, insert, update
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 import uuid
 
 from .. import models, schemas
 from .. import auth as auth_utils
-from ..database import get_db
+from ..access import require_access, resolve_access_many
+from ..database import get_db, get_read_db
+from ..etags import board_version, check_if_match, etag_headers, make_etag, not_modified, task_version
+from ..pagination import paginate
+from ..ranking import rank_between, rebalancer
+from ..response_cache import cache_response, response_cache, send_cached
+from ..serialization import select_for
+from ..wire import JSON, negotiate_format, send_formatted
+from ..routing import DatabaseRoute, run_db
+from ..writes import Write, commit_write
 
-router = APIRouter(prefix="/tasks", tags=["Tasks"])
+router = APIRouter(prefix="/tasks", tags=["Tasks"], route_class=DatabaseRoute)
 
 def check_column_access(column_id: str, user_id: str, db: Session):
     """Helper function to check if user has access to a column"""
-    column = db.query(models.BoardColumn).filter(models.BoardColumn.id == column_id).first()
+    return require_access(
+        "column",
+        column_id,
+        user_id,
+        db,
+        forbidden_detail="You don't have access to this column"
+    )
+
+def get_new_rank(
+    column_id: str,
+    db: Session,
+    before_task_id: Optional[str] = None,
+    after_task_id: Optional[str] = None,
+    moving_task_id: Optional[str] = None
+) -> str:
+    """Helper function to compute a rank placing a task before/after another task (default: end of column)"""
+    siblings = db.query(models.Task.id, models.Task.rank).filter(models.Task.column_id == column_id)
+    if moving_task_id:
+        siblings = siblings.filter(models.Task.id != moving_task_id)
+    
+    def get_anchor(anchor_id: str):
+        # Lock the anchor so a concurrent rebalance can't rewrite it underneath us
+        anchor = siblings.filter(models.Task.id == anchor_id).with_for_update().first()
+        if not anchor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Task '{anchor_id}' is not in the target column"
+            )
+        return anchor
     
-    if not column:
+    previous = get_anchor(after_task_id) if after_task_id else None
+    following = get_anchor(before_task_id) if before_task_id else None
+    
+    # Both anchors must be neighbours, in order (equal ranks fall through to the 409 below)
+    if previous is not None and following is not None and (
+        previous.id == following.id
+        or previous.rank > following.rank
+        or siblings.filter(models.Task.rank > previous.rank, models.Task.rank < following.rank).first() is not None
+    ):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Column not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tasks '{after_task_id}' and '{before_task_id}' are not adjacent"
         )
     
-    board = db.query(models.Board).filter(models.Board.id == column.board_id).first()
+    # Find the missing neighbour with a single (column_id, rank) index probe
+    if previous is None and following is not None:
+        previous = siblings.filter(models.Task.rank < following.rank).order_by(models.Task.rank.desc()).first()
+    elif following is None and after_task_id:
+        following = siblings.filter(models.Task.rank > previous.rank).order_by(models.Task.rank).first()
+    elif previous is None:
+        previous = siblings.order_by(models.Task.rank.desc()).first()
     
-    membership = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == board.project_id,
-        models.ProjectMember.user_id == user_id
-    ).first()
-    
-    if not membership:
+    try:
+        return rank_between(previous.rank if previous else None, following.rank if following else None)
+    except ValueError:
+        # Neighbours share a rank (e.g. concurrent appends); rewrite the column and let the client retry
+        rebalancer.schedule(column_id)
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this column"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task order in this column is being rebuilt, please retry"
         )
-    
-    return column
 
 @router.post("", response_model=schemas.Task, status_code=status.HTTP_201_CREATED)
 def create_task(
@@ -42,7 +92,7 @@ def create_task(
 ):
     """Create a new task"""
     # Check column access
-    column = check_column_access(task.column_id, current_user.id, db)
+    access = check_column_access(task.column_id, current_user.id, db)
     
     # Validate assignee if provided
     if task.assignee_id:
@@ -54,9 +104,8 @@ def create_task(
             )
         
         # Optional: Check if assignee is a member of the project
-        board = db.query(models.Board).filter(models.Board.id == column.board_id).first()
         assignee_membership = db.query(models.ProjectMember).filter(
-            models.ProjectMember.project_id == board.project_id,
+            models.ProjectMember.project_id == access.project_id,
             models.ProjectMember.user_id == task.assignee_id
         ).first()
         
@@ -66,13 +115,17 @@ def create_task(
                 detail=f"User '{assignee.name or assignee.email}' is not a member of this project"
             )
     
+    rank = get_new_rank(task.column_id, db, task.before_task_id, task.after_task_id)
+    
     # Create the task
     new_task = models.Task(
         id=str(uuid.uuid4()),
         title=task.title,
         description=task.description,
         column_id=task.column_id,
-        position=task.position,
+        board_id=access.board_id,
+        project_id=access.project_id,
+        rank=rank,
         priority=task.priority,
         due_date=task.due_date,
         created_by_id=current_user.id,
@@ -80,36 +133,502 @@ def create_task(
     )
     
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    commit_write(
+        db,
+        current_user.id,
+        Write(
+            "task", "created", new_task.id, (access.board_id,), access.project_id, new_task,
+            {"title": new_task.title, "column_id": new_task.column_id}
+        ),
+        boards=[access.board_id],
+        ranks=[(task.column_id, rank)]
+    )
     
     return new_task
 
-@router.get("/column/{column_id}", response_model=List[schemas.Task])
-def get_column_tasks(
-    column_id: str,
+def batch_error(index: int, status_code: int, detail: str, task_id: Optional[str] = None) -> dict:
+    return {"index": index, "status_code": status_code, "id": task_id, "detail": detail}
+
+def column_error(column_id: str, column_access) -> Optional[tuple]:
+    """Helper function returning (status, detail) if a resolved column is missing or not accessible"""
+    if column_access is None:
+        return status.HTTP_404_NOT_FOUND, "Column not found"
+    if column_access.role is None:
+        return status.HTTP_403_FORBIDDEN, "You don't have access to this column"
+    return None
+
+def load_assignees(pairs: set, db: Session):
+    """Helper function loading assignees and their memberships for (project_id, assignee_id) pairs"""
+    assignee_ids = {assignee_id for _, assignee_id in pairs}
+    if not assignee_ids:
+        return {}, set()
+    
+    users = {
+        user.id: user
+        for user in db.query(models.User.id, models.User.name, models.User.email).filter(
+            models.User.id.in_(assignee_ids)
+        )
+    }
+    memberships = {
+        tuple(row)
+        for row in db.query(models.ProjectMember.project_id, models.ProjectMember.user_id).filter(
+            models.ProjectMember.user_id.in_(assignee_ids),
+            models.ProjectMember.project_id.in_({project_id for project_id, _ in pairs})
+        )
+    }
+    return users, memberships
+
+def assignee_error(assignee_id: str, project_id: str, users: dict, memberships: set) -> Optional[tuple]:
+    """Helper function returning (status, detail) if an assignee is unknown or not a project member"""
+    assignee = users.get(assignee_id)
+    if not assignee:
+        return status.HTTP_404_NOT_FOUND, f"User with id '{assignee_id}' not found"
+    if (project_id, assignee_id) not in memberships:
+        return status.HTTP_403_FORBIDDEN, f"User '{assignee.name or assignee.email}' is not a member of this project"
+    return None
+
+def last_ranks(column_ids: set, db: Session) -> dict:
+    """Helper function returning the highest rank in each column with one grouped query"""
+    if not column_ids:
+        return {}
+    return dict(
+        db.query(models.Task.column_id, func.max(models.Task.rank)).filter(
+            models.Task.column_id.in_(column_ids)
+        ).group_by(models.Task.column_id).all()
+    )
+
+def move_comments(task_projects: dict, db: Session):
+    """Helper function to carry comments over when their tasks move to another project"""
+    by_project = {}
+    for task_id, project_id in task_projects.items():
+        by_project.setdefault(project_id, set()).add(task_id)
+    for project_id, task_ids in by_project.items():
+        db.execute(
+            update(models.Comment).where(models.Comment.task_id.in_(task_ids)).values(project_id=project_id)
+        )
+
+@router.post("/create:batch", response_model=List[schemas.TaskBatchResult])
+def create_tasks_batch(
+    batch: schemas.TaskCreateBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Create many tasks in one transaction, appending them to their columns and reporting a result per item"""
+    columns = resolve_access_many("column", {task.column_id for task in batch.tasks}, current_user.id, db)
+    users, memberships = load_assignees({
+        (columns[task.column_id].project_id, task.assignee_id)
+        for task in batch.tasks
+        if task.assignee_id and task.column_id in columns
+    }, db)
+    ranks = last_ranks({column_id for column_id, access in columns.items() if access.role}, db)
+    
+    results = []
+    rows = []
+    for index, task in enumerate(batch.tasks):
+        error = column_error(task.column_id, columns.get(task.column_id))
+        if not error and (task.before_task_id or task.after_task_id):
+            error = status.HTTP_400_BAD_REQUEST, "before_task_id/after_task_id are not supported here, use /tasks/move:batch"
+        if not error and task.assignee_id:
+            error = assignee_error(task.assignee_id, columns[task.column_id].project_id, users, memberships)
+        if error:
+            results.append(batch_error(index, *error))
+            continue
+        
+        rank = rank_between(ranks.get(task.column_id), None)
+        ranks[task.column_id] = rank
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "title": task.title,
+            "description": task.description,
+            "column_id": task.column_id,
+            "board_id": columns[task.column_id].board_id,
+            "project_id": columns[task.column_id].project_id,
+            "rank": rank,
+            "priority": task.priority,
+            "due_date": task.due_date,
+            "created_by_id": current_user.id,
+            "assignee_id": task.assignee_id,
+        })
+        results.append({"index": index, "status_code": status.HTTP_201_CREATED, "id": rows[-1]["id"], "rank": rank})
+    
+    # One multi-row INSERT for every valid item
+    if rows:
+        db.execute(insert(models.Task), rows)
+    commit_write(
+        db,
+        current_user.id,
+        *[
+            Write(
+                "task", "created", row["id"], (row["board_id"],), row["project_id"], row,
+                {"title": row["title"], "column_id": row["column_id"]}
+            )
+            for row in rows
+        ],
+        boards={row["board_id"] for row in rows},
+        ranks=ranks.items()
+    )
+    
+    return results
+
+@router.post("/update:batch", response_model=List[schemas.TaskBatchResult])
+def update_tasks_batch(
+    batch: schemas.TaskUpdateBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Update many tasks in one transaction, reporting a result per item"""
+    current = dict(
+        db.query(models.Task.id, models.Task.column_id).filter(
+            models.Task.id.in_({task.id for task in batch.tasks})
+        ).all()
+    )
+    columns = resolve_access_many(
+        "column",
+        set(current.values()) | {task.column_id for task in batch.tasks if task.column_id},
+        current_user.id,
+        db
+    )
+    # Assignees are checked against the project a task ends up in, which changes when it moves
+    users, memberships = load_assignees({
+        (columns[column_id].project_id, task.assignee_id)
+        for task in batch.tasks
+        if task.assignee_id and task.id in current
+        for column_id in (current[task.id], task.column_id)
+        if column_id in columns
+    }, db)
+    ranks = last_ranks({
+        task.column_id
+        for task in batch.tasks
+        if task.column_id and task.id in current and task.column_id != current[task.id]
+    }, db)
+    
+    results = []
+    rows = []
+    moved = set()
+    changed_projects = {}  # task id -> new project id, for tasks moved to another project
+    old_projects = set()
+    events = []
+    for index, task in enumerate(batch.tasks):
+        if task.id not in current:
+            results.append(batch_error(index, status.HTTP_404_NOT_FOUND, "Task not found", task.id))
+            continue
+        
+        error = column_error(current[task.id], columns.get(current[task.id]))
+        if not error and task.column_id:
+            error = column_error(task.column_id, columns.get(task.column_id))
+        if not error and task.assignee_id:
+            error = assignee_error(task.assignee_id, columns[task.column_id or current[task.id]].project_id, users, memberships)
+        if error:
+            results.append(batch_error(index, *error, task_id=task.id))
+            continue
+        
+        # Same semantics as PUT /tasks/{id}: only fields that are provided change
+        values = {
+            field: getattr(task, field)
+            for field in ("title", "description", "priority", "due_date", "assignee_id")
+            if getattr(task, field) is not None
+        }
+        board_ids = [columns[current[task.id]].board_id]
+        if task.column_id and task.column_id != current[task.id]:
+            old_project_id = columns[current[task.id]].project_id
+            target = columns[task.column_id]
+            values["column_id"] = task.column_id
+            values["board_id"] = target.board_id
+            values["project_id"] = target.project_id
+            values["rank"] = ranks[task.column_id] = rank_between(ranks.get(task.column_id), None)
+            current[task.id] = task.column_id
+            board_ids.append(target.board_id)
+            moved.add(task.id)
+            if target.project_id != old_project_id:
+                changed_projects[task.id] = target.project_id
+                old_projects.add(old_project_id)
+        if values:
+            rows.append({"id": task.id, **values})
+            events.append(("moved" if "column_id" in values else "updated", rows[-1], board_ids))
+        results.append({"index": index, "status_code": status.HTTP_200_OK, "id": task.id, "rank": values.get("rank")})
+    
+    # Executemany UPDATE by primary key for every valid item
+    if rows:
+        db.execute(update(models.Task), rows)
+    move_comments(changed_projects, db)
+    commit_write(
+        db,
+        current_user.id,
+        *[
+            Write(
+                "task", action, data["id"], board_ids, columns[current[data["id"]]].project_id, data,
+                {"fields": sorted(data.keys() - {"id", "board_id", "project_id", "rank"}), "column_id": current[data["id"]]}
+            )
+            for action, data, board_ids in events
+        ],
+        boards={board_id for _, _, board_ids in events for board_id in board_ids},
+        tasks={row["id"] for row in rows},
+        forget=[*[("task", task_id) for task_id in moved], *[("project", project_id) for project_id in old_projects]],
+        ranks=ranks.items()
+    )
+    
+    return results
+
+@router.post("/delete:batch", response_model=List[schemas.TaskBatchResult])
+def delete_tasks_batch(
+    batch: schemas.TaskDeleteBatch,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
-    """Get all tasks in a column"""
+    """Delete many tasks in one transaction, reporting a result per item"""
+    current = dict(
+        db.query(models.Task.id, models.Task.column_id).filter(
+            models.Task.id.in_(set(batch.task_ids))
+        ).all()
+    )
+    columns = resolve_access_many("column", set(current.values()), current_user.id, db)
+    
+    results = []
+    deletable = set()
+    for index, task_id in enumerate(batch.task_ids):
+        if task_id not in current:
+            results.append(batch_error(index, status.HTTP_404_NOT_FOUND, "Task not found", task_id))
+            continue
+        
+        error = column_error(current[task_id], columns.get(current[task_id]))
+        if error:
+            results.append(batch_error(index, *error, task_id=task_id))
+            continue
+        
+        deletable.add(task_id)
+        results.append({"index": index, "status_code": status.HTTP_204_NO_CONTENT, "id": task_id})
+    
+    # Set-based DELETEs, children first so this doesn't depend on ON DELETE CASCADE being enforced
+    if deletable:
+        db.execute(delete(models.Comment).where(models.Comment.task_id.in_(deletable)))
+        db.execute(models.task_labels.delete().where(models.task_labels.c.task_id.in_(deletable)))
+        db.execute(delete(models.Task).where(models.Task.id.in_(deletable)))
+    commit_write(
+        db,
+        current_user.id,
+        *[
+            Write(
+                "task", "deleted", task_id, (columns[current[task_id]].board_id,), columns[current[task_id]].project_id,
+                {"id": task_id}
+            )
+            for task_id in deletable
+        ],
+        boards={columns[current[task_id]].board_id for task_id in deletable},
+        invalidate=[("task", task_id) for task_id in deletable],
+        forget=[("project", project_id) for project_id in {columns[current[task_id]].project_id for task_id in deletable}]
+    )
+    
+    return results
+
+@router.post("/move:batch", response_model=List[schemas.TaskPosition])
+def move_tasks_batch(
+    batch: schemas.TaskMoveBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Apply several task moves in one transaction (for multi-card drag-and-drop)"""
+    task_ids = {move.task_id for move in batch.moves}
+    tasks = {
+        task.id: task
+        for task in db.query(
+            models.Task.id, models.Task.column_id, models.Task.project_id
+        ).filter(models.Task.id.in_(task_ids))
+    }
+    
+    missing = task_ids - tasks.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task '{sorted(missing)[0]}' not found"
+        )
+    
+    # Check access once per distinct source/target column
+    target_columns = {move.column_id for move in batch.moves}
+    columns = {
+        column_id: check_column_access(column_id, current_user.id, db)
+        for column_id in target_columns | {task.column_id for task in tasks.values()}
+    }
+    
+    # Load the current order of every target column in one query (locked against rebalancing)
+    orders = {column_id: ([], []) for column_id in target_columns}  # column_id -> (ranks, task ids)
+    located = {}  # task id -> column_id, for tasks in a target column
+    for task_id, column_id, rank in db.query(
+        models.Task.id, models.Task.column_id, models.Task.rank
+    ).filter(
+        models.Task.column_id.in_(target_columns)
+    ).order_by(models.Task.rank, models.Task.id).with_for_update():
+        orders[column_id][0].append(rank)
+        orders[column_id][1].append(task_id)
+        located[task_id] = column_id
+    
+    def index_of(column_id: str, task_id: str) -> int:
+        if located.get(task_id) != column_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Task '{task_id}' is not in the target column"
+            )
+        return orders[column_id][1].index(task_id)
+    
+    # Apply moves in order so later moves can anchor on tasks moved earlier
+    changes = {}
+    for move in batch.moves:
+        old_column_id = located.pop(move.task_id, None)
+        if old_column_id is not None:
+            ranks, ids = orders[old_column_id]
+            i = ids.index(move.task_id)
+            del ranks[i], ids[i]
+        
+        ranks, ids = orders[move.column_id]
+        if move.after_task_id:
+            i = index_of(move.column_id, move.after_task_id) + 1
+        elif move.before_task_id:
+            i = index_of(move.column_id, move.before_task_id)
+        else:
+            i = len(ids)
+        if move.after_task_id and move.before_task_id and index_of(move.column_id, move.before_task_id) != i:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tasks '{move.after_task_id}' and '{move.before_task_id}' are not adjacent"
+            )
+        
+        try:
+            rank = rank_between(ranks[i - 1] if i > 0 else None, ranks[i] if i < len(ranks) else None)
+        except ValueError:
+            rebalancer.schedule(move.column_id)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Task order in this column is being rebuilt, please retry"
+            )
+        ranks.insert(i, rank)
+        ids.insert(i, move.task_id)
+        located[move.task_id] = move.column_id
+        changes[move.task_id] = {
+            "id": move.task_id,
+            "column_id": move.column_id,
+            "board_id": columns[move.column_id].board_id,
+            "project_id": columns[move.column_id].project_id,
+            "rank": rank,
+        }
+    
+    changed_projects = {
+        task_id: change["project_id"]
+        for task_id, change in changes.items()
+        if change["project_id"] != tasks[task_id].project_id
+    }
+    
+    # One executemany UPDATE for the whole batch
+    if changes:
+        db.execute(update(models.Task), list(changes.values()))
+    move_comments(changed_projects, db)
+    commit_write(
+        db,
+        current_user.id,
+        *[
+            Write(
+                "task", "moved", task_id, (columns[tasks[task_id].column_id].board_id, change["board_id"]), change["project_id"],
+                change, {"column_id": change["column_id"]}
+            )
+            for task_id, change in changes.items()
+        ],
+        boards={columns[tasks[task_id].column_id].board_id for task_id in changes} | {
+            change["board_id"] for change in changes.values()
+        },
+        tasks=changes.keys(),
+        forget=[
+            *[("task", task_id) for task_id, change in changes.items() if change["column_id"] != tasks[task_id].column_id],
+            *[("project", project_id) for project_id in {tasks[task_id].project_id for task_id in changed_projects}]
+        ],
+        ranks=[(change["column_id"], change["rank"]) for change in changes.values()]
+    )
+    
+    return list(changes.values())
+
+def load_column_tasks(column_id: str, cursor: Optional[str], limit: Optional[int], db: Session) -> dict:
+    """Helper function to load one page of a column's tasks"""
+    query = select_for(db, models.Task, schemas.Task).filter(models.Task.column_id == column_id)
+    tasks, next_cursor = paginate(query, [models.Task.rank, models.Task.id], cursor, limit)
+    return {"items": tasks, "next_cursor": next_cursor}
+
+@router.get("/column/{column_id}", response_model=schemas.Page[schemas.Task])
+async def get_column_tasks(
+    column_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: str = Header("identity"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Get the tasks in a column ordered by rank, one page at a time"""
     # Check column access
-    check_column_access(column_id, current_user.id, db)
+    access = await run_db(db, check_column_access, column_id, current_user.id)
+    media_type = negotiate_format(accept)
     
-    # Get all tasks ordered by position
-    tasks = db.query(models.Task).filter(
-        models.Task.column_id == column_id
-    ).order_by(models.Task.position).all()
+    # Serve repeat reads from the response cache (JSON only)
+    key = ("tasks", column_id, cursor, limit)
+    cached = response_cache.get(key) if media_type == JSON else None
+    if cached:
+        return send_cached(cached, if_none_match, accept_encoding)
+    started = response_cache.sequence()
     
-    return tasks
+    # Answer from the board version alone when the client is up to date
+    etag = make_etag(await run_db(db, board_version, access.board_id), "tasks", column_id, cursor, limit, media_type)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
+    # Get all tasks ordered by rank
+    page = await run_db(db, load_column_tasks, column_id, cursor, limit)
+    
+    # Serialise in the thread pool; other representations are streamed as they are encoded, not cached
+    if media_type != JSON:
+        return await run_in_threadpool(
+            send_formatted, schemas.Page[schemas.Task], page, media_type, accept_encoding, etag_headers(etag)
+        )
+    
+    return await run_in_threadpool(
+        cache_response, key, schemas.Page[schemas.Task], page, [("board", access.board_id)], started, etag, accept_encoding
+    )
+
+def load_task(task_id: str, db: Session):
+    """Helper function to load a task as a row or ORM object for its schema"""
+    return select_for(db, models.Task, schemas.Task).filter(models.Task.id == task_id).first()
 
 @router.get("/{task_id}", response_model=schemas.Task)
-def get_task(
+async def get_task(
     task_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
     """Get a specific task"""
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    # Check column access
+    await run_db(
+        db,
+        require_access,
+        "task",
+        task_id,
+        current_user.id,
+        forbidden_detail="You don't have access to this column"
+    )
+    
+    # Serve repeat reads from the response cache
+    key = ("task", task_id)
+    cached = response_cache.get(key)
+    if cached:
+        return send_cached(cached, if_none_match)
+    started = response_cache.sequence()
+    
+    # Answer from the version alone when the client is up to date
+    etag = make_etag(await run_db(db, task_version, task_id), "task", task_id)
+    cached = not_modified(if_none_match, response, etag)
+    if cached:
+        return cached
+    
+    task = await run_db(db, load_task, task_id)
     
     if not task:
         raise HTTPException(
@@ -117,15 +636,14 @@ def get_task(
             detail="Task not found"
         )
     
-    # Check column access
-    check_column_access(task.column_id, current_user.id, db)
-    
-    return task
+    # Serialise in the thread pool
+    return await run_in_threadpool(cache_response, key, schemas.Task, task, [("task", task_id)], started, etag)
 
 @router.put("/{task_id}", response_model=schemas.Task)
 def update_task(
     task_id: str,
     task_update: schemas.TaskUpdate,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -139,7 +657,9 @@ def update_task(
         )
     
     # Check column access
-    column = check_column_access(task.column_id, current_user.id, db)
+    access = check_column_access(task.column_id, current_user.id, db)
+    check_if_match(if_match, make_etag(task.version, "task", task_id))
+    old_column_id = task.column_id
     
     # Update task fields if provided
     if task_update.title is not None:
@@ -148,10 +668,15 @@ def update_task(
         task.description = task_update.description
     if task_update.column_id is not None:
         # Check access to new column too
-        check_column_access(task_update.column_id, current_user.id, db)
-        task.column_id = task_update.column_id
-    if task_update.position is not None:
-        task.position = task_update.position
+        target = check_column_access(task_update.column_id, current_user.id, db)
+        if task_update.column_id != task.column_id:
+            # Moving to another column appends the task to its end
+            task.rank = get_new_rank(task_update.column_id, db, moving_task_id=task.id)
+            task.column_id = task_update.column_id
+            task.board_id = target.board_id
+            task.project_id = target.project_id
+            if target.project_id != access.project_id:
+                move_comments({task.id: target.project_id}, db)
     if task_update.priority is not None:
         task.priority = task_update.priority
     if task_update.due_date is not None:
@@ -165,10 +690,9 @@ def update_task(
                 detail=f"User with id '{task_update.assignee_id}' not found"
             )
         
-        # Optional: Check if assignee is a member of the project
-        board = db.query(models.Board).filter(models.Board.id == column.board_id).first()
+        # Optional: Check if assignee is a member of the project (the new one if the task moved)
         assignee_membership = db.query(models.ProjectMember).filter(
-            models.ProjectMember.project_id == board.project_id,
+            models.ProjectMember.project_id == task.project_id,
             models.ProjectMember.user_id == task_update.assignee_id
         ).first()
         
@@ -180,14 +704,33 @@ def update_task(
         
         task.assignee_id = task_update.assignee_id
     
-    db.commit()
-    db.refresh(task)
+    commit_write(
+        db,
+        current_user.id,
+        Write(
+            "task",
+            "moved" if task.column_id != old_column_id else "updated",
+            task_id,
+            (access.board_id, task.board_id),
+            task.project_id,
+            task,
+            {"title": task.title, "column_id": task.column_id}
+        ),
+        boards=[access.board_id, task.board_id],
+        tasks=[task_id],
+        forget=[
+            *([("task", task_id)] if task_update.column_id is not None else []),
+            *([("project", access.project_id)] if task.project_id != access.project_id else [])
+        ],
+        ranks=[(task.column_id, task.rank)] if task_update.column_id is not None else []
+    )
     
     return task
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(
     task_id: str,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth_utils.get_current_user)
 ):
@@ -201,22 +744,32 @@ def delete_task(
         )
     
     # Check column access
-    check_column_access(task.column_id, current_user.id, db)
+    access = check_column_access(task.column_id, current_user.id, db)
+    check_if_match(if_match, make_etag(task.version, "task", task_id))
+    title = task.title
     
     db.delete(task)
-    db.commit()
+    commit_write(
+        db,
+        current_user.id,
+        Write("task", "deleted", task_id, (access.board_id,), access.project_id, {"id": task_id}, {"title": title}),
+        boards=[access.board_id],
+        invalidate=[("task", task_id)],
+        forget=[("project", access.project_id)]
+    )
     
     return None
 
-@router.post("/{task_id}/move", response_model=schemas.Task)
-def move_task(
+def relocate_task(
     task_id: str,
     new_column_id: str,
-    new_position: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth_utils.get_current_user)
-):
-    """Move a task to a different column or position (for drag-and-drop)"""
+    before_task_id: Optional[str],
+    after_task_id: Optional[str],
+    if_match: Optional[str],
+    user_id: str,
+    db: Session
+) -> schemas.Task:
+    """Helper function to move a task and commit the move"""
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
     
     if not task:
@@ -226,14 +779,41 @@ def move_task(
         )
     
     # Check access to both columns
-    check_column_access(task.column_id, current_user.id, db)
-    check_column_access(new_column_id, current_user.id, db)
+    access = check_column_access(task.column_id, user_id, db)
+    target = check_column_access(new_column_id, user_id, db)
+    check_if_match(if_match, make_etag(task.version, "task", task_id))
     
-    # Update task position and column
+    # Only this task's row changes; siblings keep their ranks
+    task.rank = get_new_rank(new_column_id, db, before_task_id, after_task_id, moving_task_id=task.id)
     task.column_id = new_column_id
-    task.position = new_position
-    
-    db.commit()
-    db.refresh(task)
+    task.board_id = target.board_id
+    task.project_id = target.project_id
+    if target.project_id != access.project_id:
+        move_comments({task.id: target.project_id}, db)
+    commit_write(
+        db,
+        user_id,
+        Write(
+            "task", "moved", task_id, (access.board_id, target.board_id), target.project_id, task,
+            {"title": task.title, "column_id": new_column_id}
+        ),
+        boards=[access.board_id, target.board_id],
+        tasks=[task_id],
+        forget=[("task", task_id), *([("project", access.project_id)] if target.project_id != access.project_id else [])],
+        ranks=[(new_column_id, task.rank)]
+    )
     
-    return task
\ No newline at end of file
+    return schemas.Task.model_validate(task)
+
+@router.post("/{task_id}/move", response_model=schemas.Task)
+async def move_task(
+    task_id: str,
+    new_column_id: str,
+    before_task_id: Optional[str] = None,
+    after_task_id: Optional[str] = None,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_utils.get_current_user)
+):
+    """Move a task before/after another task, or to the end of a column (for drag-and-drop)"""
+    return await run_db(db, relocate_task, task_id, new_column_id, before_task_id, after_task_id, if_match, current_user.id)
@@ -0,0 +1,79 @@
+"""Serve the routers' handlers in either DATABASE_MODE.
+
+Handlers are written against the sync Session API. FastAPI runs sync handlers
+in its thread pool (40 threads by default), each holding its thread and,
+through get_db, a pooled connection until it returns. That is how every sync
+handler runs in both modes.
+
+The hot reads (task, board, snapshot, column tasks) and the move path are
+async handlers. They call run_db for each piece of database work and hand
+serialisation and encoding to the thread pool. In async mode DatabaseRoute
+gives them the AsyncSession and user dependencies, so run_db awaits their
+statements on the event loop and no thread waits on the database; in sync
+mode run_db runs the same work in the thread pool.
+
+What runs on the event loop in async mode: cache lookups, ETag checks and the
+ORM's own row handling inside run_db (building objects from rows, flushes),
+plus the small bodies FastAPI encodes itself. Everything else stays off it.
+Async mode keeps both connection pools open: the async engine's for the async
+handlers and the sync engine's for the rest.
+"""
+from fastapi import Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from . import auth
+from .database import DATABASE_MODE, get_db, get_read_db, get_async_db, get_async_read_db
+import functools
+import inspect
+
+# Sync dependencies and the async counterparts that replace them for async handlers in async mode
+ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+    auth.get_current_user: auth.get_current_user_async,
+}
+
+def async_signature(endpoint) -> inspect.Signature:
+    """The endpoint's signature with its sync dependencies replaced by their async counterparts"""
+    signature = inspect.signature(endpoint)
+    parameters = []
+    for param in signature.parameters.values():
+        dependency = getattr(param.default, "dependency", None)
+        if dependency in ASYNC_DEPENDENCIES:
+            param = param.replace(
+                default=Depends(ASYNC_DEPENDENCIES[dependency], use_cache=param.default.use_cache)
+            )
+        parameters.append(param)
+    return signature.replace(parameters=parameters)
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call fn(*args, db=session, **kwargs) from an async endpoint
+
+    With an AsyncSession fn runs in the session's greenlet and its statements
+    are awaited on the event loop; with a Session it runs in the thread pool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(*args, db=session, **kwargs))
+    return await run_in_threadpool(fn, *args, db=db, **kwargs)
+
+def with_async_dependencies(endpoint):
+    """Wrap an async endpoint so it receives the async dependencies"""
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        return await endpoint(**kwargs)
+    
+    wrapper.__signature__ = async_signature(endpoint)
+    return wrapper
+
+class DatabaseRoute(APIRoute):
+    """APIRoute that serves async handlers from an AsyncSession when DATABASE_MODE=async
+
+    Sync handlers keep their sync Session and run in the thread pool, so their
+    validation, serialisation and encoding never block the event loop.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if DATABASE_MODE == "async" and inspect.iscoroutinefunction(endpoint):
+            endpoint = with_async_dependencies(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -1,6 +1,13 @@
 from pydantic import BaseModel,EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# One page of a list endpoint; pass next_cursor back as ?cursor= for the next page
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
 
 #User schemas
 class UserBase(BaseModel):
@@ -38,6 +45,33 @@ class Project(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectImportResult(BaseModel):
+    project_id: str
+    rows: Dict[str, int]
+    total_rows: int
+    seconds: float
+    rows_per_second: float
+
+class Activity(BaseModel):
+    id: str
+    project_id: str
+    user_id: str
+    action: str
+    entity_type: str
+    entity_id: str
+    details: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    class Config:
+        from_attributes = True
+
+class SearchResult(BaseModel):
+    type: str
+    id: str
+    task_id: str
+    task_title: str
+    snippet: str
+    score: float
+
 #Board schemas
 
 class BoardBase(BaseModel):
@@ -72,6 +106,18 @@ class BoardColumn(BoardColumnBase):
     class Config:
         from_attributes = True
 
+class ColumnMove(BaseModel):
+    column_id: str
+    position: int
+
+class ColumnReorder(BaseModel):
+    columns: List[ColumnMove]
+
+class ColumnPosition(BaseModel):
+    id: str
+    board_id: str
+    position: int
+
 #Task schemas
 
 class TaskBase(BaseModel):
@@ -82,14 +128,14 @@ class TaskBase(BaseModel):
 
 class TaskCreate(TaskBase):
     column_id: str
-    position: int
+    before_task_id: Optional[str] = None  # place the new task directly before this task
+    after_task_id: Optional[str] = None  # place the new task directly after this task
     assignee_id: Optional[str] = None
 
 class TaskUpdate(TaskBase):
     title: Optional[str] = None
     description: Optional[str] = None
     column_id: Optional[str] = None
-    position: Optional[int] = None
     priority: Optional[str] = None
     due_date: Optional[datetime] = None
     assignee_id: Optional[str] = None
@@ -97,13 +143,46 @@ class TaskUpdate(TaskBase):
 class Task(TaskBase):
     id: str
     column_id: str
-    position: int
+    rank: str
     assignee_id: Optional[str] = None
     created_at: datetime
     created_by_id: str
     class Config:
         from_attributes = True
 
+class TaskMove(BaseModel):
+    task_id: str
+    column_id: str
+    before_task_id: Optional[str] = None
+    after_task_id: Optional[str] = None
+
+class TaskMoveBatch(BaseModel):
+    moves: List[TaskMove]
+
+class TaskPosition(BaseModel):
+    id: str
+    column_id: str
+    rank: str
+
+class TaskCreateBatch(BaseModel):
+    tasks: List[TaskCreate]
+
+class TaskBatchUpdate(TaskUpdate):
+    id: str
+
+class TaskUpdateBatch(BaseModel):
+    tasks: List[TaskBatchUpdate]
+
+class TaskDeleteBatch(BaseModel):
+    task_ids: List[str]
+
+class TaskBatchResult(BaseModel):
+    index: int
+    status_code: int
+    id: Optional[str] = None
+    rank: Optional[str] = None
+    detail: Optional[str] = None
+
 
 #comment schemas
 
@@ -123,4 +202,38 @@ class Comment(CommentBase):
         from_attributes = True
 
 
+#Label schemas
+
+class Label(BaseModel):
+    id: str
+    name: str
+    color: str
+    class Config:
+        from_attributes = True
+
+
+#Board snapshot schemas
+
+class TaskWithDetails(Task):
+    assignee: Optional[User] = None
+    labels: List[Label] = []
+
+class BoardColumnWithTasks(BoardColumn):
+    tasks: List[TaskWithDetails] = []
+
+class BoardSnapshot(Board):
+    project_id: str
+    columns: List[BoardColumnWithTasks] = []
+
+
+#Delta sync schemas
 
+class BoardChanges(BaseModel):
+    since: Optional[int] = None
+    next_since: int
+    has_more: bool = False
+    board: Optional[Board] = None
+    columns: List[BoardColumn] = []
+    tasks: List[Task] = []
+    comments: List[Comment] = []
+    deleted: Dict[str, List[str]] = {}  # "boards" / "columns" / "tasks" / "comments" -> ids
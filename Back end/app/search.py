@@ -0,0 +1,135 @@
+"""Full-text search over task titles, descriptions and comments in a project.
+
+PostgreSQL matches against the generated search_vector columns (GIN indexed)
+and ranks with ts_rank; SQLite matches against the search_index FTS5 table and
+ranks with bm25. Both indexes are maintained by the database on every write,
+see migrations/versions/0004_full_text_search.py. Results are ordered by
+(score DESC, type, id) and paginated with the same opaque cursors as the list
+endpoints.
+"""
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .pagination import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, decode_cursor, encode_cursor
+import html
+import re
+
+# Text search configuration used by the PostgreSQL search_vector columns
+SEARCH_CONFIG = "english"
+
+# Sort columns of a search result, in cursor order
+SEARCH_ORDER = ["score", "type", "id"]
+
+# The database marks matches with these control characters; they are swapped for
+# <mark> tags after the snippet is HTML-escaped, so document text is never markup
+MATCH_START = "\x02"
+MATCH_STOP = "\x03"
+
+# Rows after the cursor in (score DESC, type, id) order. Scores must be float8 on
+# both sides: ts_rank returns real, which never equals the double the cursor holds
+KEYSET_FILTER = "WHERE score < :score OR (score = :score AND (type > :type OR (type = :type AND id > :id)))"
+
+POSTGRES_SEARCH = f"""
+WITH query AS (
+    SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS tsq
+),
+matches AS (
+    SELECT 'task' AS type, tasks.id AS id, tasks.id AS task_id, tasks.title AS task_title,
+           ts_rank(tasks.search_vector, query.tsq)::float8 AS score
+    FROM tasks, query
+    WHERE tasks.project_id = :project_id AND tasks.search_vector @@ query.tsq
+    UNION ALL
+    SELECT 'comment', comments.id, comments.task_id, tasks.title,
+           ts_rank(comments.search_vector, query.tsq)::float8
+    FROM comments JOIN tasks ON tasks.id = comments.task_id, query
+    WHERE comments.project_id = :project_id AND comments.search_vector @@ query.tsq
+),
+page AS (
+    SELECT * FROM matches {{keyset}}
+    ORDER BY score DESC, type, id
+    LIMIT :limit
+)
+SELECT page.type, page.id, page.task_id, page.task_title, page.score,
+       ts_headline(
+           '{SEARCH_CONFIG}',
+           CASE WHEN page.type = 'task'
+                THEN tasks.title || ' ' || coalesce(tasks.description, '')
+                ELSE comments.content END,
+           query.tsq,
+           'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=32, MinWords=12'
+       ) AS snippet
+FROM page
+CROSS JOIN query
+LEFT JOIN tasks ON page.type = 'task' AND tasks.id = page.id
+LEFT JOIN comments ON page.type = 'comment' AND comments.id = page.id
+ORDER BY page.score DESC, page.type, page.id
+"""
+
+# Title matches count ten times as much as body matches; task_id and project_id are not indexed
+SQLITE_SEARCH = """
+WITH matches AS (
+    SELECT search_keys.entity_type AS type, search_keys.entity_id AS id, search_index.task_id AS task_id,
+           tasks.title AS task_title,
+           -bm25(search_index, 0, 0, 10, 1) AS score,
+           snippet(search_index, -1, char(2), char(3), '…', 16) AS snippet
+    FROM search_index
+    JOIN search_keys ON search_keys.id = search_index.rowid
+    JOIN tasks ON tasks.id = search_index.task_id
+    WHERE search_index MATCH :q AND search_index.project_id = :project_id
+)
+SELECT * FROM matches {keyset}
+ORDER BY score DESC, type, id
+LIMIT :limit
+"""
+
+def fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching every word, with no operators"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet and wrap its matches in <mark> tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MATCH_START, "<mark>").replace(MATCH_STOP, "</mark>")
+
+def search_project(project_id: str, q: str, cursor: Optional[str], limit: Optional[int], db: Session) -> Tuple[List[dict], Optional[str]]:
+    """Return one page of tasks and comments in a project matching q, best first"""
+    limit = min(limit or PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT)
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        sql, query = POSTGRES_SEARCH, q
+    elif dialect == "sqlite":
+        sql, query = SQLITE_SEARCH, fts5_query(q)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Search is not available on {dialect}"
+        )
+
+    if not re.search(r"\w", q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+
+    params = {"q": query, "project_id": project_id, "limit": limit + 1}
+    keyset = ""
+    if cursor is not None:
+        score, type_, id_ = decode_cursor(cursor, SEARCH_ORDER)
+        if not isinstance(score, (int, float)) or not isinstance(type_, str) or not isinstance(id_, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        params.update(score=score, type=type_, id=id_)
+        keyset = KEYSET_FILTER
+
+    rows = db.execute(text(sql.replace("{keyset}", keyset)), params).mappings().all()
+    items = [{**row, "score": float(row["score"]), "snippet": highlight(row["snippet"])} for row in rows[:limit]]
+
+    # One extra row tells us whether there is a next page
+    if len(rows) <= limit:
+        return items, None
+    last = rows[limit - 1]
+    return items, encode_cursor([float(last["score"]), last["type"], last["id"]])
@@ -0,0 +1,319 @@
+"""Wire formats and compression for the bulk read endpoints.
+
+The board snapshot, column task lists and project export pick their
+representation from the Accept header:
+
+  application/json                          rows as objects (the default)
+  application/vnd.project-mgmt.columnar+json every list of objects as one array per field
+  application/msgpack                       rows as MessagePack maps (needs msgpack installed)
+
+Bodies are compressed with brotli (when installed) or gzip, as allowed by
+Accept-Encoding, once they reach COMPRESSION_MIN_BYTES. Conversion to JSON
+types, encoding and compression happen chunk by chunk while the response is
+sent, a batch of list items at a time, so a large list is never held as one
+converted structure or one encoded buffer. The loaded rows (and, for ORM
+objects, their validated response models) are still all in memory; the
+columnar representation converts the whole content first, since it
+transposes each list.
+"""
+from typing import Iterable, Iterator, Optional
+from starlette.responses import Response, StreamingResponse
+from .serialization import encode_json, fields_of, prepare, to_jsonable
+import itertools
+import os
+import zlib
+from dotenv import load_dotenv
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+# List items encoded together, and the size chunks are sent in
+STREAM_BATCH_ITEMS = int(os.getenv("STREAM_BATCH_ITEMS", 500))
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", 64 * 1024))
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.project-mgmt.columnar+json"
+MSGPACK = "application/msgpack"
+
+# Accept media type -> the representation it selects, for the formats this server can produce
+FORMATS = {JSON: JSON, "application/*": JSON, "*/*": JSON, COLUMNAR_JSON: COLUMNAR_JSON}
+if msgpack is not None:
+    FORMATS.update({MSGPACK: MSGPACK, "application/x-msgpack": MSGPACK})
+
+# Content codings in order of preference
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+VARY = "Accept, Accept-Encoding"
+
+def parse_accept(header: Optional[str]) -> list:
+    """(value, q) pairs of an Accept or Accept-Encoding header, in header order"""
+    pairs = []
+    for part in (header or "").split(","):
+        value, *params = [piece.strip() for piece in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        pairs.append((value.lower(), q))
+    return pairs
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """The representation the client prefers among those available, JSON when none fits"""
+    best, best_q = JSON, 0.0
+    for media_type, q in parse_accept(accept):
+        if media_type in FORMATS and q > best_q:
+            best, best_q = FORMATS[media_type], q
+    return best
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred content coding the client accepts, or None for identity"""
+    accepted = {coding: q for coding, q in parse_accept(accept_encoding)}
+    for coding in ENCODINGS:
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+def to_columnar(value):
+    """Turn every list of objects into one object of per-field arrays (empty lists stay [])"""
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        columns = {}
+        for key in value[0]:
+            column = [item[key] for item in value]
+            if any(isinstance(cell, (dict, list)) for cell in column):
+                column = [to_columnar(cell) for cell in column]
+            columns[key] = column
+        return columns
+    return value
+
+class JsonWriter:
+    def map_start(self, size: int) -> bytes:
+        return b"{"
+
+    def map_key(self, key: str, index: int) -> bytes:
+        return (b"," if index else b"") + encode_json(key) + b":"
+
+    def map_end(self) -> bytes:
+        return b"}"
+
+    def array_start(self, size: int) -> bytes:
+        return b"["
+
+    def array_items(self, items: list, written: int) -> bytes:
+        return (b"," if written else b"") + encode_json(items)[1:-1]
+
+    def separator(self, written: int) -> bytes:
+        return b"," if written else b""
+
+    def array_end(self) -> bytes:
+        return b"]"
+
+    def value(self, value) -> bytes:
+        return encode_json(value)
+
+class MsgpackWriter:
+    def __init__(self):
+        self.packer = msgpack.Packer()
+
+    def map_start(self, size: int) -> bytes:
+        return self.packer.pack_map_header(size)
+
+    def map_key(self, key: str, index: int) -> bytes:
+        return self.packer.pack(key)
+
+    def map_end(self) -> bytes:
+        return b""
+
+    def array_start(self, size: int) -> bytes:
+        return self.packer.pack_array_header(size)
+
+    def array_items(self, items: list, written: int) -> bytes:
+        return b"".join(self.packer.pack(item) for item in items)
+
+    def separator(self, written: int) -> bytes:
+        return b""
+
+    def array_end(self) -> bytes:
+        return b""
+
+    def value(self, value) -> bytes:
+        return self.packer.pack(value)
+
+def _nested_size(item) -> int:
+    fields = fields_of(item)
+    if fields is not None:
+        return sum(len(value) for value in fields.values() if isinstance(value, (dict, list)))
+    return len(item) if isinstance(item, list) else 0
+
+def _batches(items: list) -> Iterator[tuple]:
+    """Split list items into (batch, False) runs, with large nested items alone as (item, True)"""
+    if not items or (fields_of(items[0]) is None and not isinstance(items[0], list)):
+        for start in range(0, len(items), STREAM_BATCH_ITEMS):
+            yield items[start:start + STREAM_BATCH_ITEMS], False
+        return
+
+    batch = []
+    for item in items:
+        if _nested_size(item) > STREAM_BATCH_ITEMS:
+            if batch:
+                yield batch, False
+                batch = []
+            yield item, True
+            continue
+        batch.append(item)
+        if len(batch) >= STREAM_BATCH_ITEMS:
+            yield batch, False
+            batch = []
+    if batch:
+        yield batch, False
+
+def _pieces(value, writer) -> Iterator[bytes]:
+    fields = fields_of(value)
+    if fields is not None:
+        yield writer.map_start(len(fields))
+        for index, (key, item) in enumerate(fields.items()):
+            yield writer.map_key(key, index)
+            yield from _pieces(item, writer)
+        yield writer.map_end()
+    elif isinstance(value, list):
+        yield writer.array_start(len(value))
+        written = 0
+        for batch, alone in _batches(value):
+            if alone:
+                yield writer.separator(written)
+                yield from _pieces(batch, writer)
+                written += 1
+            else:
+                yield writer.array_items(to_jsonable(batch), written)
+                written += len(batch)
+        yield writer.array_end()
+    else:
+        yield writer.value(to_jsonable(value))
+
+def coalesce(pieces: Iterable[bytes], size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Join small pieces into chunks of at least size bytes"""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield b"".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+def iter_encoded(value, media_type: str) -> Iterator[bytes]:
+    """Encode prepared content in the given representation, in chunks, converting a batch at a time"""
+    if media_type == COLUMNAR_JSON:
+        value = to_columnar(to_jsonable(value))
+    writer = MsgpackWriter() if media_type == MSGPACK else JsonWriter()
+    return coalesce(_pieces(value, writer))
+
+def compress(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a stream of chunks with brotli or gzip"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            output = compressor.process(chunk)
+            if output:
+                yield output
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        if output:
+            yield output
+    yield compressor.flush()
+
+def _encode_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator:
+    """Yield the content coding to use (or None), then the body
+
+    The body is only compressed once it reaches COMPRESSION_MIN_BYTES, so the
+    first chunks are read before deciding.
+    """
+    chunks = iter(chunks)
+    head, size = [], 0
+    if encoding is not None:
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= COMPRESSION_MIN_BYTES:
+                break
+
+    if encoding is None or size < COMPRESSION_MIN_BYTES:
+        yield None
+        yield from head
+        yield from chunks
+        return
+
+    yield encoding
+    yield from compress(itertools.chain(head, chunks), encoding)
+
+class EncodedStreamingResponse(StreamingResponse):
+    """A streaming response whose Content-Encoding is the first item of its body"""
+
+    async def stream_response(self, send):
+        encoding = await self.body_iterator.__anext__()
+        if encoding is not None:
+            self.headers["Content-Encoding"] = encoding
+            # The compressed bytes differ, so the validator can only be weak
+            etag = self.headers.get("ETag")
+            if etag and not etag.startswith("W/"):
+                self.headers["ETag"] = "W/" + etag
+        await super().stream_response(send)
+
+def stream_response(
+    chunks: Iterable[bytes],
+    media_type: str,
+    accept_encoding: Optional[str],
+    headers: Optional[dict] = None
+) -> Response:
+    """Stream chunks, compressed when the client accepts it and the body is large enough"""
+    return EncodedStreamingResponse(
+        _encode_stream(chunks, negotiate_encoding(accept_encoding)),
+        media_type=media_type,
+        headers={**(headers or {}), "Vary": VARY}
+    )
+
+def send_body(body: bytes, media_type: str, accept_encoding: Optional[str], headers: Optional[dict] = None) -> Response:
+    """Send an encoded body, compressing it in chunks when it is large enough"""
+    if len(body) < COMPRESSION_MIN_BYTES or negotiate_encoding(accept_encoding) is None:
+        return Response(content=body, media_type=media_type, headers={**(headers or {}), "Vary": VARY})
+    chunks = (body[start:start + STREAM_CHUNK_BYTES] for start in range(0, len(body), STREAM_CHUNK_BYTES))
+    return stream_response(chunks, media_type, accept_encoding, headers)
+
+def send_formatted(
+    response_model,
+    content,
+    media_type: str,
+    accept_encoding: Optional[str],
+    headers: Optional[dict] = None
+) -> Response:
+    """Stream a response in a negotiated representation other than cached JSON
+
+    Rows are converted and encoded a batch at a time as the body is sent.
+    """
+    data = prepare(response_model, content)
+    return stream_response(iter_encoded(data, media_type), media_type, accept_encoding, headers)
@@ -0,0 +1,87 @@
+"""Commit a write together with everything that follows from it.
+
+Write handlers change rows, describe each entity they wrote as a Write and
+hand them to commit_write, which runs the same sequence for every endpoint:
+
+  before the commit   bump the board/task versions (ETags and response cache),
+                      register extra response-cache tags and log each write
+                      to its boards' change feeds
+  the commit
+  after the commit    drop cached access for moved or deleted entities,
+                      schedule rebalancing of columns whose rank keys grew too
+                      long, publish each write to its boards' event streams
+                      and add it to the project's activity feed
+
+Side effects only happen after the commit succeeds, so a failed write
+publishes nothing.
+"""
+from collections import namedtuple
+from typing import Iterable, Optional, Tuple
+from sqlalchemy.orm import Session
+from . import schemas
+from .access import invalidate_entity, invalidate_project
+from .activity import record_activity
+from .cache import invalidate_on_commit
+from .changes import record_change
+from .database import Base
+from .etags import bump_versions
+from .events import publish_event
+from .ranking import needs_rebalance, rebalancer
+
+# One entity a request wrote. board_ids: the boards it was and is on (change feed
+# and events); project_id: the project whose activity feed records it (None: not
+# recorded); data: the event payload (None: no event), either a dict or the ORM
+# row, which is refreshed and serialised after the commit; details: activity details
+Write = namedtuple(
+    "Write",
+    ["entity", "action", "entity_id", "board_ids", "project_id", "data", "details"],
+    defaults=[(), None, None, None]
+)
+
+# Entity type -> schema an ORM row is published as
+EVENT_SCHEMAS = {
+    "board": schemas.Board,
+    "column": schemas.BoardColumn,
+    "task": schemas.Task,
+    "comment": schemas.Comment,
+}
+
+def commit_write(
+    db: Session,
+    user_id: Optional[str],
+    *writes: Write,
+    boards: Iterable[Optional[str]] = (),
+    tasks: Iterable[Optional[str]] = (),
+    invalidate: Iterable[tuple] = (),
+    forget: Iterable[Tuple[str, str]] = (),
+    ranks: Iterable[Tuple[str, str]] = ()
+):
+    """Commit db with the side effects of writes
+
+    boards/tasks: version counters to bump; invalidate: further response-cache
+    tags; forget: (entity type, id) access-cache entries to drop; ranks:
+    (column id, rank) pairs to check for rebalancing.
+    """
+    bump_versions(db, board_ids=boards, task_ids=tasks)
+    invalidate_on_commit(db, *invalidate)
+    for write in writes:
+        record_change(db, write.entity, write.action, write.entity_id, *write.board_ids)
+    db.commit()
+
+    for entity_type, entity_id in forget:
+        if entity_type == "project":
+            invalidate_project(entity_id)
+        else:
+            invalidate_entity(entity_type, entity_id)
+    for column_id, rank in ranks:
+        if needs_rebalance(rank):
+            rebalancer.schedule(column_id)
+    for write in writes:
+        data = write.data
+        if isinstance(data, Base):
+            db.refresh(data)
+            data = EVENT_SCHEMAS[write.entity].model_validate(data)
+        if data is not None:
+            publish_event(write.entity, write.action, data, *write.board_ids)
+        if write.project_id:
+            record_activity(write.project_id, user_id, write.action, write.entity, write.entity_id, write.details)
@@ -0,0 +1,16 @@
+"""Benchmarks for the API, run from "Back end" as modules against DATABASE_URL.
+
+  dataset        bulk-generate users, projects, boards, tasks and comments at a scale profile
+  workload       replay an endpoint mix in process or over HTTP and report per-endpoint latency as JSON
+  compare        compare a workload report against a saved baseline
+  serialization  time the default and fast serialisation paths
+
+A typical run against a fresh database, SQLite or PostgreSQL alike:
+
+    export DATABASE_URL=postgresql://localhost/bench
+    alembic upgrade head
+    python -m benchmarks.dataset --profile small
+    python -m benchmarks.workload --profile small --output baseline.json
+    # ...change something, then
+    python -m benchmarks.workload --profile small --baseline baseline.json
+"""
@@ -0,0 +1,66 @@
+"""Compare a benchmarks.workload report against a saved baseline.
+
+For every operation in both reports, throughput and p50/p95/p99 latency are
+compared as ratios and the error rate as a difference. A change worse than
+--tolerance (a fraction, 0.1 = 10%) is a regression, as is an error rate
+more than --tolerance / 10 higher. Run from "Back end":
+
+    python -m benchmarks.compare baseline.json results.json --tolerance 0.15
+
+Exits with status 1 if anything regressed. Runs are only comparable on the
+same machine, dataset profile, database and settings.
+"""
+import argparse
+import json
+import sys
+
+TOLERANCE = 0.1
+
+# Metric -> True when higher is better
+METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+def compare(baseline: dict, current: dict, tolerance: float = TOLERANCE) -> tuple:
+    """Rows of (operation, metric, baseline, current, change, regressed) and the number of regressions"""
+    rows = []
+    sections = {**baseline["operations"], "total": baseline["total"]}
+    for operation, before in sections.items():
+        after = current["operations"].get(operation) if operation != "total" else current["total"]
+        if not after or not before["requests"] or not after["requests"]:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if not before[metric]:
+                continue
+            change = after[metric] / before[metric] - 1
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append((operation, metric, before[metric], after[metric], change, regressed))
+        change = after["error_rate"] - before["error_rate"]
+        rows.append((operation, "error_rate", before["error_rate"], after["error_rate"], change, change > tolerance / 10))
+    return rows, sum(row[-1] for row in rows)
+
+def print_comparison(rows: list):
+    print(f"  {'operation':<12} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for operation, metric, before, after, change, regressed in rows:
+        change = f"{change:+.3f}" if metric == "error_rate" else f"{change:+.1%}"
+        print(
+            f"  {operation:<12} {metric:<15} {before:>10.2f} {after:>10.2f} {change:>8}{'  REGRESSED' if regressed else ''}",
+            file=sys.stderr
+        )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.tolerance)
+    print_comparison(rows)
+    print(f"{regressions} regression{'s' if regressions != 1 else ''} beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
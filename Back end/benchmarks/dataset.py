@@ -0,0 +1,225 @@
+"""Generate a synthetic dataset at one of the scale profiles.
+
+Bulk-inserts users, projects and their members, boards, columns, tasks and
+comments through the models, CHUNK_SIZE rows per INSERT and one commit per
+chunk, so even the large profile streams in constant memory. Ids are derived
+from a per-run namespace and each row's index, so tasks and comments find
+their parents by arithmetic instead of lookups:
+
+  project p    members are users (p * members + j) % users, j = 0 is the owner
+  columns      spread round-robin over boards, boards over projects
+  task t       in column t % columns, created by a member of that project,
+               every other one assigned, ranked evenly within its column
+  comment c    on task c % tasks, by a member of the task's project
+
+Every user is bench-<i>@bench.example.com with password BENCH_PASSWORD, which
+is how benchmarks.workload logs in. Generate into an empty, migrated database
+(SQLite or PostgreSQL, from DATABASE_URL); run from "Back end":
+
+    python -m benchmarks.dataset --profile small
+    python -m benchmarks.dataset --profile large --tasks 2000000
+
+Any profile setting can be overridden with its own option.
+"""
+from typing import Callable, Iterator, NamedTuple
+from sqlalchemy import insert
+from app import auth, models
+from app.database import SessionLocal, engine
+from app.hashing import hashing_pool
+from app.ranking import evenly_spaced_ranks
+import argparse
+import itertools
+import math
+import sys
+import time
+import uuid
+
+BENCH_PASSWORD = "bench-password"
+CHUNK_SIZE = 5000
+
+class Profile(NamedTuple):
+    users: int
+    projects: int
+    members_per_project: int
+    boards_per_project: int
+    columns_per_board: int
+    tasks: int
+    comments: int
+
+PROFILES = {
+    "tiny": Profile(users=20, projects=5, members_per_project=4, boards_per_project=2, columns_per_board=4, tasks=400, comments=1000),
+    "small": Profile(users=1000, projects=100, members_per_project=10, boards_per_project=10, columns_per_board=4, tasks=20_000, comments=50_000),
+    "medium": Profile(users=5000, projects=500, members_per_project=10, boards_per_project=20, columns_per_board=4, tasks=200_000, comments=1_000_000),
+    "large": Profile(users=10_000, projects=1000, members_per_project=10, boards_per_project=100, columns_per_board=4, tasks=1_000_000, comments=5_000_000),
+}
+
+def bench_email(index: int) -> str:
+    return f"bench-{index}@bench.example.com"
+
+def active_users(profile: Profile) -> int:
+    """Users 0..n-1 are members of at least one project"""
+    return min(profile.users, profile.projects * profile.members_per_project)
+
+class Dataset:
+    """Row generators for one profile; ids come from a fresh namespace per run"""
+
+    def __init__(self, profile: Profile, password_hash: str):
+        self.profile = profile
+        self.password_hash = password_hash
+        self.namespace = uuid.uuid4()
+        self.boards = profile.projects * profile.boards_per_project
+        self.columns = self.boards * profile.columns_per_board
+        # Every column holds tasks // columns tasks or one more
+        self.ranks = evenly_spaced_ranks(math.ceil(profile.tasks / self.columns)) if self.columns else []
+
+    def id(self, kind: str, index: int) -> str:
+        return str(uuid.uuid5(self.namespace, f"{kind}:{index}"))
+
+    def member(self, project: int, slot: int) -> int:
+        """User index of a project's member; slot wraps round the members"""
+        members = self.profile.members_per_project
+        return (project * members + slot % members) % self.profile.users
+
+    def task_project(self, task: int) -> int:
+        return task % self.columns // self.profile.columns_per_board // self.profile.boards_per_project
+
+    def users(self) -> Iterator[dict]:
+        for i in range(self.profile.users):
+            yield {"id": self.id("user", i), "email": bench_email(i), "name": f"Bench user {i}", "hashed_password": self.password_hash}
+
+    def projects(self) -> Iterator[dict]:
+        for p in range(self.profile.projects):
+            yield {"id": self.id("project", p), "name": f"Bench project {p}", "description": "Generated for benchmarks"}
+
+    def project_members(self) -> Iterator[dict]:
+        for p in range(self.profile.projects):
+            # A small user base can hand a project the same user twice
+            users = dict.fromkeys(self.member(p, j) for j in range(self.profile.members_per_project))
+            for j, user in enumerate(users):
+                yield {
+                    "id": self.id("member", p * self.profile.members_per_project + j),
+                    "role": "owner" if j == 0 else "member",
+                    "user_id": self.id("user", user),
+                    "project_id": self.id("project", p),
+                }
+
+    def board_rows(self) -> Iterator[dict]:
+        for b in range(self.boards):
+            yield {
+                "id": self.id("board", b),
+                "name": f"Board {b % self.profile.boards_per_project}",
+                "project_id": self.id("project", b // self.profile.boards_per_project),
+                "position": b % self.profile.boards_per_project,
+            }
+
+    def column_rows(self) -> Iterator[dict]:
+        for c in range(self.columns):
+            yield {
+                "id": self.id("column", c),
+                "name": f"Column {c % self.profile.columns_per_board}",
+                "board_id": self.id("board", c // self.profile.columns_per_board),
+                "position": c % self.profile.columns_per_board,
+            }
+
+    def tasks(self) -> Iterator[dict]:
+        for t in range(self.profile.tasks):
+            column = t % self.columns
+            project = self.task_project(t)
+            yield {
+                "id": self.id("task", t),
+                "title": f"Task {t}",
+                "description": f"Generated task {t} for benchmarks",
+                "column_id": self.id("column", column),
+                "board_id": self.id("board", column // self.profile.columns_per_board),
+                "project_id": self.id("project", project),
+                "rank": self.ranks[t // self.columns],
+                "priority": ("low", "medium", "high")[t % 3],
+                "created_by_id": self.id("user", self.member(project, t)),
+                "assignee_id": self.id("user", self.member(project, t + 1)) if t % 2 else None,
+            }
+
+    def comments(self) -> Iterator[dict]:
+        for c in range(self.profile.comments):
+            task = c % self.profile.tasks
+            project = self.task_project(task)
+            yield {
+                "id": self.id("comment", c),
+                "content": f"Generated comment {c} on task {task}",
+                "task_id": self.id("task", task),
+                "project_id": self.id("project", project),
+                "user_id": self.id("user", self.member(project, c)),
+            }
+
+def chunks(rows: Iterator[dict], size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def load(model, rows: Callable[[], Iterator[dict]], total: int, chunk_size: int) -> float:
+    """Insert rows in chunks, committing each, and return the seconds taken"""
+    started = time.perf_counter()
+    written = 0
+    db = SessionLocal()
+    try:
+        for chunk in chunks(rows(), chunk_size):
+            db.execute(insert(model), chunk)
+            db.commit()
+            written += len(chunk)
+            print(f"\r  {model.__tablename__:<16} {written:>10}/{total}", end="", file=sys.stderr, flush=True)
+    finally:
+        db.close()
+    seconds = time.perf_counter() - started
+    print(f"\r  {model.__tablename__:<16} {written:>10} rows {seconds:8.1f} s {written / seconds if seconds else 0:10.0f} rows/s", file=sys.stderr)
+    return seconds
+
+def generate(profile: Profile, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Insert a whole profile and return the seconds spent on each table"""
+    if profile.projects < 1 or profile.boards_per_project < 1 or profile.columns_per_board < 1 or profile.members_per_project < 1:
+        raise ValueError("A profile needs at least one project, board, column and member")
+    if profile.comments and not profile.tasks:
+        raise ValueError("Comments need tasks")
+
+    dataset = Dataset(profile, auth.get_password_hash(BENCH_PASSWORD))
+    tables = [
+        (models.User, dataset.users, profile.users),
+        (models.Project, dataset.projects, profile.projects),
+        (models.ProjectMember, dataset.project_members, profile.projects * profile.members_per_project),
+        (models.Board, dataset.board_rows, dataset.boards),
+        (models.BoardColumn, dataset.column_rows, dataset.columns),
+        (models.Task, dataset.tasks, profile.tasks),
+        (models.Comment, dataset.comments, profile.comments),
+    ]
+    return {model.__tablename__: load(model, rows, total, chunk_size) for model, rows, total in tables}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES, default="small")
+    for field in Profile._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, help=f"override the profile's {field}")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    overrides = {field: getattr(args, field) for field in Profile._fields if getattr(args, field) is not None}
+    profile = PROFILES[args.profile]._replace(**overrides)
+
+    db = SessionLocal()
+    try:
+        if db.query(models.User.id).filter(models.User.email == bench_email(0)).first():
+            print("This database already holds a benchmark dataset; generate into an empty one", file=sys.stderr)
+            return 1
+    finally:
+        db.close()
+
+    print(f"Generating {args.profile} {dict(profile._asdict())} into {engine.url.get_backend_name()}", file=sys.stderr)
+    try:
+        seconds = generate(profile, args.chunk_size)
+    finally:
+        hashing_pool.shutdown()
+    print(f"Done in {sum(seconds.values()):.1f} s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
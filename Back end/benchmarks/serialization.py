@@ -0,0 +1,155 @@
+"""Compare the default and fast serialisation paths on large responses.
+
+Seeds one board with a column of --tasks tasks (every other one assigned and
+labelled) in a transaction that is rolled back at the end, then times, per
+call, loading and encoding:
+
+  column   all tasks in the column, three ways:
+             fastapi   ORM objects -> response model -> stdlib json (response_model=List[...])
+             pydantic  ORM objects -> response model -> pydantic JSON (the default path)
+             rows      schema columns as plain rows -> encode_json (FAST_SERIALIZATION)
+  snapshot GET /boards/{id}/snapshot with FAST_SERIALIZATION off and on
+
+The pydantic and rows bodies are checked to be byte-for-byte equal. Run from
+"Back end" against a migrated database:
+
+    python -m benchmarks.serialization --tasks 3000 --repeat 20
+"""
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from typing import List
+from app import models, schemas, serialization
+from app.access import access_cache
+from app.database import engine
+from app.response_cache import response_cache
+from app.routers import boards
+from app.serialization import encode_json, select_for
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+
+def new_id() -> str:
+    return str(uuid.uuid4())
+
+def seed(db: Session, task_count: int) -> dict:
+    """Create a user, project, board and one column holding task_count tasks"""
+    user = models.User(id=new_id(), email=f"{new_id()}@bench.example.com", name="Bench", hashed_password="x")
+    project = models.Project(id=new_id(), name="Bench")
+    board = models.Board(id=new_id(), name="Board", project_id=project.id, position=0)
+    column = models.BoardColumn(id=new_id(), name="Column", board_id=board.id, position=0)
+    label = models.Label(id=new_id(), name="Label", color="red")
+
+    db.add_all([user, project, label])
+    db.flush()
+    db.add(models.ProjectMember(id=new_id(), role="owner", user_id=user.id, project_id=project.id))
+    db.add(board)
+    db.flush()
+    db.add(column)
+    db.flush()
+
+    task_ids = [new_id() for _ in range(task_count)]
+    db.execute(models.Task.__table__.insert(), [
+        {
+            "id": task_id,
+            "title": f"Task {i}",
+            "description": f"Description of task {i}",
+            "priority": "medium",
+            "column_id": column.id,
+            "board_id": board.id,
+            "project_id": project.id,
+            "rank": f"{i:08d}",
+            "created_by_id": user.id,
+            "assignee_id": user.id if i % 2 else None,
+        }
+        for i, task_id in enumerate(task_ids)
+    ])
+    db.execute(models.task_labels.insert(), [
+        {"task_id": task_id, "label_id": label.id} for task_id in task_ids[::2]
+    ])
+    db.flush()
+
+    return {"user": user, "board_id": board.id, "column_id": column.id}
+
+def column_tasks(db: Session, column_id: str, fast: bool) -> list:
+    return select_for(db, models.Task, schemas.Task, fast=fast).filter(
+        models.Task.column_id == column_id
+    ).order_by(models.Task.rank, models.Task.id).all()
+
+def fastapi_path(db: Session, ctx: dict) -> bytes:
+    adapter = TypeAdapter(List[schemas.Task])
+    content = adapter.dump_python(adapter.validate_python(column_tasks(db, ctx["column_id"], False), from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def pydantic_path(db: Session, ctx: dict) -> bytes:
+    return serialization.serialize(List[schemas.Task], column_tasks(db, ctx["column_id"], False))
+
+def rows_path(db: Session, ctx: dict) -> bytes:
+    return encode_json(column_tasks(db, ctx["column_id"], True))
+
+def snapshot_path(fast: bool):
+    def call(db: Session, ctx: dict) -> bytes:
+        boards.FAST_SERIALIZATION = fast
+        response_cache.clear()
+        response = asyncio.run(boards.get_board_snapshot(
+            ctx["board_id"], Response(), if_none_match=None, accept=None, accept_encoding="identity", db=db, current_user=ctx["user"]
+        ))
+        return response.body
+    return call
+
+# Workload -> path name -> call(db, ctx) returning the response body
+WORKLOADS = {
+    "column": {"fastapi": fastapi_path, "pydantic": pydantic_path, "rows": rows_path},
+    "snapshot": {"pydantic": snapshot_path(False), "rows": snapshot_path(True)},
+}
+
+def measure(call, db: Session, ctx: dict, repeat: int) -> tuple:
+    """Median and best milliseconds per call, after one warm-up call, plus the body"""
+    body = call(db, ctx)
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.perf_counter()
+        call(db, ctx)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings), body
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    mismatches = 0
+    fast_serialization = boards.FAST_SERIALIZATION
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            ctx = seed(db, args.tasks)
+            access_cache.clear()
+
+            print(f"{args.tasks} tasks, {args.repeat} calls each, JSON encoder: {'orjson' if serialization.orjson else 'pydantic_core'}")
+            for workload, paths in WORKLOADS.items():
+                print(f"\n== {workload}")
+                bodies = {}
+                baseline = None
+                for name, call in paths.items():
+                    median, best, bodies[name] = measure(call, db, ctx, args.repeat)
+                    baseline = baseline or median
+                    print(f"  {name:<9} {median:8.2f} ms median {best:8.2f} ms best {len(bodies[name]):>9} bytes  x{baseline / median:.2f}")
+                if bodies["pydantic"] != bodies["rows"]:
+                    mismatches += 1
+                    print("  MISMATCH: pydantic and rows bodies differ")
+        finally:
+            boards.FAST_SERIALIZATION = fast_serialization
+            transaction.rollback()
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
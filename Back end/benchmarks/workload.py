@@ -0,0 +1,364 @@
+"""Replay a realistic endpoint mix and report latency per endpoint as JSON.
+
+Each of --concurrency virtual users logs in as a random dataset user (see
+benchmarks.dataset), finds the boards of one of its projects and then, until
+--duration runs out, picks operations by weight from the mix:
+
+  board_open  GET /boards/{id}/snapshot of one of its boards
+  task_move   POST /tasks/{id}/move of a task it has seen to another column
+  comment     POST /comments on a task it has seen
+  login       POST /auth/login again (bcrypt, in the auth concurrency class)
+
+Requests made during the first --warmup seconds and the lookups before the
+first operation are not measured. The app runs in this process by default,
+called through ASGI with its lifespan running and using DATABASE_URL (SQLite
+or PostgreSQL) and the rest of the usual environment, or over HTTP against a
+running server with --url. Run from "Back end":
+
+    python -m benchmarks.workload --profile small --duration 30 --output results.json
+    python -m benchmarks.workload --url http://localhost:8000 --concurrency 64 --baseline results.json
+
+The report (stdout, or --output) has throughput and p50/p95/p99 latency per
+operation. With --baseline it is compared against an earlier report and the
+exit status is 1 if anything regressed (see benchmarks.compare).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+from .compare import TOLERANCE, compare, print_comparison
+from .dataset import BENCH_PASSWORD, PROFILES, active_users, bench_email
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+# Operation -> weight in the default mix
+MIX = {"board_open": 55, "task_move": 20, "comment": 15, "login": 10}
+
+class InProcessTransport:
+    """Calls the ASGI app directly on this event loop"""
+
+    name = "in-process"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"", user: int = 0) -> tuple:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        finished = asyncio.Event()
+        response = {"status": 500, "body": []}
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            # Streaming responses listen for a disconnect; only send it once they are done
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished.set()
+        return response["status"], b"".join(response["body"])
+
+class HTTPTransport:
+    """Keep-alive HTTP/1.1 connections to a running server, one per virtual user, on worker threads"""
+
+    name = "http"
+
+    def __init__(self, url: str, concurrency: int):
+        parts = urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark-http")
+        self.connections = {}
+
+    def _request(self, user: int, method: str, path: str, headers: dict, body: bytes) -> tuple:
+        connection = self.connections.get(user)
+        if connection is None:
+            connection = self.connections[user] = self.connection_class(self.host, timeout=60)
+        try:
+            connection.request(method, self.prefix + path, body=body or None, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            del self.connections[user]
+            raise
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"", user: int = 0) -> tuple:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._request, user, method, path, headers, body)
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.executor.shutdown(wait=True)
+
+class Recorder:
+    """Latencies and status codes per operation, for requests made after the warm-up"""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, operation: str, started: float, seconds: float, status_code: Optional[int]):
+        if started < self.measure_from:
+            return
+        self.latencies.setdefault(operation, []).append(seconds * 1000)
+        statuses = self.statuses.setdefault(operation, {})
+        key = str(status_code) if status_code is not None else "error"
+        statuses[key] = statuses.get(key, 0) + 1
+
+def percentile(ordered: list, p: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarise(latencies: list, statuses: dict, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(count for status_code, count in statuses.items() if status_code == "error" or int(status_code) >= 400)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": errors / len(ordered) if ordered else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": len(ordered) / seconds if seconds else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) if ordered else None,
+        "p50_ms": percentile(ordered, 50) if ordered else None,
+        "p95_ms": percentile(ordered, 95) if ordered else None,
+        "p99_ms": percentile(ordered, 99) if ordered else None,
+        "max_ms": ordered[-1] if ordered else None,
+    }
+
+class VirtualUser:
+    """One simulated client working on the boards of one project"""
+
+    def __init__(self, index: int, transport, recorder: Recorder, users: int, rng: random.Random):
+        self.index = index
+        self.transport = transport
+        self.recorder = recorder
+        self.users = users
+        self.rng = rng
+        self.email = bench_email(rng.randrange(users))
+        self.token = None
+        self.boards = []
+        self.columns = {}  # column id -> task ids, from the last board opened
+        self.task_columns = {}  # task id -> column id
+
+    async def call(self, operation: Optional[str], method: str, path: str, body: bytes = b"", headers: Optional[dict] = None) -> tuple:
+        headers = {"Accept": "application/json", **(headers or {})}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            status_code, content = await self.transport.request(method, path, headers, body, self.index)
+        except (http.client.HTTPException, OSError):
+            status_code, content = None, b""
+        if operation:
+            self.recorder.add(operation, started, time.perf_counter() - started, status_code)
+        return status_code, content
+
+    async def call_json(self, operation: Optional[str], method: str, path: str, payload: dict) -> tuple:
+        return await self.call(operation, method, path, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+    async def login(self, operation: Optional[str] = "login") -> bool:
+        form = urlencode({"username": self.email, "password": BENCH_PASSWORD}).encode()
+        token, self.token = self.token, None
+        status_code, content = await self.call(operation, "POST", "/auth/login", form, {"Content-Type": "application/x-www-form-urlencoded"})
+        self.token = json.loads(content)["access_token"] if status_code == 200 else token
+        return status_code == 200
+
+    async def setup(self) -> bool:
+        """Log in and find the boards of one of the user's projects (not measured)"""
+        if not await self.login(None):
+            return False
+        status_code, content = await self.call(None, "GET", "/projects?limit=50")
+        projects = json.loads(content)["items"] if status_code == 200 else []
+        if not projects:
+            return False
+        project = self.rng.choice(projects)
+        status_code, content = await self.call(None, "GET", f"/boards/project/{project['id']}?limit=100")
+        self.boards = [board["id"] for board in json.loads(content)["items"]] if status_code == 200 else []
+        return bool(self.boards)
+
+    async def board_open(self):
+        status_code, content = await self.call("board_open", "GET", f"/boards/{self.rng.choice(self.boards)}/snapshot")
+        if status_code == 200:
+            snapshot = json.loads(content)
+            self.columns = {column["id"]: [task["id"] for task in column["tasks"]] for column in snapshot["columns"]}
+            self.task_columns = {task_id: column_id for column_id, task_ids in self.columns.items() for task_id in task_ids}
+
+    async def task_move(self):
+        if not self.task_columns or len(self.columns) < 2:
+            return await self.board_open()
+        task_id = self.rng.choice(list(self.task_columns))
+        source = self.task_columns[task_id]
+        target = self.rng.choice([column_id for column_id in self.columns if column_id != source])
+        status_code, _ = await self.call("task_move", "POST", f"/tasks/{task_id}/move?new_column_id={target}")
+        if status_code == 200:
+            self.columns[source].remove(task_id)
+            self.columns[target].append(task_id)
+            self.task_columns[task_id] = target
+
+    async def comment(self):
+        if not self.task_columns:
+            return await self.board_open()
+        task_id = self.rng.choice(list(self.task_columns))
+        await self.call_json("comment", "POST", "/comments", {"task_id": task_id, "content": f"Benchmark comment from user {self.index}"})
+
+    async def run(self, mix: dict, deadline: float):
+        operations = list(mix)
+        weights = list(mix.values())
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(operations, weights)[0])()
+
+async def drive(transport, args, mix: dict) -> dict:
+    """Run the virtual users and build the report"""
+    rng = random.Random(args.seed)
+    users = args.users or active_users(PROFILES[args.profile])
+    virtual_users = [
+        VirtualUser(i, transport, None, users, random.Random(rng.random()))
+        for i in range(args.concurrency)
+    ]
+    ready = await asyncio.gather(*(user.setup() for user in virtual_users))
+    virtual_users = [user for user, ok in zip(virtual_users, ready) if ok]
+    if not virtual_users:
+        raise RuntimeError("No virtual user could log in and find a board; generate a dataset with benchmarks.dataset first")
+
+    started = time.perf_counter()
+    recorder = Recorder(started + args.warmup)
+    for user in virtual_users:
+        user.recorder = recorder
+    await asyncio.gather(*(user.run(mix, started + args.warmup + args.duration) for user in virtual_users))
+    measured = time.perf_counter() - recorder.measure_from
+
+    all_latencies = [ms for latencies in recorder.latencies.values() for ms in latencies]
+    all_statuses = {}
+    for statuses in recorder.statuses.values():
+        for status_code, count in statuses.items():
+            all_statuses[status_code] = all_statuses.get(status_code, 0) + count
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "label": args.label,
+            "transport": transport.name,
+            "target": args.url or args.database,
+            "profile": args.profile,
+            "concurrency": len(virtual_users),
+            "duration_seconds": measured,
+            "warmup_seconds": args.warmup,
+            "mix": mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "operations": {
+            operation: summarise(latencies, recorder.statuses[operation], measured)
+            for operation, latencies in sorted(recorder.latencies.items())
+        },
+        "total": summarise(all_latencies, all_statuses, measured),
+    }
+
+async def run_in_process(args, mix: dict) -> dict:
+    from app.database import engine
+    from app.main import app
+    args.database = engine.url.get_backend_name()
+    # Startup and shutdown run as they would under a server
+    async with app.router.lifespan_context(app):
+        return await drive(InProcessTransport(app), args, mix)
+
+async def run_over_http(args, mix: dict) -> dict:
+    args.database = None
+    transport = HTTPTransport(args.url, args.concurrency)
+    try:
+        return await drive(transport, args, mix)
+    finally:
+        transport.close()
+
+def parse_mix(value: str) -> dict:
+    """"board_open=60,login=5" -> weights, keeping the defaults for operations not named"""
+    mix = dict(MIX)
+    for part in filter(None, value.split(",")):
+        operation, _, weight = part.partition("=")
+        if operation.strip() not in MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation {operation!r}, expected one of {', '.join(MIX)}")
+        mix[operation.strip()] = float(weight)
+    return {operation: weight for operation, weight in mix.items() if weight > 0}
+
+def print_report(report: dict):
+    meta = report["meta"]
+    print(f"{meta['transport']} {meta['target']}, {meta['concurrency']} users, {meta['duration_seconds']:.1f} s", file=sys.stderr)
+    print(f"  {'operation':<12} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=sys.stderr)
+    for operation, stats in [*report["operations"].items(), ("total", report["total"])]:
+        if not stats["requests"]:
+            continue
+        print(
+            f"  {operation:<12} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9.1f}"
+            f" {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}",
+            file=sys.stderr
+        )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of the app in this process")
+    parser.add_argument("--profile", choices=PROFILES, default="small", help="profile the dataset was generated with")
+    parser.add_argument("--users", type=int, help="log in as the first N dataset users (default: from the profile)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--mix", type=parse_mix, default=dict(MIX), help="weights, e.g. board_open=60,login=5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="free text stored in the report, e.g. the branch")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="compare against this earlier report")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_over_http(args, args.mix) if args.url else run_in_process(args, args.mix))
+    print_report(report)
+
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(content + "\n")
+    else:
+        print(content)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(baseline, report, args.tolerance)
+        print_comparison(rows)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Task ranks instead of positions
+
+Tasks are ordered by a lexicographic rank key (app/ranking.py) rather than an
+integer position. Every column's tasks get evenly spaced keys in their
+current (position, id) order before the position column is dropped.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17 09:15:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+tasks = sa.table(
+    "tasks",
+    sa.column("id", sa.String),
+    sa.column("column_id", sa.String),
+    sa.column("position", sa.Integer),
+    sa.column("rank", sa.String),
+)
+
+
+def upgrade():
+    from app.ranking import evenly_spaced_ranks
+
+    with op.batch_alter_table("tasks") as batch:
+        batch.add_column(sa.Column("rank", sa.String(255), nullable=True))
+
+    # One column at a time, so the backfill never holds more than one column's ids
+    conn = op.get_bind()
+    column_ids = conn.execute(sa.select(tasks.c.column_id).distinct()).scalars().all()
+    for column_id in column_ids:
+        task_ids = conn.execute(
+            sa.select(tasks.c.id).where(tasks.c.column_id == column_id).order_by(tasks.c.position, tasks.c.id)
+        ).scalars().all()
+        conn.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam("task_id")).values(rank=sa.bindparam("new_rank")),
+            [{"task_id": task_id, "new_rank": rank} for task_id, rank in zip(task_ids, evenly_spaced_ranks(len(task_ids)))]
+        )
+
+    with op.batch_alter_table("tasks") as batch:
+        batch.alter_column("rank", existing_type=sa.String(255), nullable=False)
+        batch.drop_column("position")
+        batch.create_index("ix_tasks_column_id_rank", ["column_id", "rank"])
+
+
+def downgrade():
+    # Positions 0..n-1 in rank order within each column
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_index("ix_tasks_column_id_rank")
+        batch.add_column(sa.Column("position", sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    column_ids = conn.execute(sa.select(tasks.c.column_id).distinct()).scalars().all()
+    for column_id in column_ids:
+        task_ids = conn.execute(
+            sa.select(tasks.c.id).where(tasks.c.column_id == column_id).order_by(tasks.c.rank, tasks.c.id)
+        ).scalars().all()
+        conn.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam("task_id")).values(position=sa.bindparam("new_position")),
+            [{"task_id": task_id, "new_position": position} for position, task_id in enumerate(task_ids)]
+        )
+
+    with op.batch_alter_table("tasks") as batch:
+        batch.alter_column("position", existing_type=sa.Integer(), nullable=False)
+        batch.drop_column("rank")
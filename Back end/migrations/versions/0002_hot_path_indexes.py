@@ -0,0 +1,48 @@
+"""Hot-path indexes
+
+Composite indexes for each router's filter + order pattern, and a unique
+(project_id, user_id) on project_members, which every access check joins on.
+The unique index fails to build if duplicate memberships already exist;
+remove them first.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-17 09:30:00
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Access checks and member lists
+    op.create_index(
+        "uq_project_members_project_id_user_id", "project_members", ["project_id", "user_id"], unique=True
+    )
+    # get_projects: the current user's memberships
+    op.create_index("ix_project_members_user_id_project_id", "project_members", ["user_id", "project_id"])
+    # Keyset pages of boards, columns, tasks and comments
+    op.create_index("ix_boards_project_id_position", "boards", ["project_id", "position", "id"])
+    op.create_index("ix_columns_board_id_position", "columns", ["board_id", "position", "id"])
+    op.create_index("ix_comments_task_id_created_at", "comments", ["task_id", "created_at", "id"])
+    op.drop_index("ix_tasks_column_id_rank", table_name="tasks")
+    op.create_index("ix_tasks_column_id_rank", "tasks", ["column_id", "rank", "id"])
+    # Tasks assigned to a user, and the label side of task_labels
+    op.create_index("ix_tasks_assignee_id", "tasks", ["assignee_id"])
+    op.create_index("ix_task_labels_label_id", "task_labels", ["label_id"])
+
+
+def downgrade():
+    op.drop_index("ix_task_labels_label_id", table_name="task_labels")
+    op.drop_index("ix_tasks_assignee_id", table_name="tasks")
+    op.drop_index("ix_tasks_column_id_rank", table_name="tasks")
+    op.create_index("ix_tasks_column_id_rank", "tasks", ["column_id", "rank"])
+    op.drop_index("ix_comments_task_id_created_at", table_name="comments")
+    op.drop_index("ix_columns_board_id_position", table_name="columns")
+    op.drop_index("ix_boards_project_id_position", table_name="boards")
+    op.drop_index("ix_project_members_user_id_project_id", table_name="project_members")
+    op.drop_index("uq_project_members_project_id_user_id", table_name="project_members")
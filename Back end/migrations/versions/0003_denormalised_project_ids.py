@@ -0,0 +1,69 @@
+"""Denormalised project_id/board_id on tasks and comments
+
+Tasks get board_id and project_id and comments get project_id, so access
+checks and project-wide queries no longer climb task -> column -> board.
+Existing rows are backfilled from that chain before the columns become
+NOT NULL.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("tasks") as batch:
+        batch.add_column(sa.Column("board_id", sa.String(36), nullable=True))
+        batch.add_column(sa.Column("project_id", sa.String(36), nullable=True))
+    with op.batch_alter_table("comments") as batch:
+        batch.add_column(sa.Column("project_id", sa.String(36), nullable=True))
+
+    op.execute(
+        """
+        UPDATE tasks SET
+            board_id = (SELECT columns.board_id FROM columns WHERE columns.id = tasks.column_id),
+            project_id = (
+                SELECT boards.project_id FROM columns JOIN boards ON boards.id = columns.board_id
+                WHERE columns.id = tasks.column_id
+            )
+        """
+    )
+    op.execute(
+        "UPDATE comments SET project_id = (SELECT tasks.project_id FROM tasks WHERE tasks.id = comments.task_id)"
+    )
+
+    with op.batch_alter_table("tasks") as batch:
+        batch.alter_column("board_id", existing_type=sa.String(36), nullable=False)
+        batch.alter_column("project_id", existing_type=sa.String(36), nullable=False)
+        batch.create_foreign_key("fk_tasks_board_id_boards", "boards", ["board_id"], ["id"], ondelete="CASCADE")
+        batch.create_foreign_key("fk_tasks_project_id_projects", "projects", ["project_id"], ["id"], ondelete="CASCADE")
+        batch.create_index("ix_tasks_board_id", ["board_id"])
+        batch.create_index("ix_tasks_project_id", ["project_id"])
+    with op.batch_alter_table("comments") as batch:
+        batch.alter_column("project_id", existing_type=sa.String(36), nullable=False)
+        batch.create_foreign_key(
+            "fk_comments_project_id_projects", "projects", ["project_id"], ["id"], ondelete="CASCADE"
+        )
+        batch.create_index("ix_comments_project_id", ["project_id"])
+
+
+def downgrade():
+    with op.batch_alter_table("comments") as batch:
+        batch.drop_index("ix_comments_project_id")
+        batch.drop_constraint("fk_comments_project_id_projects", type_="foreignkey")
+        batch.drop_column("project_id")
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_index("ix_tasks_project_id")
+        batch.drop_index("ix_tasks_board_id")
+        batch.drop_constraint("fk_tasks_project_id_projects", type_="foreignkey")
+        batch.drop_constraint("fk_tasks_board_id_boards", type_="foreignkey")
+        batch.drop_column("project_id")
+        batch.drop_column("board_id")
@@ -0,0 +1,153 @@
+"""Full-text search over tasks and comments
+
+PostgreSQL: a generated tsvector column on tasks (title weighted above
+description) and on comments, each with a GIN index. PostgreSQL recomputes
+the vector whenever the row is written.
+
+SQLite: an FTS5 table, search_index, kept in step by triggers. Its rowids come
+from search_keys, which maps ('task' | 'comment', id) to an INTEGER PRIMARY KEY,
+so updates and deletes touch a single FTS row and survive VACUUM. Batch
+migrations recreate tables on SQLite and drop their triggers, so any later
+batch_alter_table on tasks or comments has to recreate these triggers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 13:00:00
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_CONFIG in app/search.py
+SEARCH_CONFIG = "english"
+
+SQLITE_TRIGGERS = {
+    "tasks_search_insert": """
+        CREATE TRIGGER tasks_search_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO search_keys (entity_type, entity_id) VALUES ('task', new.id);
+            INSERT INTO search_index (rowid, task_id, project_id, title, body) VALUES (
+                (SELECT id FROM search_keys WHERE entity_type = 'task' AND entity_id = new.id),
+                new.id, new.project_id, new.title, coalesce(new.description, '')
+            );
+        END
+    """,
+    "tasks_search_update": """
+        CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description, project_id ON tasks BEGIN
+            UPDATE search_index
+            SET project_id = new.project_id, title = new.title, body = coalesce(new.description, '')
+            WHERE rowid = (SELECT id FROM search_keys WHERE entity_type = 'task' AND entity_id = old.id);
+        END
+    """,
+    "tasks_search_delete": """
+        CREATE TRIGGER tasks_search_delete AFTER DELETE ON tasks BEGIN
+            DELETE FROM search_index
+            WHERE rowid = (SELECT id FROM search_keys WHERE entity_type = 'task' AND entity_id = old.id);
+            DELETE FROM search_keys WHERE entity_type = 'task' AND entity_id = old.id;
+        END
+    """,
+    "comments_search_insert": """
+        CREATE TRIGGER comments_search_insert AFTER INSERT ON comments BEGIN
+            INSERT INTO search_keys (entity_type, entity_id) VALUES ('comment', new.id);
+            INSERT INTO search_index (rowid, task_id, project_id, title, body) VALUES (
+                (SELECT id FROM search_keys WHERE entity_type = 'comment' AND entity_id = new.id),
+                new.task_id, new.project_id, '', new.content
+            );
+        END
+    """,
+    "comments_search_update": """
+        CREATE TRIGGER comments_search_update AFTER UPDATE OF content, project_id ON comments BEGIN
+            UPDATE search_index
+            SET project_id = new.project_id, body = new.content
+            WHERE rowid = (SELECT id FROM search_keys WHERE entity_type = 'comment' AND entity_id = old.id);
+        END
+    """,
+    "comments_search_delete": """
+        CREATE TRIGGER comments_search_delete AFTER DELETE ON comments BEGIN
+            DELETE FROM search_index
+            WHERE rowid = (SELECT id FROM search_keys WHERE entity_type = 'comment' AND entity_id = old.id);
+            DELETE FROM search_keys WHERE entity_type = 'comment' AND entity_id = old.id;
+        END
+    """,
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute(
+            f"""
+            ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute(
+            f"""
+            ALTER TABLE comments ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                to_tsvector('{SEARCH_CONFIG}', coalesce(content, ''))
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)")
+        op.execute("CREATE INDEX ix_comments_search_vector ON comments USING gin (search_vector)")
+
+    elif dialect == "sqlite":
+        op.execute(
+            """
+            CREATE TABLE search_keys (
+                id INTEGER PRIMARY KEY,
+                entity_type VARCHAR(10) NOT NULL,
+                entity_id VARCHAR(36) NOT NULL,
+                UNIQUE (entity_type, entity_id)
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE search_index USING fts5(
+                task_id UNINDEXED, project_id UNINDEXED, title, body, tokenize = 'porter unicode61'
+            )
+            """
+        )
+
+        # Index what is already there, then let the triggers keep it current
+        op.execute("INSERT INTO search_keys (entity_type, entity_id) SELECT 'task', id FROM tasks")
+        op.execute("INSERT INTO search_keys (entity_type, entity_id) SELECT 'comment', id FROM comments")
+        op.execute(
+            """
+            INSERT INTO search_index (rowid, task_id, project_id, title, body)
+            SELECT search_keys.id, tasks.id, tasks.project_id, tasks.title, coalesce(tasks.description, '')
+            FROM tasks JOIN search_keys ON search_keys.entity_type = 'task' AND search_keys.entity_id = tasks.id
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO search_index (rowid, task_id, project_id, title, body)
+            SELECT search_keys.id, comments.task_id, comments.project_id, '', comments.content
+            FROM comments JOIN search_keys ON search_keys.entity_type = 'comment' AND search_keys.entity_id = comments.id
+            """
+        )
+        for ddl in SQLITE_TRIGGERS.values():
+            op.execute(ddl)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("DROP INDEX ix_comments_search_vector")
+        op.execute("DROP INDEX ix_tasks_search_vector")
+        op.execute("ALTER TABLE comments DROP COLUMN search_vector")
+        op.execute("ALTER TABLE tasks DROP COLUMN search_vector")
+
+    elif dialect == "sqlite":
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER {name}")
+        op.execute("DROP TABLE search_index")
+        op.execute("DROP TABLE search_keys")
@@ -0,0 +1,28 @@
+"""Version counters on boards and tasks
+
+The counters back the ETags on board, column, task and comment reads. They
+are added with plain ALTER TABLE rather than batch_alter_table so SQLite
+keeps the full-text search triggers on tasks (see 0004).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("boards", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("tasks", "version")
+    op.drop_column("boards", "version")
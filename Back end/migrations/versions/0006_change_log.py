@@ -0,0 +1,56 @@
+"""Change log for delta sync, and updated_at on insert
+
+changes is the append-only log behind GET /boards/{id}/changes, and
+change_log_horizon its single row recording how far compaction has
+discarded entries. updated_at is now set when a row is created; existing
+rows get their created_at. Tables are only created and updated here, never
+batch-altered, so the SQLite search triggers on tasks and comments stay.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 17:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TIMESTAMPED_TABLES = ["users", "projects", "boards", "columns", "tasks", "comments"]
+
+
+def upgrade():
+    op.create_table(
+        "changes",
+        sa.Column("seq", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("board_id", sa.String(36), nullable=False),
+        sa.Column("entity_type", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.String(36), nullable=False),
+        sa.Column("action", sa.String(20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_changes_board_id_seq", "changes", ["board_id", "seq"])
+    op.create_index("ix_changes_entity_id_seq", "changes", ["entity_id", "seq"])
+    op.create_index("ix_changes_created_at", "changes", ["created_at"])
+
+    horizon = op.create_table(
+        "change_log_horizon",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("seq", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.bulk_insert(horizon, [{"id": 1, "seq": 0}])
+
+    for table in TIMESTAMPED_TABLES:
+        op.execute(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL")
+
+
+def downgrade():
+    op.drop_table("change_log_horizon")
+    op.drop_index("ix_changes_created_at", table_name="changes")
+    op.drop_index("ix_changes_entity_id_seq", table_name="changes")
+    op.drop_index("ix_changes_board_id_seq", table_name="changes")
+    op.drop_table("changes")
@@ -0,0 +1,37 @@
+"""Project activity feed
+
+activities holds the entries the activity writer flushes in batches, read
+newest first per project through ix_activities_project_id_created_at.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "activities",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("project_id", sa.String(36), nullable=False),
+        sa.Column("user_id", sa.String(36), nullable=False),
+        sa.Column("action", sa.String(20), nullable=False),
+        sa.Column("entity_type", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.String(36), nullable=False),
+        sa.Column("details", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_activities_project_id_created_at", "activities", ["project_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_activities_project_id_created_at", table_name="activities")
+    op.drop_table("activities")
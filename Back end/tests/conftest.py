@@ -0,0 +1,61 @@
+"""Shared fixtures: a throwaway database, the app and a signed-in user with a board.
+
+Each run gets a fresh SQLite file unless TEST_DATABASE_URL points at another
+(empty) database. The environment is set here, before the app is imported,
+so the tests do not need a .env file; DATABASE_MODE is read from the
+environment as usual, so DATABASE_MODE=async pytest runs the async handlers.
+"""
+import itertools
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi.testclient import TestClient
+import pytest
+
+PASSWORD = "test-password"
+
+_users = itertools.count()
+
+@pytest.fixture(scope="session")
+def database():
+    """Bring the test database schema up to date"""
+    from app.database import run_migrations
+    run_migrations()
+
+@pytest.fixture(scope="session")
+def client(database):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def register(client):
+    """Register and sign in a new user; returns their Authorization header"""
+    def register():
+        email = f"user-{next(_users)}-{os.getpid()}@tests.example.com"
+        response = client.post("/auth/register", json={"email": email, "name": "Test user", "password": PASSWORD})
+        assert response.status_code == 201, response.text
+        response = client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return register
+
+@pytest.fixture
+def headers(register):
+    return register()
+
+@pytest.fixture
+def board(client, headers):
+    """A project with one board and two empty columns, owned by the headers user"""
+    project = client.post("/projects", json={"name": "Project"}, headers=headers).json()
+    board = client.post("/boards", json={"name": "Board", "position": 0, "project_id": project["id"]}, headers=headers).json()
+    columns = [
+        client.post("/columns", json={"name": f"Column {i}", "position": i, "board_id": board["id"]}, headers=headers).json()
+        for i in range(2)
+    ]
+    return {"project": project, "board": board, "columns": columns}
@@ -0,0 +1,60 @@
+from conftest import PASSWORD
+from fastapi import HTTPException
+from app.hashing import HashingPool
+import asyncio
+import os
+import pytest
+import time
+
+def test_register_and_login(client):
+    user = {"email": f"auth-test-{os.getpid()}@tests.example.com", "name": "Auth test", "password": PASSWORD}
+    assert client.post("/auth/register", json=user).status_code == 201
+    assert client.post("/auth/register", json=user).status_code == 400
+
+    login = {"username": user["email"], "password": PASSWORD}
+    token = client.post("/auth/login", data=login).json()["access_token"]
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).json()
+    assert me["email"] == user["email"]
+    assert client.post("/auth/login", data={**login, "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", data={**login, "username": "nobody@tests.example.com"}).status_code == 401
+
+def test_full_hashing_queue_is_shed_while_jobs_are_awaited():
+    pool = HashingPool(workers=1, max_pending=1)
+
+    async def run():
+        slow = asyncio.ensure_future(pool.run_async(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run_async(time.sleep, 0)
+        await slow
+        return rejected.value
+
+    try:
+        rejected = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"]
+    assert pool.stats()["completed"] == 1 and pool.stats()["rejected"] == 1 and pool.stats()["pending"] == 0
+
+def test_cancelled_hashing_job_keeps_its_slot_until_it_finishes():
+    pool = HashingPool(workers=1, max_pending=1)
+
+    async def run():
+        # Start the worker first, so the slow job is running when it is cancelled
+        await pool.run_async(time.sleep, 0)
+        slow = asyncio.ensure_future(pool.run_async(time.sleep, 0.5))
+        await asyncio.sleep(0.2)
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        pending = pool.stats()["pending"]
+        with pytest.raises(HTTPException):
+            await pool.run_async(time.sleep, 0)
+        await asyncio.sleep(0.5)
+        return pending
+
+    try:
+        pending = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert pending == 1 and pool.stats()["pending"] == 0
@@ -0,0 +1,100 @@
+from test_ranking import add_tasks, titles
+
+def test_create_batch_appends_and_reports_each_item(client, headers, board):
+    column = board["columns"][0]["id"]
+    response = client.post("/tasks/create:batch", json={"tasks": [
+        {"title": "A", "column_id": column},
+        {"title": "B", "column_id": "missing"},
+        {"title": "C", "column_id": column},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [result["status_code"] for result in results] == [201, 404, 201]
+    assert results[0]["rank"] < results[2]["rank"]
+    assert titles(client, headers, column) == ["A", "C"]
+
+def test_update_batch_changes_only_given_fields(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    ids = add_tasks(client, headers, column, "AB")
+    response = client.post("/tasks/update:batch", json={"tasks": [
+        {"id": ids["A"], "title": "A2"},
+        {"id": ids["B"], "column_id": other, "priority": "high"},
+        {"id": "missing", "title": "X"},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert [result["status_code"] for result in response.json()] == [200, 200, 404]
+
+    moved = client.get(f"/tasks/{ids['B']}", headers=headers).json()
+    assert moved["column_id"] == other and moved["priority"] == "high" and moved["title"] == "B"
+    assert titles(client, headers, column) == ["A2"]
+
+def test_delete_batch_removes_tasks_and_their_comments(client, headers, board):
+    column = board["columns"][0]["id"]
+    ids = add_tasks(client, headers, column, "AB")
+    client.post("/comments", json={"task_id": ids["A"], "content": "Comment"}, headers=headers)
+    response = client.post("/tasks/delete:batch", json={"task_ids": [ids["A"], "missing"]}, headers=headers)
+    assert [result["status_code"] for result in response.json()] == [204, 404]
+    assert client.get(f"/tasks/{ids['A']}", headers=headers).status_code == 404
+    assert titles(client, headers, column) == ["B"]
+
+def test_batch_items_outside_the_users_projects_are_rejected(client, headers, register, board):
+    column = board["columns"][0]["id"]
+    ids = add_tasks(client, headers, column, "A")
+    stranger = register()
+    response = client.post("/tasks/update:batch", json={"tasks": [{"id": ids["A"], "title": "Mine"}]}, headers=stranger)
+    assert response.json()[0]["status_code"] in (403, 404)
+    assert titles(client, headers, column) == ["A"]
+
+def test_move_batch_applies_moves_in_order(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    ids = add_tasks(client, headers, column, "ABCDE")
+    response = client.post("/tasks/move:batch", json={"moves": [
+        {"task_id": ids["E"], "column_id": column, "before_task_id": ids["A"]},
+        {"task_id": ids["D"], "column_id": column, "after_task_id": ids["E"]},
+        {"task_id": ids["B"], "column_id": other},
+        {"task_id": ids["C"], "column_id": other, "before_task_id": ids["B"]},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert [position["id"] for position in response.json()] == [ids[title] for title in "EDBC"]
+    assert titles(client, headers, column) == list("EDA")
+    assert titles(client, headers, other) == list("CB")
+
+def test_move_batch_is_all_or_nothing(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    ids = add_tasks(client, headers, column, "ABC")
+    response = client.post("/tasks/move:batch", json={"moves": [
+        {"task_id": ids["C"], "column_id": other},
+        {"task_id": ids["A"], "column_id": column, "after_task_id": ids["A"], "before_task_id": ids["C"]},
+    ]}, headers=headers)
+    assert response.status_code == 400
+    assert titles(client, headers, column) == list("ABC")
+    response = client.post("/tasks/move:batch", json={"moves": [{"task_id": "missing", "column_id": other}]}, headers=headers)
+    assert response.status_code == 404
+
+def test_assignee_must_belong_to_the_project_the_task_moves_to(client, headers, register, board):
+    column = board["columns"][0]["id"]
+    other_project = client.post("/projects", json={"name": "Other"}, headers=headers).json()
+    other_board = client.post("/boards", json={"name": "Other", "position": 0, "project_id": other_project["id"]}, headers=headers).json()
+    other_column = client.post("/columns", json={"name": "Other", "position": 0, "board_id": other_board["id"]}, headers=headers).json()["id"]
+
+    def member_of(project_id):
+        me = client.get("/auth/me", headers=register()).json()
+        response = client.post(f"/projects/{project_id}/members", params={"member_email": me["email"]}, headers=headers)
+        assert response.status_code == 201, response.text
+        return me["id"]
+
+    here, there = member_of(board["project"]["id"]), member_of(other_project["id"])
+    ids = add_tasks(client, headers, column, "ABCD")
+
+    response = client.post("/tasks/update:batch", json={"tasks": [
+        {"id": ids["A"], "column_id": other_column, "assignee_id": there},
+        {"id": ids["B"], "column_id": other_column, "assignee_id": here},
+    ]}, headers=headers)
+    assert [result["status_code"] for result in response.json()] == [200, 403]
+
+    response = client.put(f"/tasks/{ids['C']}", json={"column_id": other_column, "assignee_id": there}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["assignee_id"] == there
+    response = client.put(f"/tasks/{ids['D']}", json={"column_id": other_column, "assignee_id": here}, headers=headers)
+    assert response.status_code == 403
+    assert titles(client, headers, column) == ["B", "D"]
@@ -0,0 +1,127 @@
+from app import changes, models
+from app.changes import change_log_compactor, compact_change_log
+from app.database import SessionLocal
+from test_ranking import add_tasks
+
+def changes_since(client, headers, board_id, since=None, **params):
+    response = client.get(f"/boards/{board_id}/changes", params={**params, **({"since": since} if since is not None else {})}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_first_call_returns_a_cursor_only(client, headers, board):
+    board_id = board["board"]["id"]
+    body = changes_since(client, headers, board_id)
+    assert body["tasks"] == [] and body["next_since"] > 0
+    again = changes_since(client, headers, board_id, body["next_since"])
+    assert again["next_since"] == body["next_since"] and again["tasks"] == [] and again["deleted"] == {}
+
+def test_writes_show_up_once_with_their_latest_state(client, headers, board):
+    board_id = board["board"]["id"]
+    column, other = (column["id"] for column in board["columns"])
+    since = changes_since(client, headers, board_id)["next_since"]
+
+    ids = add_tasks(client, headers, column, "AB")
+    comment = client.post("/comments", json={"task_id": ids["A"], "content": "Hi"}, headers=headers).json()
+    body = changes_since(client, headers, board_id, since)
+    assert {task["id"] for task in body["tasks"]} == set(ids.values())
+    assert [c["id"] for c in body["comments"]] == [comment["id"]]
+    since = body["next_since"]
+
+    client.put(f"/tasks/{ids['A']}", json={"title": "A2"}, headers=headers)
+    client.put(f"/tasks/{ids['A']}", json={"title": "A3"}, headers=headers)
+    client.delete(f"/tasks/{ids['B']}", headers=headers)
+    client.put(f"/columns/{other}", json={"name": "Renamed", "position": 3}, headers=headers)
+    client.put(f"/boards/{board_id}", json={"name": "Board 2", "position": 0}, headers=headers)
+    body = changes_since(client, headers, board_id, since)
+    assert [task["title"] for task in body["tasks"]] == ["A3"]
+    assert body["deleted"] == {"tasks": [ids["B"]]}
+    assert [c["name"] for c in body["columns"]] == ["Renamed"]
+    assert body["board"]["name"] == "Board 2"
+
+    page = changes_since(client, headers, board_id, since, limit=1)
+    assert page["has_more"] and page["next_since"] > since
+
+def test_task_moved_to_another_board_is_deleted_from_the_old_one(client, headers, board):
+    board_id = board["board"]["id"]
+    task_id = add_tasks(client, headers, board["columns"][0]["id"], "A")["A"]
+    other_board = client.post("/boards", json={"name": "Other", "position": 1, "project_id": board["project"]["id"]}, headers=headers).json()
+    other_column = client.post("/columns", json={"name": "Other", "position": 0, "board_id": other_board["id"]}, headers=headers).json()
+    since = changes_since(client, headers, board_id)["next_since"]
+    since_other = changes_since(client, headers, other_board["id"])["next_since"]
+
+    client.post(f"/tasks/{task_id}/move", params={"new_column_id": other_column["id"]}, headers=headers)
+    assert changes_since(client, headers, board_id, since)["deleted"] == {"tasks": [task_id]}
+    assert [task["id"] for task in changes_since(client, headers, other_board["id"], since_other)["tasks"]] == [task_id]
+
+def test_compaction_keeps_the_answer(client, headers, board):
+    board_id = board["board"]["id"]
+    since = changes_since(client, headers, board_id)["next_since"]
+    ids = add_tasks(client, headers, board["columns"][0]["id"], "AB")
+    for title in ("A2", "A3", "A4"):
+        client.put(f"/tasks/{ids['A']}", json={"title": title}, headers=headers)
+    before = changes_since(client, headers, board_id, since)
+
+    db = SessionLocal()
+    try:
+        entries = db.query(models.Change).filter(models.Change.board_id == board_id).count()
+        result = compact_change_log(db)
+        db.commit()
+        assert db.query(models.Change).filter(models.Change.board_id == board_id).count() < entries
+    finally:
+        db.close()
+    assert result["collapsed"] > 0
+
+    after = changes_since(client, headers, board_id, since)
+    assert {**after, "next_since": None} == {**before, "next_since": None}
+
+def test_expired_cursor_is_gone(client, headers, board, monkeypatch):
+    board_id = board["board"]["id"]
+    since = changes_since(client, headers, board_id)["next_since"]
+    add_tasks(client, headers, board["columns"][0]["id"], "A")
+
+    monkeypatch.setattr(changes, "CHANGE_LOG_RETENTION_SECONDS", -60)
+    change_log_compactor.run_once()
+    monkeypatch.undo()
+    assert client.get(f"/boards/{board_id}/changes", params={"since": since}, headers=headers).status_code == 410
+
+    latest = changes_since(client, headers, board_id)["next_since"]
+    add_tasks(client, headers, board["columns"][0]["id"], "Z")
+    body = changes_since(client, headers, board_id, latest)
+    assert [task["title"] for task in body["tasks"]] == ["Z"] and body["next_since"] > latest
+
+def test_deleting_a_column_logs_its_tasks_and_comments(client, headers, board):
+    board_id, column = board["board"]["id"], board["columns"][0]["id"]
+    ids = add_tasks(client, headers, column, "AB")
+    comment = client.post("/comments", json={"task_id": ids["A"], "content": "Hi"}, headers=headers).json()
+    since = changes_since(client, headers, board_id)["next_since"]
+
+    assert client.delete(f"/columns/{column}", headers=headers).status_code == 204
+    assert changes_since(client, headers, board_id, since)["deleted"] == {
+        "columns": [column], "tasks": sorted(ids.values()), "comments": [comment["id"]],
+    }
+    assert client.get(f"/tasks/{ids['A']}", headers=headers).status_code == 404
+
+def test_deleted_board_stays_in_its_feed(client, headers, board):
+    board_id = board["board"]["id"]
+    columns = sorted(column["id"] for column in board["columns"])
+    task_id = add_tasks(client, headers, columns[0], "A")["A"]
+    since = changes_since(client, headers, board_id)["next_since"]
+
+    assert client.delete(f"/boards/{board_id}", headers=headers).status_code == 204
+    body = changes_since(client, headers, board_id, since)
+    assert body["board"] is None
+    assert body["deleted"] == {"boards": [board_id], "columns": columns, "tasks": [task_id]}
+    assert client.get(f"/boards/{board_id}", headers=headers).status_code == 404
+    assert client.get("/boards/missing/changes", headers=headers).status_code == 404
+
+def test_deleting_a_project_logs_its_boards(client, headers, board):
+    board_id = board["board"]["id"]
+    columns = sorted(column["id"] for column in board["columns"])
+    task_id = add_tasks(client, headers, columns[0], "A")["A"]
+    since = changes_since(client, headers, board_id)["next_since"]
+
+    assert client.delete(f"/projects/{board['project']['id']}", headers=headers).status_code == 204
+    body = changes_since(client, headers, board_id, since)
+    assert body["board"] is None
+    assert body["deleted"] == {"boards": [board_id], "columns": columns, "tasks": [task_id]}
+    assert client.get(f"/projects/{board['project']['id']}", headers=headers).status_code == 404
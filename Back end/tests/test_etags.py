@@ -0,0 +1,78 @@
+from app.etags import etag_matches, make_etag
+from test_ranking import add_tasks
+import pytest
+
+def test_etag_comparison():
+    etag = make_etag(3, "board", "b1")
+    assert etag != make_etag(4, "board", "b1") and etag != make_etag(3, "board", "b2")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(f"W/{etag}", etag)
+    assert etag_matches(f"W/{etag}", etag, weak=True)
+    assert not etag_matches(None, etag)
+
+@pytest.fixture
+def urls(client, headers, board):
+    board_id, column = board["board"]["id"], board["columns"][0]["id"]
+    task_id = add_tasks(client, headers, column, "A")["A"]
+    return [
+        f"/boards/{board_id}", f"/boards/{board_id}/snapshot", f"/columns/board/{board_id}", f"/columns/{column}",
+        f"/tasks/column/{column}", f"/comments/task/{task_id}", f"/tasks/{task_id}",
+    ]
+
+def test_reads_answer_304_while_unchanged(client, headers, urls):
+    for url in urls:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200 and response.headers["etag"], url
+        again = client.get(url, headers={**headers, "If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304 and again.content == b"", url
+
+def test_etag_depends_on_query_parameters(client, headers, board):
+    url = f"/tasks/column/{board['columns'][0]['id']}"
+    etag = client.get(url, headers=headers).headers["etag"]
+    assert client.get(url, params={"limit": 1}, headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_writes_change_the_etags_they_affect(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    task_id = add_tasks(client, headers, column, "A")["A"]
+    snapshot = client.get(f"/boards/{board['board']['id']}/snapshot", headers=headers).headers["etag"]
+    comments = client.get(f"/comments/task/{task_id}", headers=headers).headers["etag"]
+
+    client.post("/comments", json={"task_id": task_id, "content": "Hi"}, headers=headers)
+    assert client.get(f"/comments/task/{task_id}", headers={**headers, "If-None-Match": comments}).status_code == 200
+    client.post("/tasks/update:batch", json={"tasks": [{"id": task_id, "column_id": other}]}, headers=headers)
+    assert client.get(f"/boards/{board['board']['id']}/snapshot", headers={**headers, "If-None-Match": snapshot}).status_code == 200
+
+def test_if_match_rejects_stale_writes(client, headers, board):
+    board_id, column = board["board"]["id"], board["columns"][0]["id"]
+    task_id = add_tasks(client, headers, column, "A")["A"]
+    etag = client.get(f"/tasks/{task_id}", headers=headers).headers["etag"]
+    assert client.put(f"/tasks/{task_id}", json={"title": "B"}, headers={**headers, "If-Match": etag}).status_code == 200
+    assert client.put(f"/tasks/{task_id}", json={"title": "C"}, headers={**headers, "If-Match": etag}).status_code == 412
+    assert client.get(f"/tasks/{task_id}", headers=headers).json()["title"] == "B"
+
+    etag = client.get(f"/boards/{board_id}", headers=headers).headers["etag"]
+    assert client.put(f"/boards/{board_id}", json={"name": "B", "position": 0}, headers={**headers, "If-Match": etag}).status_code == 200
+    assert client.put(f"/boards/{board_id}", json={"name": "C", "position": 0}, headers={**headers, "If-Match": etag}).status_code == 412
+
+def test_if_match_on_column_writes(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    etag = client.get(f"/columns/{column}", headers=headers).headers["etag"]
+    assert client.put(f"/columns/{column}", json={"name": "A", "position": 0}, headers={**headers, "If-Match": etag}).status_code == 200
+    assert client.put(f"/columns/{column}", json={"name": "B", "position": 0}, headers={**headers, "If-Match": etag}).status_code == 412
+    assert client.delete(f"/columns/{column}", headers={**headers, "If-Match": etag}).status_code == 412
+
+    etag = client.get(f"/columns/{other}", headers=headers).headers["etag"]
+    assert client.delete(f"/columns/{other}", headers={**headers, "If-Match": etag}).status_code == 204
+
+def test_if_match_on_comment_writes_uses_the_task_etag(client, headers, board):
+    task_id = add_tasks(client, headers, board["columns"][0]["id"], "A")["A"]
+    comment = client.post("/comments", json={"task_id": task_id, "content": "Hi"}, headers=headers).json()
+    etag = client.get(f"/tasks/{task_id}", headers=headers).headers["etag"]
+    url = f"/comments/{comment['id']}"
+    assert client.put(url, params={"content": "Edited"}, headers={**headers, "If-Match": etag}).status_code == 200
+    assert client.put(url, params={"content": "Again"}, headers={**headers, "If-Match": etag}).status_code == 412
+    assert client.delete(url, headers={**headers, "If-Match": etag}).status_code == 412
+
+    etag = client.get(f"/tasks/{task_id}", headers=headers).headers["etag"]
+    assert client.delete(url, headers={**headers, "If-Match": etag}).status_code == 204
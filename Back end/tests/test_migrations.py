@@ -0,0 +1,144 @@
+"""Upgrade a database built by the release before Alembic to the latest revision.
+
+The baseline tables are declared here as that release's models created them
+(Base.metadata.create_all, tasks ordered by an integer position), so the test
+does not depend on revision 0001 matching them. Always runs on its own SQLite
+file, whatever TEST_DATABASE_URL says.
+"""
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, create_engine, func, insert, inspect, select
+)
+from app.database import run_migrations
+from app.ranking import evenly_spaced_ranks
+import os
+import pytest
+
+baseline = MetaData()
+
+def timestamps() -> list:
+    return [Column("created_at", DateTime(timezone=True), server_default=func.now()), Column("updated_at", DateTime(timezone=True))]
+
+Table(
+    "users", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("name", String(255)),
+    Column("hashed_password", String(255), nullable=False),
+    Column("avatar", String(500)),
+    *timestamps(),
+)
+Table(
+    "projects", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("description", Text),
+    *timestamps(),
+)
+Table(
+    "project_members", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("role", String(50), nullable=False),
+    Column("user_id", String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("project_id", String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "boards", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("project_id", String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+    Column("position", Integer, nullable=False),
+    *timestamps(),
+)
+Table(
+    "columns", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("board_id", String(36), ForeignKey("boards.id", ondelete="CASCADE"), nullable=False),
+    Column("position", Integer, nullable=False),
+    *timestamps(),
+)
+Table(
+    "tasks", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text),
+    Column("column_id", String(36), ForeignKey("columns.id", ondelete="CASCADE"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("priority", String(20)),
+    Column("due_date", DateTime(timezone=True)),
+    Column("created_by_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("assignee_id", String(36), ForeignKey("users.id")),
+    *timestamps(),
+)
+Table(
+    "labels", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("color", String(50), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "task_labels", baseline,
+    Column("task_id", String(36), ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
+    Column("label_id", String(36), ForeignKey("labels.id", ondelete="CASCADE"), primary_key=True),
+)
+Table(
+    "comments", baseline,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("content", Text, nullable=False),
+    Column("task_id", String(36), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False),
+    Column("user_id", String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    *timestamps(),
+)
+
+# Column -> task ids by position; ids deliberately out of position order
+POSITIONS = {"c1": ["t3", "t1", "t2"], "c2": ["t5", "t4"], "c3": []}
+
+@pytest.fixture
+def upgraded(tmp_path):
+    """A baseline database with one project, upgraded to head; yields its engine"""
+    engine = create_engine("sqlite:///" + os.path.join(tmp_path, "baseline.db"))
+    baseline.create_all(engine)
+    tables = baseline.tables
+    with engine.begin() as conn:
+        conn.execute(insert(tables["users"]), [{"id": "u1", "email": "u1@tests.example.com", "hashed_password": "x"}])
+        conn.execute(insert(tables["projects"]), [{"id": "p1", "name": "Project"}])
+        conn.execute(insert(tables["project_members"]), [{"id": "m1", "role": "owner", "user_id": "u1", "project_id": "p1"}])
+        conn.execute(insert(tables["boards"]), [{"id": "b1", "name": "Board", "project_id": "p1", "position": 0}])
+        conn.execute(
+            insert(tables["columns"]),
+            [{"id": column_id, "name": column_id, "board_id": "b1", "position": i} for i, column_id in enumerate(POSITIONS)]
+        )
+        conn.execute(insert(tables["tasks"]), [
+            {"id": task_id, "title": task_id, "column_id": column_id, "position": position, "created_by_id": "u1"}
+            for column_id, task_ids in POSITIONS.items()
+            for position, task_id in enumerate(task_ids)
+        ])
+        conn.execute(insert(tables["comments"]), [{"id": "k1", "content": "Comment", "task_id": "t1", "user_id": "u1"}])
+    try:
+        run_migrations(engine)
+        yield engine
+    finally:
+        engine.dispose()
+
+def test_baseline_database_upgrades_to_head(upgraded):
+    inspector = inspect(upgraded)
+    columns = {column["name"] for column in inspector.get_columns("tasks")}
+    assert "rank" in columns and "position" not in columns
+    assert {"board_id", "project_id", "version"} <= columns
+    assert "ix_tasks_column_id_rank" in {index["name"] for index in inspector.get_indexes("tasks")}
+    with upgraded.connect() as conn:
+        assert conn.exec_driver_sql("SELECT project_id FROM comments WHERE id = 'k1'").scalar() == "p1"
+
+def test_task_positions_become_ranks_in_the_same_order(upgraded):
+    tasks = MetaData()
+    tasks.reflect(upgraded, only=["tasks"])
+    tasks = tasks.tables["tasks"]
+    with upgraded.connect() as conn:
+        for column_id, task_ids in POSITIONS.items():
+            rows = conn.execute(
+                select(tasks.c.id, tasks.c.rank).where(tasks.c.column_id == column_id).order_by(tasks.c.rank)
+            ).all()
+            assert [row.id for row in rows] == task_ids
+            assert [row.rank for row in rows] == evenly_spaced_ranks(len(task_ids))
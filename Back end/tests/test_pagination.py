@@ -0,0 +1,61 @@
+from fastapi import HTTPException
+from app.pagination import PAGE_MAX_LIMIT, decode_cursor, encode_cursor
+from test_ranking import add_tasks
+import pytest
+
+def walk(client, headers, url, limit, **params):
+    """Follow next_cursor to the end; returns every item and the number of pages"""
+    items, cursor, pages = [], None, 0
+    while True:
+        query = {**params, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        items += body["items"]
+        cursor = body["next_cursor"]
+        pages += 1
+        if not cursor:
+            return items, pages
+
+def test_cursor_round_trip():
+    values = ["i", "2f6a4b1e-0000-4000-8000-000000000000"]
+    assert decode_cursor(encode_cursor(values), ["rank", "id"]) == values
+
+@pytest.mark.parametrize("cursor", ["zzz", encode_cursor(["only one value"]), encode_cursor({"rank": "i"}), "!!"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, ["rank", "id"])
+    assert error.value.status_code == 400
+
+def test_column_tasks_page_in_rank_order(client, headers, board):
+    column = board["columns"][0]["id"]
+    client.post("/tasks/create:batch", json={"tasks": [{"title": f"T{i}", "column_id": column} for i in range(25)]}, headers=headers)
+    items, pages = walk(client, headers, f"/tasks/column/{column}", 7)
+    assert [task["title"] for task in items] == [f"T{i}" for i in range(25)]
+    assert pages == 4
+
+def test_comments_page_without_gaps_or_repeats(client, headers, board):
+    task_id = add_tasks(client, headers, board["columns"][0]["id"], "A")["A"]
+    for i in range(11):
+        client.post("/comments", json={"task_id": task_id, "content": f"Comment {i}"}, headers=headers)
+    items, _ = walk(client, headers, f"/comments/task/{task_id}", 3)
+    assert sorted(comment["content"] for comment in items) == sorted(f"Comment {i}" for i in range(11))
+    assert len({comment["id"] for comment in items}) == 11
+
+def test_other_lists_page(client, headers, board):
+    for i in range(4):
+        client.post("/projects", json={"name": f"Project {i}"}, headers=headers)
+    assert len(walk(client, headers, "/projects", 2)[0]) == 5
+    assert len(walk(client, headers, f"/columns/board/{board['board']['id']}", 1)[0]) == 2
+    assert len(walk(client, headers, f"/boards/project/{board['project']['id']}", 1)[0]) == 1
+    assert len(walk(client, headers, f"/projects/{board['project']['id']}/members", 1)[0]) == 1
+
+def test_limits(client, headers, board):
+    column = board["columns"][0]["id"]
+    assert client.get("/projects", params={"cursor": "zzz"}, headers=headers).status_code == 400
+    assert client.get("/projects", params={"limit": 0}, headers=headers).status_code == 422
+    client.post("/tasks/create:batch", json={
+        "tasks": [{"title": f"T{i}", "column_id": column} for i in range(PAGE_MAX_LIMIT + 1)]
+    }, headers=headers)
+    body = client.get(f"/tasks/column/{column}", params={"limit": 10000}, headers=headers).json()
+    assert len(body["items"]) == PAGE_MAX_LIMIT and body["next_cursor"]
@@ -0,0 +1,218 @@
+"""Check that every read endpoint's queries are served by indexes.
+
+Seeds a small project in a transaction that is rolled back at the end, calls
+each endpoint function with a session on that transaction, records the SQL it
+emits and runs EXPLAIN on every SELECT. A plan with a full table scan fails
+the endpoint's test. Runs against the test database (see conftest.py); point
+TEST_DATABASE_URL at PostgreSQL to check its plans:
+
+    TEST_DATABASE_URL=postgresql://... pytest tests/test_query_plans.py
+
+PostgreSQL plans are taken with enable_seqscan off, so a Seq Scan in the
+output means no index can serve the query, not just that the table is small.
+"""
+from datetime import datetime, timezone
+from fastapi import Response
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app import auth, models
+from app.access import access_cache
+from app.database import engine
+from app.response_cache import response_cache
+from app.routers import boards, columns, comments, projects, tasks
+import asyncio
+import inspect
+import json
+import pytest
+import uuid
+
+def new_id() -> str:
+    return str(uuid.uuid4())
+
+def seed(db: Session) -> dict:
+    """Create a user with one project, board, two columns, tasks, comments, a label, change log and activity entries"""
+    user = models.User(id=new_id(), email=f"{new_id()}@plans.example.com", name="Plans", hashed_password="x")
+    project = models.Project(id=new_id(), name="Plans")
+    board = models.Board(id=new_id(), name="Board", project_id=project.id, position=0)
+    column_ids = [new_id(), new_id()]
+    task_ids = [new_id() for _ in range(3)]
+    comment_ids = [new_id() for _ in range(3)]
+    label = models.Label(id=new_id(), name="Label", color="red")
+
+    db.add_all([user, project, label])
+    db.flush()
+    db.add(models.ProjectMember(id=new_id(), role="owner", user_id=user.id, project_id=project.id))
+    db.add(board)
+    db.flush()
+    db.add_all([
+        models.BoardColumn(id=column_id, name=f"Column {i}", board_id=board.id, position=i)
+        for i, column_id in enumerate(column_ids)
+    ])
+    db.flush()
+    db.add_all([
+        models.Task(
+            id=task_id,
+            title=f"Task {i}",
+            column_id=column_ids[0],
+            board_id=board.id,
+            project_id=project.id,
+            rank="hijk"[i],
+            created_by_id=user.id
+        )
+        for i, task_id in enumerate(task_ids)
+    ])
+    db.flush()
+    db.add_all([
+        models.Comment(id=comment_id, content=f"Comment {i}", task_id=task_ids[0], project_id=project.id, user_id=user.id)
+        for i, comment_id in enumerate(comment_ids)
+    ])
+    db.execute(models.task_labels.insert(), [{"task_id": task_ids[0], "label_id": label.id}])
+    db.execute(models.Change.__table__.insert(), [
+        {"board_id": board.id, "entity_type": entity_type, "entity_id": entity_id, "action": "created"}
+        for entity_type, entity_id in [
+            ("board", board.id),
+            *[("column", column_id) for column_id in column_ids],
+            *[("task", task_id) for task_id in task_ids],
+            *[("comment", comment_id) for comment_id in comment_ids],
+        ]
+    ])
+    db.execute(models.Activity.__table__.insert(), [
+        {
+            "id": new_id(),
+            "project_id": project.id,
+            "user_id": user.id,
+            "action": "created",
+            "entity_type": "task",
+            "entity_id": task_id,
+            "created_at": datetime.now(timezone.utc),
+        }
+        for task_id in task_ids
+    ])
+    db.flush()
+
+    return {
+        "user": user,
+        "project_id": project.id,
+        "board_id": board.id,
+        "column_id": column_ids[0],
+        "task_id": task_ids[0],
+        "token": auth.create_access_token({"sub": user.id}),
+        # Just before the seeded entries, so earlier compaction can't have passed it
+        "since": db.query(func.min(models.Change.seq)).filter(models.Change.board_id == board.id).scalar() - 1,
+    }
+
+def run(result):
+    """The result of an endpoint call, awaiting it for async endpoints"""
+    return asyncio.run(result) if inspect.iscoroutine(result) else result
+
+def second_page(endpoint, key: str, **headers):
+    """Call a paginated endpoint for its second page, so the keyset predicate is planned too"""
+    def call(db, ctx):
+        first = run(endpoint(
+            ctx[key], Response(), cursor=None, limit=1, if_none_match=None, **headers, db=db, current_user=ctx["user"]
+        ))
+        next_cursor = json.loads(first.body)["next_cursor"]
+        return endpoint(
+            ctx[key], Response(), cursor=next_cursor, limit=1, if_none_match=None, **headers, db=db, current_user=ctx["user"]
+        )
+    return call
+
+def activity_second_page(db, ctx):
+    first = projects.get_project_activity(ctx["project_id"], cursor=None, limit=1, db=db, current_user=ctx["user"])
+    return projects.get_project_activity(
+        ctx["project_id"], cursor=first["next_cursor"], limit=1, db=db, current_user=ctx["user"]
+    )
+
+# Endpoint name -> call(db, ctx); every SELECT issued during the call is checked
+ENDPOINTS = {
+    "GET /projects": lambda db, ctx: projects.get_projects(cursor=None, limit=None, db=db, current_user=ctx["user"]),
+    "GET /projects/{id}": lambda db, ctx: projects.get_project(ctx["project_id"], db=db, current_user=ctx["user"]),
+    "GET /projects/{id}/members": lambda db, ctx: projects.get_project_members(
+        ctx["project_id"], cursor=None, limit=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /projects/{id}/activity": activity_second_page,
+    "GET /projects/{id}/search": lambda db, ctx: projects.search_project_content(
+        ctx["project_id"], q="task comment", cursor=None, limit=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /boards/project/{id}": lambda db, ctx: boards.get_project_boards(
+        ctx["project_id"], cursor=None, limit=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /boards/{id}": lambda db, ctx: boards.get_board(
+        ctx["board_id"], Response(), if_none_match=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /boards/{id}/snapshot": lambda db, ctx: boards.get_board_snapshot(
+        ctx["board_id"], Response(), if_none_match=None, accept=None, accept_encoding="identity", db=db, current_user=ctx["user"]
+    ),
+    "GET /boards/{id}/changes": lambda db, ctx: boards.get_board_changes(
+        ctx["board_id"], since=ctx["since"], limit=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /boards/{id}/changes (cursor)": lambda db, ctx: boards.get_board_changes(
+        ctx["board_id"], since=None, limit=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /columns/board/{id}": second_page(columns.get_board_columns, "board_id"),
+    "GET /columns/{id}": lambda db, ctx: columns.get_column(
+        ctx["column_id"], Response(), if_none_match=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /tasks/column/{id}": second_page(tasks.get_column_tasks, "column_id", accept=None, accept_encoding="identity"),
+    "GET /tasks/{id}": lambda db, ctx: tasks.get_task(
+        ctx["task_id"], Response(), if_none_match=None, db=db, current_user=ctx["user"]
+    ),
+    "GET /comments/task/{id}": second_page(comments.get_task_comments, "task_id"),
+    "GET /auth/me (token lookup)": lambda db, ctx: auth.get_current_user(ctx["token"], db=db),
+}
+
+def explain(conn, statement: str, parameters) -> list:
+    """Return the plan lines for a statement and whether each one is a full scan"""
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).scalars().all()
+        return [(line, "Seq Scan" in line) for line in rows]
+    # FTS5 lookups show up as "SCAN <table> VIRTUAL TABLE INDEX ..."
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [
+        (row[-1], row[-1].startswith("SCAN ") and " USING " not in row[-1] and " VIRTUAL TABLE INDEX " not in row[-1])
+        for row in rows
+    ]
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """A connection, a session and the seeded ids, all inside one transaction that is rolled back"""
+    if engine.dialect.name not in ("postgresql", "sqlite"):
+        pytest.skip(f"Query plan checks are not implemented for {engine.dialect.name}")
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            if conn.dialect.name == "postgresql":
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            yield conn, db, seed(db)
+        finally:
+            transaction.rollback()
+
+@pytest.mark.parametrize("name", ENDPOINTS)
+def test_queries_use_indexes(seeded, name):
+    conn, db, ctx = seeded
+    access_cache.clear()
+    response_cache.clear()
+    auth.principal_cache.clear()
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        run(ENDPOINTS[name](db, ctx))
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+
+    assert statements, f"{name} issued no queries"
+    plans = [(statement, explain(conn, statement, parameters)) for statement, parameters in statements]
+    full_scans = [
+        f"{line}\n    in: {' '.join(statement.split())[:200]}"
+        for statement, plan in plans
+        for line, full_scan in plan
+        if full_scan
+    ]
+    assert not full_scans, "Full table scans:\n" + "\n".join(full_scans)
@@ -0,0 +1,112 @@
+from app.database import SessionLocal
+from app.ranking import evenly_spaced_ranks, rank_between, rebalance_column
+import pytest
+
+def titles(client, headers, column_id):
+    response = client.get(f"/tasks/column/{column_id}", params={"limit": 200}, headers=headers)
+    return [task["title"] for task in response.json()["items"]]
+
+def add_tasks(client, headers, column_id, titles):
+    return {
+        title: client.post("/tasks", json={"title": title, "column_id": column_id}, headers=headers).json()["id"]
+        for title in titles
+    }
+
+@pytest.mark.parametrize("before, after", [
+    (None, None), (None, "i"), ("i", None), ("a", "b"), ("a", "a1"), ("az", "b"), ("0", "01"), ("y", "z"), ("zz", None),
+])
+def test_rank_between_sorts_strictly_between(before, after):
+    rank = rank_between(before, after)
+    assert before is None or before < rank
+    assert after is None or rank < after
+    assert not rank.endswith("0")
+
+@pytest.mark.parametrize("before, after", [("b", "a"), ("a", "a")])
+def test_rank_between_rejects_unordered_keys(before, after):
+    with pytest.raises(ValueError):
+        rank_between(before, after)
+
+def test_repeated_appends_stay_short():
+    rank = None
+    for _ in range(100):
+        rank = rank_between(rank, None)
+    assert len(rank) <= 4
+
+def test_evenly_spaced_ranks_are_sorted_and_fixed_width():
+    ranks = evenly_spaced_ranks(1000)
+    assert ranks == sorted(set(ranks))
+    assert len({len(rank) for rank in ranks}) == 1
+
+def test_create_and_move_between_anchors(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    ids = add_tasks(client, headers, column, "ABC")
+    assert titles(client, headers, column) == list("ABC")
+
+    response = client.post("/tasks", json={"title": "X", "column_id": column, "before_task_id": ids["A"]}, headers=headers)
+    assert response.status_code == 201, response.text
+    response = client.post("/tasks", json={"title": "Y", "column_id": column, "after_task_id": ids["A"]}, headers=headers)
+    assert response.status_code == 201, response.text
+    assert titles(client, headers, column) == list("XAYBC")
+
+    response = client.post(f"/tasks/{ids['C']}/move", params={"new_column_id": column, "after_task_id": ids["A"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert titles(client, headers, column) == list("XACYB")
+
+    response = client.post(f"/tasks/{ids['C']}/move", params={"new_column_id": other}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert titles(client, headers, other) == ["C"]
+
+def test_move_rejects_anchor_in_another_column(client, headers, board):
+    column, other = (column["id"] for column in board["columns"])
+    ids = add_tasks(client, headers, column, "AB")
+    response = client.post(f"/tasks/{ids['A']}/move", params={"new_column_id": other, "before_task_id": ids["B"]}, headers=headers)
+    assert response.status_code == 400
+
+def test_both_anchors_must_be_adjacent_and_in_order(client, headers, board):
+    column = board["columns"][0]["id"]
+    ids = add_tasks(client, headers, column, "ABCD")
+
+    def create(after, before):
+        return client.post("/tasks", json={
+            "title": "X", "column_id": column, "after_task_id": ids[after], "before_task_id": ids[before]
+        }, headers=headers)
+
+    def move(after, before):
+        return client.post(f"/tasks/{ids['D']}/move", params={
+            "new_column_id": column, "after_task_id": ids[after], "before_task_id": ids[before]
+        }, headers=headers)
+
+    assert create("A", "C").status_code == 400
+    assert create("B", "A").status_code == 400
+    assert create("A", "A").status_code == 400
+    assert move("C", "A").status_code == 400
+    assert "not adjacent" in move("A", "C").json()["detail"]
+    assert titles(client, headers, column) == list("ABCD")
+
+    response = create("A", "B")
+    assert response.status_code == 201
+    ids["X"] = response.json()["id"]
+    assert move("X", "B").status_code == 200
+    assert titles(client, headers, column) == list("AXDBC")
+    # The moving task itself doesn't count as being between its anchors
+    assert move("X", "B").status_code == 200
+
+def test_rebalance_shortens_keys_and_keeps_order(client, headers, board):
+    column = board["columns"][0]["id"]
+    ids = add_tasks(client, headers, column, "ABXY")
+    # Splitting the same gap again and again grows the keys
+    for _ in range(40):
+        for title in "XY":
+            client.post(f"/tasks/{ids[title]}/move", params={"new_column_id": column, "before_task_id": ids["B"]}, headers=headers)
+    order = titles(client, headers, column)
+
+    db = SessionLocal()
+    try:
+        assert rebalance_column(column, db) == board["board"]["id"]
+        db.commit()
+    finally:
+        db.close()
+
+    tasks = client.get(f"/tasks/column/{column}", params={"limit": 200}, headers=headers).json()["items"]
+    assert [task["title"] for task in tasks] == order
+    assert max(len(task["rank"]) for task in tasks) == 1
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.database import engine
+from app.response_cache import response_cache
+from test_ranking import add_tasks
+
+@contextmanager
+def count_queries():
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+def test_repeated_reads_are_served_from_the_cache(client, headers, board):
+    project_id, board_id, column = board["project"]["id"], board["board"]["id"], board["columns"][0]["id"]
+    task_id = add_tasks(client, headers, column, "A")["A"]
+    for url in [
+        f"/projects/{project_id}", f"/boards/{board_id}", f"/boards/{board_id}/snapshot", f"/columns/{column}",
+        f"/tasks/column/{column}", f"/tasks/{task_id}", f"/comments/task/{task_id}", "/projects",
+    ]:
+        first = client.get(url, headers=headers)
+        with count_queries() as statements:
+            again = client.get(url, headers=headers)
+        assert again.content == first.content and again.headers.get("etag") == first.headers.get("etag"), url
+        assert statements == [], url
+
+def test_writes_invalidate_cached_reads(client, headers, board):
+    project_id, column = board["project"]["id"], board["columns"][0]["id"]
+    task_id = add_tasks(client, headers, column, "A")["A"]
+    for url in [f"/tasks/{task_id}", f"/tasks/column/{column}", f"/comments/task/{task_id}", f"/columns/{column}", "/projects"]:
+        client.get(url, headers=headers)
+
+    client.put(f"/tasks/{task_id}", json={"title": "B"}, headers=headers)
+    assert client.get(f"/tasks/{task_id}", headers=headers).json()["title"] == "B"
+    assert [task["title"] for task in client.get(f"/tasks/column/{column}", headers=headers).json()["items"]] == ["B"]
+    client.post("/comments", json={"task_id": task_id, "content": "Hi"}, headers=headers)
+    assert len(client.get(f"/comments/task/{task_id}", headers=headers).json()["items"]) == 1
+    client.put(f"/columns/{column}", json={"name": "Renamed", "position": 0}, headers=headers)
+    assert client.get(f"/columns/{column}", headers=headers).json()["name"] == "Renamed"
+    client.put(f"/projects/{project_id}", json={"name": "Renamed"}, headers=headers)
+    assert "Renamed" in [project["name"] for project in client.get("/projects", headers=headers).json()["items"]]
+    client.post("/tasks/delete:batch", json={"task_ids": [task_id]}, headers=headers)
+    assert client.get(f"/tasks/{task_id}", headers=headers).status_code == 404
+
+def test_project_list_is_per_user(client, headers, register):
+    client.get("/projects", headers=headers)
+    other = register()
+    client.post("/projects", json={"name": "Theirs"}, headers=other)
+    assert "Theirs" not in [project["name"] for project in client.get("/projects", headers=headers).json()["items"]]
+
+def test_read_that_overlaps_an_invalidation_is_not_stored():
+    started = response_cache.sequence()
+    response_cache.invalidate([("board", "overlapping")])
+    response_cache.set(("overlapping",), b"old", None, [("board", "overlapping")], started)
+    assert response_cache.get(("overlapping",)) is None
+    response_cache.set(("overlapping",), b"new", None, [("board", "overlapping")], response_cache.sequence())
+    assert response_cache.get(("overlapping",)).body == b"new"
@@ -0,0 +1,37 @@
+from test_pagination import walk
+
+def search(client, headers, project_id, q, **params):
+    response = client.get(f"/projects/{project_id}/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_title_matches_rank_first_and_snippets_are_escaped(client, headers, board):
+    project_id, column = board["project"]["id"], board["columns"][0]["id"]
+    title_match = client.post("/tasks", json={"title": "Fix the login <bug>", "column_id": column}, headers=headers).json()
+    body_match = client.post("/tasks", json={"title": "Docs", "description": "mention the login flow", "column_id": column}, headers=headers).json()
+    client.post("/comments", json={"task_id": body_match["id"], "content": "login works on staging"}, headers=headers)
+
+    items = search(client, headers, project_id, "login")["items"]
+    assert len(items) == 3
+    assert items[0]["id"] == title_match["id"]
+    assert "<mark>login</mark>" in items[0]["snippet"] and "&lt;bug&gt;" in items[0]["snippet"]
+
+def test_pages_through_tied_scores(client, headers, board):
+    project_id, column = board["project"]["id"], board["columns"][0]["id"]
+    # Identical documents score the same, so every page boundary falls inside a tie
+    tasks = client.post("/tasks/create:batch", json={
+        "tasks": [{"title": "Tied search result", "column_id": column} for _ in range(12)]
+    }, headers=headers).json()
+    for task in tasks[:5]:
+        client.post("/comments", json={"task_id": task["id"], "content": "Tied search result"}, headers=headers)
+
+    expected = search(client, headers, project_id, "tied", limit=50)["items"]
+    assert len(expected) == 17
+
+    items, pages = walk(client, headers, f"/projects/{project_id}/search", 4, q="tied")
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    assert pages == 5
+
+def test_query_without_words_is_rejected(client, headers, board):
+    response = client.get(f"/projects/{board['project']['id']}/search", params={"q": "!!"}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+from app import schemas, serialization, wire
+from app.database import SessionLocal
+from app.routers.boards import load_snapshot, load_snapshot_rows
+from app.serialization import serialize
+from app.wire import COLUMNAR_JSON, MSGPACK, to_columnar
+from test_ranking import add_tasks
+import pytest
+
+@pytest.fixture
+def urls(client, headers, board):
+    column = board["columns"][0]["id"]
+    add_tasks(client, headers, column, [f"Task {i}" for i in range(5)])
+    return [f"/boards/{board['board']['id']}/snapshot", f"/tasks/column/{column}"]
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """Encode a few items per batch, so lists are split across batches"""
+    monkeypatch.setattr(wire, "STREAM_BATCH_ITEMS", 2)
+
+def test_formats_carry_the_json_body(client, headers, urls, small_batches):
+    for url in urls:
+        expected = client.get(url, headers=headers).json()
+        columnar = client.get(url, headers={**headers, "Accept": COLUMNAR_JSON})
+        assert columnar.headers["content-type"].startswith(COLUMNAR_JSON), url
+        assert columnar.json() == to_columnar(expected), url
+        if MSGPACK in wire.FORMATS:
+            import msgpack
+            packed = client.get(url, headers={**headers, "Accept": MSGPACK})
+            assert msgpack.unpackb(packed.content) == expected, url
+
+def test_large_formatted_bodies_are_compressed(client, headers, board, small_batches, monkeypatch):
+    monkeypatch.setattr(wire, "COMPRESSION_MIN_BYTES", 1)
+    column = board["columns"][0]["id"]
+    add_tasks(client, headers, column, [f"Task {i}" for i in range(5)])
+    url = f"/tasks/column/{column}"
+    expected = client.get(url, headers=headers).json()
+    response = client.get(url, headers={**headers, "Accept": COLUMNAR_JSON, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == to_columnar(expected)
+
+@pytest.mark.parametrize("orjson", [True, False], ids=["orjson", "pydantic_core"])
+def test_fast_serialization_writes_the_same_bytes(client, headers, board, orjson, monkeypatch):
+    if not orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    column = board["columns"][0]["id"]
+    tasks = [
+        {"title": "Due", "column_id": column, "priority": "high", "due_date": "2024-03-01T09:30:15.250000"},
+        {"title": "Due at midnight", "column_id": column, "description": "Notes", "due_date": "2024-03-02T00:00:00"},
+        {"title": "Undated", "column_id": column},
+    ]
+    for task in tasks:
+        assert client.post("/tasks", json=task, headers=headers).status_code == 201
+    board_id = board["board"]["id"]
+    with SessionLocal() as db:
+        validated = serialize(schemas.BoardSnapshot, load_snapshot(board_id, db))
+        rows = serialize(schemas.BoardSnapshot, load_snapshot_rows(board_id, db))
+    assert rows == validated
@@ -14,7 +14,7 @@ interface Task {
   description?: string;
   priority?: string;
   due_date?: string;
-  position: number;
+  rank: string;
   column_id: string;
 }
 
@@ -38,18 +38,47 @@ export default function Board({ boardId }: BoardProps) {
     loadBoard();
   }, [boardId]);
 
+  // Apply other people's changes as they happen instead of polling
+  useEffect(() => {
+    return api.subscribeToBoard(boardId, applyEvent, loadBoard);
+  }, [boardId]);
+
+  const applyEvent = (event: { entity: string; action: string; data: any; truncated?: boolean }) => {
+    if (event.entity !== 'task' || event.truncated) {
+      // Column and comment changes are rare enough to just reload the board
+      if (event.entity !== 'comment') loadBoard();
+      return;
+    }
+
+    const { id } = event.data;
+    setTasks((current) => {
+      let existing: Task | undefined;
+      const next: { [columnId: string]: Task[] } = {};
+      for (const [columnId, columnTasks] of Object.entries(current)) {
+        existing = existing || columnTasks.find((task) => task.id === id);
+        next[columnId] = columnTasks.filter((task) => task.id !== id);
+      }
+      if (event.action === 'deleted') return next;
+
+      const task = { ...existing, ...event.data } as Task;
+      // Moved to another board
+      if (!(task.column_id in next)) return next;
+      next[task.column_id] = [...next[task.column_id], task].sort((a, b) =>
+        a.rank < b.rank ? -1 : a.rank > b.rank ? 1 : a.id < b.id ? -1 : 1
+      );
+      return next;
+    });
+  };
+
   const loadBoard = async () => {
     try {
-      const columnsData = await api.getBoardColumns(boardId);
-      setColumns(columnsData.sort((a: BoardColumn, b: BoardColumn) => a.position - b.position));
+      const snapshot = await api.getBoardSnapshot(boardId);
+      setColumns(snapshot.columns);
 
       const tasksData: { [columnId: string]: Task[] } = {};
-      await Promise.all(
-        columnsData.map(async (column: BoardColumn) => {
-          const columnTasks = await api.getColumnTasks(column.id);
-          tasksData[column.id] = columnTasks;
-        })
-      );
+      snapshot.columns.forEach((column: BoardColumn & { tasks: Task[] }) => {
+        tasksData[column.id] = column.tasks;
+      });
       setTasks(tasksData);
     } catch (err) {
       console.error('Failed to load board:', err);
@@ -68,14 +97,10 @@ export default function Board({ boardId }: BoardProps) {
     if (!selectedColumn) return;
 
     try {
-      const columnTasks = tasks[selectedColumn] || [];
-      const position = columnTasks.length;
-
       await api.createTask({
         title: newTaskTitle,
         description: newTaskDescription,
         column_id: selectedColumn,
-        position,
         priority: newTaskPriority || undefined,
       });
 
@@ -6,7 +6,7 @@ interface Task {
   description?: string;
   priority?: string;
   due_date?: string;
-  position: number;
+  rank: string;
 }
 
 interface ColumnProps {
@@ -48,7 +48,7 @@ export default function Column({ column, tasks, onTaskClick, onAddTask }: Column
       </div>
       <div className="space-y-3">
         {tasks
-          .sort((a, b) => a.position - b.position)
+          .sort((a, b) => (a.rank < b.rank ? -1 : a.rank > b.rank ? 1 : 0))
           .map((task) => (
             <TaskCard
               key={task.id}
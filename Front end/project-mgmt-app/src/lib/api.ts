@@ -59,6 +59,21 @@ export class ApiClient {
     return response.json();
   }
 
+  // Follows next_cursor through a paginated list endpoint and returns every item
+  private async requestAll(endpoint: string, limit = 200) {
+    const items: any[] = [];
+    let cursor: string | null = null;
+    do {
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (cursor) params.append('cursor', cursor);
+      const separator = endpoint.includes('?') ? '&' : '?';
+      const page = await this.request(`${endpoint}${separator}${params}`);
+      items.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+  }
+
   // Auth
   async register(email: string, name: string, password: string) {
     return this.request('/auth/register', {
@@ -96,7 +111,7 @@ export class ApiClient {
 
   // Projects
   async getProjects() {
-    return this.request('/projects');
+    return this.requestAll('/projects');
   }
 
   async createProject(name: string, description?: string) {
@@ -125,7 +140,7 @@ export class ApiClient {
 
   // Boards
   async getProjectBoards(projectId: string) {
-    return this.request(`/boards/project/${projectId}`);
+    return this.requestAll(`/boards/project/${projectId}`);
   }
 
   async createBoard(projectId: string, name: string, position: number) {
@@ -135,9 +150,63 @@ export class ApiClient {
     });
   }
 
+  async getBoardSnapshot(boardId: string) {
+    return this.request(`/boards/${boardId}/snapshot`);
+  }
+
+  // Streams a board's change events (Server-Sent Events) until the returned function is called.
+  // Uses fetch rather than EventSource so the bearer token can be sent; onReset means events
+  // may have been missed (dropped as a slow consumer, or disconnected) and the board should reload
+  subscribeToBoard(boardId: string, onEvent: (event: any) => void, onReset: () => void) {
+    const controller = new AbortController();
+
+    const connect = async () => {
+      const token = this.getToken();
+      const response = await fetch(`${this.baseUrl}/boards/${boardId}/events`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal: controller.signal,
+      });
+      if (!response.ok || !response.body) {
+        throw new Error('Failed to subscribe to board events');
+      }
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += value;
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop() || '';
+        for (const message of messages) {
+          if (message.startsWith('event: dropped')) return;
+          const data = message.split('\n').find((line) => line.startsWith('data: '));
+          if (data) onEvent(JSON.parse(data.slice(6)));
+        }
+      }
+    };
+
+    const run = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          await connect();
+        } catch (err) {
+          if (controller.signal.aborted) return;
+          console.error('Board event stream failed:', err);
+        }
+        if (controller.signal.aborted) return;
+        onReset();
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+      }
+    };
+
+    run();
+    return () => controller.abort();
+  }
+
   // Columns
   async getBoardColumns(boardId: string) {
-    return this.request(`/columns/board/${boardId}`);
+    return this.requestAll(`/columns/board/${boardId}`);
   }
 
   async createColumn(boardId: string, name: string, position: number) {
@@ -149,14 +218,15 @@ export class ApiClient {
 
   // Tasks
   async getColumnTasks(columnId: string) {
-    return this.request(`/tasks/column/${columnId}`);
+    return this.requestAll(`/tasks/column/${columnId}`);
   }
 
   async createTask(data: {
     title: string;
     description?: string;
     column_id: string;
-    position: number;
+    before_task_id?: string;
+    after_task_id?: string;
     priority?: string;
     due_date?: string;
     assignee_id?: string;
@@ -174,8 +244,11 @@ export class ApiClient {
     });
   }
 
-  async moveTask(id: string, columnId: string, position: number) {
-    return this.request(`/tasks/${id}/move?new_column_id=${columnId}&new_position=${position}`, {
+  async moveTask(id: string, columnId: string, anchor: { beforeTaskId?: string; afterTaskId?: string } = {}) {
+    const params = new URLSearchParams({ new_column_id: columnId });
+    if (anchor.beforeTaskId) params.append('before_task_id', anchor.beforeTaskId);
+    if (anchor.afterTaskId) params.append('after_task_id', anchor.afterTaskId);
+    return this.request(`/tasks/${id}/move?${params}`, {
       method: 'POST',
     });
   }
@@ -188,7 +261,7 @@ export class ApiClient {
 
   // Comments
   async getTaskComments(taskId: string) {
-    return this.request(`/comments/task/${taskId}`);
+    return this.requestAll(`/comments/task/${taskId}`);
   }
 
   async createComment(taskId: string, content: string) {